@@ -0,0 +1,8 @@
+"""
+pytestの設定
+
+test_startup.py と test_whispermodel.py はGUI・音声デバイス・モデルが必要な
+手動実行用のスクリプトのため、pytestでは収集しない。
+"""
+
+collect_ignore = ["test_startup.py", "test_whispermodel.py"]
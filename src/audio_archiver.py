@@ -0,0 +1,281 @@
+"""
+OfflineVoiceLogger - 音声アーカイブモジュール
+
+キャプチャした音声をバックグラウンドで圧縮して保存する
+- キャプチャのリングバッファにタップした専用バッファから、まとめて読み出してエンコード
+- PyAVによるFLAC (可逆) / Opus (非可逆、生PCMの約1/10) 出力
+- 一定時間ごとのセグメントファイルとシークインデックス (JSON)
+"""
+
+import json
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+from logger import get_logger
+from audio_capture import AudioRingBuffer
+
+logger = get_logger(__name__)
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+    logger.warning("PyAVがインストールされていません。音声アーカイブは無効です")
+
+
+class ArchiveError(Exception):
+    """音声アーカイブのエラー"""
+    pass
+
+
+class AudioArchiver:
+    """キャプチャ音声を圧縮ファイルへ保存するクラス
+
+    tapはキャプチャのリングバッファに登録するバッファで、音声コールバックは
+    そこへのコピーのみを行う。エンコードは専用スレッドがbatch_secondsごとに
+    まとめて行うため、リアルタイム処理と競合しない。
+    出力はsegment_secondsごとに区切ったファイルと、各セグメントの開始時刻を
+    記録したインデックスで、任意の時刻へ先頭からデコードせずに移動できる。
+    """
+
+    # 形式 → (コンテナ, コーデック, 拡張子, 入力サンプル形式)
+    FORMATS = {
+        'flac': ('flac', 'flac', 'flac', 's16'),
+        'opus': ('ogg', 'libopus', 'opus', 'flt'),
+    }
+    INDEX_FILENAME = 'index.json'
+
+    def __init__(self, directory: str, sample_rate: int = 16000, audio_format: str = "opus",
+                 bitrate: int = 32000, segment_seconds: float = 60.0,
+                 batch_seconds: float = 1.0, buffer_seconds: float = 30.0):
+        """
+        Args:
+            directory (str): 出力ディレクトリ (セグメントとインデックスを置く)
+            sample_rate (int): サンプリングレート
+            audio_format (str): "flac" または "opus"
+            bitrate (int): Opusのビットレート (bps)
+            segment_seconds (float): 1セグメントの長さ (秒)
+            batch_seconds (float): エンコードをまとめて行う間隔 (秒)
+            buffer_seconds (float): タップ用バッファの長さ (秒)
+
+        Raises:
+            ArchiveError: PyAVが利用できない場合
+        """
+        if not AV_AVAILABLE:
+            raise ArchiveError("PyAVがインストールされていません")
+        if audio_format not in self.FORMATS:
+            logger.warning(f"不明なアーカイブ形式: {audio_format}, opusを使用します")
+            audio_format = "opus"
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.audio_format = audio_format
+        self.bitrate = bitrate
+        self.segment_samples = max(1, int(sample_rate * segment_seconds))
+        self.batch_seconds = batch_seconds
+
+        # キャプチャのリングバッファに登録するタップ (単一プロデューサ/単一コンシューマ)
+        self.tap = AudioRingBuffer(int(sample_rate * buffer_seconds))
+        self._batch = np.empty(self.tap.capacity, dtype=np.float32)
+
+        self._container = None
+        self._stream = None
+        self._segment_written = 0
+        self.segments: List[Dict] = []  # インデックス
+        self.total_samples = 0
+        self.encode_time = 0.0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """エンコードスレッドを開始"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"音声アーカイブ開始: {self.directory} ({self.audio_format})")
+
+    def stop(self):
+        """残りをエンコードしてファイルとインデックスを閉じる"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        self._thread = None
+
+        self._close_segment()
+        self._write_index()
+
+        raw_bytes = self.total_samples * 2
+        archived_bytes = sum(segment['bytes'] for segment in self.segments)
+        ratio = archived_bytes / raw_bytes if raw_bytes else 0.0
+        logger.info(f"音声アーカイブ終了: {self.total_samples / self.sample_rate:.1f}秒, "
+                    f"{len(self.segments)}ファイル, {archived_bytes / 1024 / 1024:.2f}MB "
+                    f"(16bit PCM比{ratio:.0%}), エンコード時間{self.encode_time:.2f}秒")
+        if self.tap.overflow_samples:
+            logger.warning(f"アーカイブが追いつかず破棄したサンプル: {self.tap.overflow_samples}")
+
+    def _encode_loop(self):
+        """batch_secondsごとにタップから読み出してエンコード"""
+        while not self._stop.wait(self.batch_seconds):
+            self._encode_pending()
+        self._encode_pending()
+
+    def _encode_pending(self):
+        """タップに溜まったサンプルをまとめてエンコード"""
+        available = len(self.tap)
+        if available == 0:
+            return
+        samples = self.tap.read(available, out=self._batch)
+        start = time.perf_counter()
+        try:
+            position = 0
+            while position < len(samples):
+                if self._container is None:
+                    self._open_segment()
+                n = min(len(samples) - position, self.segment_samples - self._segment_written)
+                self._encode(samples[position:position + n])
+                position += n
+                if self._segment_written >= self.segment_samples:
+                    self._close_segment()
+        except Exception as e:
+            logger.error(f"音声アーカイブのエンコードエラー: {e}")
+        finally:
+            self.tap.consume(available)
+            self.encode_time += time.perf_counter() - start
+
+    def _open_segment(self):
+        """新しいセグメントファイルを開く"""
+        container_format, codec, extension, _ = self.FORMATS[self.audio_format]
+        filename = f"audio_{len(self.segments):04d}.{extension}"
+        self._container = av.open(str(self.directory / filename), 'w', format=container_format)
+        self._stream = self._container.add_stream(codec, rate=self.sample_rate, layout='mono')
+        if self.audio_format == 'opus':
+            self._stream.bit_rate = self.bitrate
+        self._segment_written = 0
+        self.segments.append({
+            'file': filename,
+            'start': self.total_samples / self.sample_rate,
+            'duration': 0.0,
+            'bytes': 0,
+        })
+
+    def _encode(self, samples: np.ndarray):
+        """サンプルをエンコードしてセグメントへ書き込む"""
+        sample_format = self.FORMATS[self.audio_format][3]
+        if sample_format == 's16':
+            data = np.clip(samples * 32767.0, -32768, 32767).astype(np.int16)
+        else:
+            data = np.ascontiguousarray(samples, dtype=np.float32)
+        frame = av.AudioFrame.from_ndarray(data.reshape(1, -1), format=sample_format, layout='mono')
+        frame.sample_rate = self.sample_rate
+        frame.pts = self._segment_written
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+        self._segment_written += len(samples)
+        self.total_samples += len(samples)
+
+    def _close_segment(self):
+        """エンコーダをフラッシュしてセグメントを閉じる"""
+        if self._container is None:
+            return
+        try:
+            for packet in self._stream.encode(None):
+                self._container.mux(packet)
+            self._container.close()
+        except Exception as e:
+            logger.error(f"音声アーカイブのクローズエラー: {e}")
+        segment = self.segments[-1]
+        segment['duration'] = self._segment_written / self.sample_rate
+        try:
+            segment['bytes'] = (self.directory / segment['file']).stat().st_size
+        except OSError:
+            pass
+        self._container = None
+        self._stream = None
+        # セグメントごとにインデックスを更新 (異常終了しても閉じたセグメントは辿れる)
+        self._write_index()
+
+    def _write_index(self):
+        """シークインデックスを書き出す"""
+        index = {
+            'sample_rate': self.sample_rate,
+            'format': self.audio_format,
+            'duration': self.total_samples / self.sample_rate,
+            'segments': self.segments,
+        }
+        try:
+            with open(self.directory / self.INDEX_FILENAME, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.error(f"アーカイブインデックスの書き出しエラー: {e}")
+
+
+def read_archive(directory: str, start: float, duration: float,
+                 sample_rate: int = 16000) -> Optional[np.ndarray]:
+    """アーカイブの任意の時刻から音声を読み出す
+
+    インデックスから該当セグメントを選び、セグメント内でシークしてから
+    デコードするため、先頭からデコードする必要はない。
+
+    Args:
+        directory (str): アーカイブのディレクトリ
+        start (float): 開始時刻 (秒)
+        duration (float): 長さ (秒)
+        sample_rate (int): 出力サンプリングレート
+
+    Returns:
+        Optional[np.ndarray]: float32モノラル音声 (失敗時はNone)
+    """
+    if not AV_AVAILABLE:
+        logger.error("PyAVがインストールされていません")
+        return None
+    directory = Path(directory)
+    try:
+        with open(directory / AudioArchiver.INDEX_FILENAME, encoding='utf-8') as f:
+            index = json.load(f)
+    except Exception as e:
+        logger.error(f"アーカイブインデックスの読み込みエラー: {e}")
+        return None
+
+    end = start + duration
+    pieces = []
+    for segment in index['segments']:
+        segment_end = segment['start'] + segment['duration']
+        if segment_end <= start or segment['start'] >= end:
+            continue
+        local_start = max(0.0, start - segment['start'])
+        local_end = end - segment['start']
+
+        resampler = av.AudioResampler(format='flt', layout='mono', rate=sample_rate)
+        first_time = None
+        decoded = []
+        with av.open(str(directory / segment['file'])) as container:
+            stream = container.streams.audio[0]
+            if local_start > 0:
+                container.seek(int(local_start / stream.time_base), stream=stream)
+            for frame in container.decode(stream):
+                frame_time = float(frame.pts * stream.time_base) if frame.pts is not None else 0.0
+                if first_time is None:
+                    first_time = frame_time
+                for out in resampler.resample(frame):
+                    decoded.append(out.to_ndarray().reshape(-1))
+                if frame_time >= local_end:
+                    break
+            for out in resampler.resample(None):
+                decoded.append(out.to_ndarray().reshape(-1))
+
+        if decoded:
+            # シーク位置は要求時刻より前のことがあるため、その分を切り捨てる
+            data = np.concatenate(decoded)
+            skip = int(round(max(0.0, local_start - first_time) * sample_rate))
+            length = int(round((min(local_end, segment['duration']) - local_start) * sample_rate))
+            pieces.append(data[skip:skip + length])
+
+    if not pieces:
+        return np.zeros(0, dtype=np.float32)
+    audio = np.concatenate(pieces)
+    return audio[:int(round(duration * sample_rate))].astype(np.float32, copy=False)
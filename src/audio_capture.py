@@ -7,13 +7,16 @@ Windowsループバック音声デバイスからのリアルタイム音声キ
 - デバイス再接続機能
 """
 
-import sounddevice as sd
 import numpy as np
 import threading
+import time
 import queue
-import collections
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
 from logger import get_logger
+from vad import EnergyVAD
+from resampler import StreamingResampler
+from audio_source import AudioSource, SoundDeviceSource
 
 logger = get_logger(__name__)
 
@@ -28,42 +31,547 @@ class AudioCaptureError(Exception):
     pass
 
 
+class AudioRingBuffer:
+    """固定長のfloat32リングバッファ (単一プロデューサ/単一コンシューマ)
+
+    単一のnp.ndarrayを事前確保し、書き込み・読み出しともにスライス単位で
+    ベクトル化して行う。書き込み位置はプロデューサ (音声コールバック) のみ、
+    読み出し位置はコンシューマのみが更新するため、コールバック側はロック不要で
+    コンシューマを待つことがない。
+    インデックスは単調増加の整数で、データを書き終えてから位置を公開する。
+    容量を超える書き込みは入りきらない新しいサンプルを破棄し、オーバーフローとして数える。
+    タップ (write(samples)を持つオブジェクト) を登録すると、書き込んだ全サンプルが
+    プロデューサ側でそのまま渡される (音声ジャーナルなど)。
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity (int): 最大サンプル数
+        """
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._write_index = 0  # 書き込み済みサンプルの累計 (プロデューサのみ更新)
+        self._read_index = 0  # 読み出し済みサンプルの累計 (コンシューマのみ更新)
+        self._taps = ()  # 書き込みを受け取るタップ (置き換えのみで更新)
+
+        # 統計
+        self.overflow_count = 0  # 書き込みが溢れた回数
+        self.overflow_samples = 0  # 溢れて破棄したサンプル数
+
+    def __len__(self) -> int:
+        return self._write_index - self._read_index
+
+    @property
+    def write_index(self) -> int:
+        """書き込み済みサンプルの累計"""
+        return self._write_index
+
+    @property
+    def read_index(self) -> int:
+        """読み出し済み (破棄済み) サンプルの累計"""
+        return self._read_index
+
+    def write(self, samples: np.ndarray):
+        """サンプルを書き込む (プロデューサ側、空きを超えた分は破棄)
+
+        Args:
+            samples (np.ndarray): 1次元の音声データ
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        # タップにはリングの空きに関係なく全サンプルを渡す
+        for tap in self._taps:
+            tap.write(samples)
+
+        write_index = self._write_index
+        free = self.capacity - (write_index - self._read_index)
+        if n > free:
+            self.overflow_count += 1
+            self.overflow_samples += n - free
+            n = free
+            if n == 0:
+                return
+
+        pos = write_index % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:n]
+        # データを書き終えてから公開する
+        self._write_index = write_index + n
+
+    def add_tap(self, tap):
+        """書き込みを受け取るタップを登録
+
+        Args:
+            tap: write(samples)メソッドを持つオブジェクト (プロデューサのスレッドで呼ばれる)
+        """
+        # タプルを丸ごと置き換えるため、コールバック側は古いか新しいかどちらかの一覧を見る
+        self._taps = self._taps + (tap,)
+
+    def remove_tap(self, tap):
+        """タップの登録を解除"""
+        self._taps = tuple(t for t in self._taps if t is not tap)
+
+    def read(self, count: int = None, out: np.ndarray = None, skip: int = 0) -> np.ndarray:
+        """古い順にサンプルをコピーして返す (コンシューマ側、バッファからは削除しない)
+
+        Args:
+            count (int): 読み出すサンプル数 (Noneの場合は全て、溜まっている分を超える場合は溜まっている分)
+            out (np.ndarray): 書き込み先配列 (Noneの場合は新規確保)
+            skip (int): 先頭から読み飛ばすサンプル数
+
+        Returns:
+            np.ndarray: float32の音声データ
+        """
+        read_index = self._read_index
+        size = self._write_index - read_index
+        skip = min(max(skip, 0), size)
+        available = size - skip
+        if count is None or count > available:
+            count = available
+        if out is None:
+            out = np.empty(count, dtype=np.float32)
+
+        start = (read_index + skip) % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < count:
+            out[first:count] = self._data[:count - first]
+        return out[:count]
+
+    def consume(self, count: int):
+        """古い順にサンプルを破棄する (コンシューマ側)
+
+        Args:
+            count (int): 破棄するサンプル数
+        """
+        self._read_index += min(count, len(self))
+
+    def clear(self):
+        """バッファを空にする (コンシューマ側)
+
+        呼び出し時点までに書き込まれた分をすべて破棄する。read()の後に呼ぶと、
+        読み出しから呼び出しまでにコールバックが書き込んだ分も失われるため、
+        読み出した分の破棄にはconsume()を使う。
+        """
+        self._read_index = self._write_index
+
+    def get_stats(self) -> Dict[str, int]:
+        """オーバーフローの統計を取得 (破棄したサンプルがないことの確認用)
+
+        Returns:
+            Dict[str, int]: 各カウンタの値
+        """
+        return {
+            "overflow_count": self.overflow_count,
+            "overflow_samples": self.overflow_samples,
+        }
+
+
+class ChunkPool:
+    """チャンク用float32バッファのプール
+
+    定常状態では新規確保を行わず、解放されたバッファを再利用する。
+    """
+
+    def __init__(self, chunk_capacity: int):
+        """
+        Args:
+            chunk_capacity (int): 1バッファあたりの最大サンプル数
+        """
+        self.chunk_capacity = int(chunk_capacity)
+        self._free = []
+        self._lock = threading.Lock()
+        self.allocated_count = 0  # 確保したバッファの総数
+        self.in_use_count = 0  # 貸し出し中のバッファ数
+
+    def acquire(self) -> np.ndarray:
+        """バッファを取得 (空きがなければ新規確保)"""
+        with self._lock:
+            self.in_use_count += 1
+            if self._free:
+                return self._free.pop()
+            self.allocated_count += 1
+        logger.debug(f"チャンクバッファを新規確保: 合計{self.allocated_count}個")
+        return np.empty(self.chunk_capacity, dtype=np.float32)
+
+    def release(self, buffer: np.ndarray):
+        """バッファをプールに返却"""
+        with self._lock:
+            self.in_use_count -= 1
+            self._free.append(buffer)
+
+
+class AudioChunk:
+    """プールから貸し出される音声チャンク
+
+    dataは読み取り専用ビュー。使用後はrelease()でバッファをプールへ返却する
+    (with文でも利用可能)。
+    """
+
+    def __init__(self, pool: ChunkPool, buffer: np.ndarray, length: int,
+                 hop: int = None, lead: int = 0):
+        """
+        Args:
+            pool (ChunkPool): 返却先のプール
+            buffer (np.ndarray): プールから取得したバッファ
+            length (int): 有効サンプル数
+            hop (int): タイムラインを進めるサンプル数 (Noneの場合はlength)
+            lead (int): チャンク直前に読み飛ばした (無音の) サンプル数
+        """
+        self._pool = pool
+        self._buffer = buffer
+        self.data = buffer[:length]
+        self.data.flags.writeable = False
+        self.hop = length if hop is None else hop
+        self.lead = lead
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def release(self):
+        """バッファをプールへ返却 (複数回呼んでも安全)"""
+        if self._buffer is not None:
+            self.data = None
+            buffer, self._buffer = self._buffer, None
+            self._pool.release(buffer)
+
+
+class DeviceRegistry:
+    """音声デバイスのレジストリ
+
+    入力バックエンド (既定はPortAudio) のデバイス一覧を1回の問い合わせで取得・分類してキャッシュする。
+    デバイス構成 (ID・名前・ホストAPI・チャンネル数) のハッシュが変わった場合か、
+    明示的に要求された場合のみ再分類する。
+    """
+
+    # ループバックデバイスとみなす名前 (小文字で部分一致)
+    LOOPBACK_KEYWORDS = ('stereo mix', 'ステレオミキサー', 'loopback', 'what u hear')
+
+    def __init__(self, source: AudioSource = None, suspend_interval_seconds: float = 10.0):
+        """
+        Args:
+            source (AudioSource): 入力バックエンド (Noneの場合はsounddevice)
+            suspend_interval_seconds (float): 他のストリームを止めて再初期化する最短間隔 (秒)
+        """
+        self.source = source or SoundDeviceSource()
+        self.suspend_interval_seconds = suspend_interval_seconds
+        self._devices = None  # 分類済みの入力デバイスリスト
+        self._by_id = {}
+        self._signature = None  # デバイス構成のハッシュ
+        self._lock = threading.Lock()
+        self._rescan_lock = threading.Lock()  # 再初期化と再取得を直列化する
+        self._streams = []  # ストリームを開いているAudioCapture (再初期化時に開き直す)
+        self._streams_lock = threading.Lock()
+        self._last_suspend = None  # 他のストリームを止めて再初期化した時刻
+
+    @property
+    def active_streams(self) -> int:
+        """開いているストリーム数"""
+        with self._streams_lock:
+            return len(self._streams)
+
+    def register_stream(self, capture):
+        """ストリームを開いたAudioCaptureを登録 (キャプチャのスレッドから呼ばれる)"""
+        with self._streams_lock:
+            if capture not in self._streams:
+                self._streams.append(capture)
+
+    def unregister_stream(self, capture):
+        """ストリームを閉じたAudioCaptureの登録を解除"""
+        with self._streams_lock:
+            if capture in self._streams:
+                self._streams.remove(capture)
+
+    def _classify(self, device_id: int, device: Dict, hostapis) -> Dict[str, Any]:
+        """デバイス情報を分類して辞書にする"""
+        device_info = {
+            'id': device_id,
+            'name': device['name'],
+            'host_api': hostapis[device['hostapi']]['name'],
+            'max_input_channels': device['max_input_channels'],
+            'default_samplerate': device['default_samplerate']
+        }
+
+        # Windowsのループバックデバイス判定
+        # WASAPIの場合、"Stereo Mix"や"ステレオミキサー"などが該当
+        name = device['name'].lower()
+        is_loopback = any(keyword in name for keyword in self.LOOPBACK_KEYWORDS)
+        device_info['is_loopback'] = is_loopback
+
+        # デバイスタイプを判定
+        if is_loopback:
+            device_info['device_type'] = 'system_audio'
+            device_info['type_display'] = 'スクリーンキャプチャー/システムオーディオ'
+        else:
+            device_info['device_type'] = 'microphone'
+            device_info['type_display'] = 'マイク'
+        return device_info
+
+    def refresh(self, force: bool = False) -> bool:
+        """バックエンドに1回だけ問い合わせ、構成が変わっていれば再分類する
+
+        Args:
+            force (bool): 構成が同じでも再分類する
+
+        Returns:
+            bool: 再分類した場合True
+        """
+        devices = self.source.query_devices()
+        hostapis = self.source.query_hostapis()
+        signature = hash(tuple(
+            (i, d['name'], d['hostapi'], d['max_input_channels']) for i, d in enumerate(devices)
+        ))
+
+        with self._lock:
+            if not force and signature == self._signature and self._devices is not None:
+                return False
+
+            device_list = []
+            for i, device in enumerate(devices):
+                # 入力デバイスのみ
+                if device['max_input_channels'] > 0:
+                    device_info = self._classify(i, device, hostapis)
+                    device_list.append(device_info)
+                    logger.debug(f"デバイス検出: {device_info}")
+
+            self._devices = device_list
+            self._by_id = {d['id']: d for d in device_list}
+            self._signature = signature
+
+        logger.info(f"デバイスレジストリ更新: 入力デバイス{len(device_list)}個")
+        return True
+
+    def rescan(self, suspend_streams: bool = True) -> bool:
+        """バックエンドを再初期化してホットプラグされたデバイスを反映する
+
+        再初期化すると開いているストリームが無効になるため、他のソースのストリームは
+        一時的に閉じ、再初期化後に同じ名前のデバイスで開き直す (閉じていた時間は
+        各ソースの欠落として記録される)。止める頻度はsuspend_interval_secondsで制限し、
+        間隔内やsuspend_streams=Falseの場合は一覧の再取得のみ行う。
+        バックエンドが再初期化に対応していない場合も一覧の再取得のみとなる。
+
+        Args:
+            suspend_streams (bool): 他のストリームを止めてでも再初期化する
+
+        Returns:
+            bool: デバイス構成が変わった場合True
+        """
+        with self._rescan_lock:
+            if not self.source.can_reinitialize:
+                return self.refresh()
+            with self._streams_lock:
+                others = list(self._streams)
+            if not others:
+                self.source.reinitialize()
+                return self.refresh()
+
+            now = time.monotonic()
+            recent = (self._last_suspend is not None
+                      and now - self._last_suspend < self.suspend_interval_seconds)
+            if not suspend_streams or recent:
+                logger.debug(f"他のストリームが開いているため再初期化をスキップ ({len(others)}個)")
+                return self.refresh()
+
+            self._last_suspend = now
+            logger.info(f"デバイスの再スキャンのため他のストリームを一時停止: {len(others)}個")
+            suspended = [capture for capture in others if capture._suspend_stream()]
+            try:
+                self.source.reinitialize()
+                changed = self.refresh()
+            finally:
+                for capture in suspended:
+                    capture._resume_stream()
+            return changed
+
+    def get_devices(self) -> List[Dict[str, Any]]:
+        """キャッシュ済みの入力デバイスリストを取得 (未取得なら問い合わせる)
+
+        Returns:
+            List[Dict]: デバイス情報のリスト (コピー)
+        """
+        if self._devices is None:
+            self.refresh()
+        with self._lock:
+            return [dict(d) for d in self._devices]
+
+    def get_device(self, device_id: int) -> Optional[Dict[str, Any]]:
+        """IDからキャッシュ済みのデバイス情報を取得
+
+        Returns:
+            Optional[Dict]: デバイス情報 (存在しない場合はNone)
+        """
+        if self._devices is None:
+            self.refresh()
+        with self._lock:
+            device = self._by_id.get(device_id)
+            return dict(device) if device is not None else None
+
+    def find_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """名前からキャッシュ済みのデバイス情報を取得
+
+        Returns:
+            Optional[Dict]: デバイス情報 (存在しない場合はNone)
+        """
+        for device in self.get_devices():
+            if device['name'] == name:
+                return device
+        return None
+
+
 class AudioCapture:
     """音声キャプチャクラス"""
 
+    # チャンク分割モード
+    CHUNK_MODES = ['fixed', 'sliding', 'vad']
+
     def __init__(self, sample_rate: int = 16000, channels: int = 1,
-                 buffer_size_seconds: int = 10):
+                 buffer_size_seconds: int = 10, chunk_mode: str = "fixed",
+                 window_seconds: float = 6.0, hop_seconds: float = 4.0,
+                 vad_threshold: float = 0.5, vad_min_silence_ms: int = 500,
+                 vad_preroll_ms: int = 300, vad_max_chunk_seconds: float = 8.0,
+                 use_native_rate: bool = True, device_registry: DeviceRegistry = None,
+                 stall_timeout_seconds: float = 2.0, reconnect_max_backoff_seconds: float = 8.0,
+                 blocksize: int = 0, latency=None, status_report_seconds: float = 10.0):
         """
         Args:
             sample_rate (int): サンプリングレート (16kHz推奨)
             channels (int): チャンネル数 (1=モノラル, 2=ステレオ)
             buffer_size_seconds (int): バッファサイズ (秒)
+            chunk_mode (str): "fixed" (重なりなし), "sliding" (重なりあり窓),
+                              "vad" (発話単位で区切る)
+            window_seconds (float): チャンク (窓) の長さ (秒)
+            hop_seconds (float): slidingモードで窓をずらす幅 (秒)
+            vad_threshold (float): vadモードの音声判定しきい値 (0.0-1.0)
+            vad_min_silence_ms (int): vadモードで区切る無音の長さ (ミリ秒)
+            vad_preroll_ms (int): vadモードで発話開始前に含める長さ (ミリ秒)
+            vad_max_chunk_seconds (float): vadモードで強制的に区切る長さ (秒)
+            use_native_rate (bool): デバイスのネイティブレートで開き、sample_rateへ変換する
+            device_registry (DeviceRegistry): 共有するデバイスレジストリ (Noneの場合は新規作成)
+            stall_timeout_seconds (float): コールバックが止まったとみなす時間 (秒)
+            reconnect_max_backoff_seconds (float): 再接続試行間隔の上限 (秒)
+            blocksize (int): 1回のコールバックのフレーム数 (0の場合はバックエンドに任せる)
+            latency: ストリームの遅延 ("low", "high", 秒数、またはNoneで既定)
+            status_report_seconds (float): オーバーフロー等のステータスをまとめて報告する間隔 (秒)
         """
         self.sample_rate = sample_rate
         self.channels = channels
         self.buffer_size_seconds = buffer_size_seconds
         self.max_buffer_samples = sample_rate * buffer_size_seconds
-        # 最小バッファサイズ（6秒）- これ以上貯まったら文字起こし開始
-        self.min_buffer_samples = sample_rate * 6
-
-        # 音声バッファ (dequeで効率的なFIFO)
-        self.audio_buffer = collections.deque(maxlen=self.max_buffer_samples)
+        # 最小バッファサイズ（窓長、既定6秒）- これ以上貯まったら文字起こし開始
+        self.min_buffer_samples = min(int(sample_rate * window_seconds), self.max_buffer_samples)
+
+        # チャンク分割設定
+        if chunk_mode not in self.CHUNK_MODES:
+            logger.warning(f"不明なチャンクモード: {chunk_mode}, fixedを使用します")
+            chunk_mode = "fixed"
+        self.chunk_mode = chunk_mode
+        # slidingモードでの窓移動量（窓長を超えないように制限）
+        self.hop_samples = max(1, min(int(sample_rate * hop_seconds), self.min_buffer_samples))
+
+        # vadモード設定（最大長はバッファ容量から1秒の余裕を残す）
+        self.vad = EnergyVAD(sample_rate=sample_rate, threshold=vad_threshold)
+        self.vad_min_silence_samples = int(sample_rate * vad_min_silence_ms / 1000)
+        self.vad_preroll_samples = int(sample_rate * vad_preroll_ms / 1000)
+        self.vad_max_chunk_samples = max(
+            self.vad.frame_samples,
+            min(int(sample_rate * vad_max_chunk_seconds), self.max_buffer_samples - sample_rate)
+        )
+        self._reset_vad_state()
+
+        # 音声バッファ (事前確保したfloat32のSPSCリングバッファ)
+        # 書き込みは音声コールバックのみでロック不要。buffer_lockはコンシューマ側同士の排他用
+        self.audio_buffer = AudioRingBuffer(self.max_buffer_samples)
         self.buffer_lock = threading.Lock()
 
+        # チャンク受け渡し用バッファプール
+        self.chunk_pool = ChunkPool(self.max_buffer_samples)
+
+        # ネイティブレートでのキャプチャ (OS側のリサンプリングを回避)
+        self.use_native_rate = use_native_rate
+        self.stream_sample_rate = sample_rate  # ストリームを開いた実際のレート
+        self.resampler = None
+
+        # デバイス一覧のキャッシュ
+        self.device_registry = device_registry or DeviceRegistry()
+
         # キャプチャ状態
         self.is_capturing = False
         self.capture_thread = None
         self.device_id = None
+        self.device_name = None  # 再接続時は名前でデバイスを探す
         self.stream = None
 
-        # 音声レベル
+        # 再接続の監視 (ホットプラグ対応)
+        self.stall_timeout_seconds = stall_timeout_seconds
+        self.reconnect_max_backoff_seconds = reconnect_max_backoff_seconds
+        self.supervisor_thread = None
+        self._supervisor_stop = threading.Event()
+        self._stream_failed = False  # ストリームが予期せず終了した
+        self._last_callback_time = 0.0
+        self.is_reconnecting = False
+        self._stream_lock = threading.RLock()  # ストリームの開閉と再接続の開始を排他する
+        self._suspended_since = None  # 再スキャンで一時停止した時点の最後のコールバック時刻
+        # 欠落区間 (リングバッファ上の位置, 欠落サンプル数)。チャンク取得時にタイムラインへ反映
+        self._pending_gaps = []
+        self.timeline_events = []  # 再接続などのタイムラインイベント
+
+        # ストリームのブロックサイズと遅延 (小さいほど低遅延だがオーバーフローしやすい)
+        self.blocksize = max(0, int(blocksize or 0))
+        self.latency = self._parse_latency(latency)
+        # コールバックのステータスはカウンタに集計し、監視スレッドが一定間隔でまとめて報告する
+        # (コールバック内でログを出すと負荷時に悪化するため)
+        self.status_report_seconds = status_report_seconds
+        self.stream_stats = self._new_stream_stats()
+        self._reported_stream_stats = dict(self.stream_stats)
+        self._last_status_report = 0.0
+
+        # 音声レベル (コールバックが単一の代入で更新するためロック不要)
         self.current_audio_level = 0.0
-        self.audio_level_lock = threading.Lock()
 
-        logger.info(f"AudioCapture初期化: {sample_rate}Hz, {channels}ch, バッファ{buffer_size_seconds}秒")
+        logger.info(f"AudioCapture初期化: {sample_rate}Hz, {channels}ch, バッファ{buffer_size_seconds}秒, "
+                    f"チャンクモード={self.chunk_mode}")
+
+    @staticmethod
+    def _parse_latency(latency):
+        """遅延設定を正規化 ("low"/"high"/秒数/None)"""
+        if latency is None:
+            return None
+        if isinstance(latency, str):
+            latency = latency.strip().lower()
+            if latency in ('', 'default'):
+                return None
+            if latency in ('low', 'high'):
+                return latency
+        try:
+            value = float(latency)
+        except (TypeError, ValueError):
+            logger.warning(f"不明なストリーム遅延設定: {latency}, 既定値を使用します")
+            return None
+        return value if value > 0 else None
+
+    @staticmethod
+    def _new_stream_stats() -> Dict[str, Any]:
+        return {
+            'callbacks': 0,
+            'input_overflow': 0,
+            'input_underflow': 0,
+            'other_status': 0,
+            'max_block_frames': 0,
+            'max_callback_seconds': 0.0,
+        }
 
     def list_devices(self) -> List[Dict[str, Any]]:
-        """利用可能な音声デバイスのリストを取得
+        """利用可能な音声デバイスのリストを取得 (デバイスレジストリのキャッシュを使用)
 
         Returns:
             List[Dict]: デバイス情報のリスト
@@ -74,39 +582,7 @@ class AudioCapture:
                 - is_loopback: ループバックデバイスか (Windowsの場合)
         """
         try:
-            devices = sd.query_devices()
-            device_list = []
-
-            for i, device in enumerate(devices):
-                # 入力デバイスのみ
-                if device['max_input_channels'] > 0:
-                    device_info = {
-                        'id': i,
-                        'name': device['name'],
-                        'host_api': sd.query_hostapis(device['hostapi'])['name'],
-                        'max_input_channels': device['max_input_channels'],
-                        'default_samplerate': device['default_samplerate']
-                    }
-
-                    # Windowsのループバックデバイス判定
-                    # WASAPIの場合、"Stereo Mix"や"ステレオミキサー"などが該当
-                    is_loopback = ('stereo mix' in device['name'].lower() or
-                                   'ステレオミキサー' in device['name'].lower() or
-                                   'loopback' in device['name'].lower() or
-                                   'what u hear' in device['name'].lower())
-                    device_info['is_loopback'] = is_loopback
-
-                    # デバイスタイプを判定
-                    if is_loopback:
-                        device_info['device_type'] = 'system_audio'
-                        device_info['type_display'] = 'スクリーンキャプチャー/システムオーディオ'
-                    else:
-                        device_info['device_type'] = 'microphone'
-                        device_info['type_display'] = 'マイク'
-
-                    device_list.append(device_info)
-                    logger.debug(f"デバイス検出: {device_info}")
-
+            device_list = self.device_registry.get_devices()
             logger.info(f"利用可能な入力デバイス: {len(device_list)}個")
             return device_list
 
@@ -161,26 +637,33 @@ class AudioCapture:
                         "Windowsの設定でステレオミキサーを有効にしてください。"
                     )
 
-            self.device_id = device_id
-
-            # デバイス情報を取得
-            device_info = sd.query_devices(device_id)
+            # デバイス情報を取得 (キャッシュにない場合は構成変化を確認)
+            device_info = self.device_registry.get_device(device_id)
+            if device_info is None:
+                self.device_registry.refresh()
+                device_info = self.device_registry.get_device(device_id)
+            if device_info is None:
+                raise DeviceNotFoundError(f"音声デバイスが見つかりません (ID: {device_id})")
             logger.info(f"音声キャプチャ開始: {device_info['name']}")
 
             # バッファをクリア
             with self.buffer_lock:
                 self.audio_buffer.clear()
+                self._reset_vad_state()
+            self._pending_gaps = []
+            self.timeline_events = []
+            self.stream_stats = self._new_stream_stats()
+            self._reported_stream_stats = dict(self.stream_stats)
+            self._last_status_report = time.monotonic()
 
             # ストリーム開始
             self.is_capturing = True
-            self.stream = sd.InputStream(
-                device=device_id,
-                channels=self.channels,
-                samplerate=self.sample_rate,
-                callback=self._audio_callback,
-                dtype='float32'
-            )
-            self.stream.start()
+            self._open_stream(device_info)
+
+            # 再接続の監視を開始
+            self._supervisor_stop.clear()
+            self.supervisor_thread = threading.Thread(target=self._supervise_stream, daemon=True)
+            self.supervisor_thread.start()
 
             logger.info("音声キャプチャを開始しました")
             return True
@@ -192,6 +675,315 @@ class AudioCapture:
             self.is_capturing = False
             raise AudioCaptureError(f"音声キャプチャの開始に失敗しました: {e}")
 
+    def _open_stream(self, device_info: Dict[str, Any]):
+        """デバイスのストリームを開いて開始する
+
+        Args:
+            device_info (Dict): デバイスレジストリのデバイス情報
+        """
+        self.device_id = device_info['id']
+        self.device_name = device_info['name']
+
+        # デバイスのネイティブレートで開き、必要ならアプリ側でリサンプリング
+        self.stream_sample_rate = self.sample_rate
+        self.resampler = None
+        if self.use_native_rate:
+            native_rate = int(device_info.get('default_samplerate') or self.sample_rate)
+            if native_rate != self.sample_rate:
+                self.stream_sample_rate = native_rate
+                self.resampler = StreamingResampler(native_rate, self.sample_rate)
+        logger.info(f"ストリームのサンプリングレート: {self.stream_sample_rate}Hz")
+
+        self._stream_failed = False
+        self._last_callback_time = time.monotonic()
+        self.stream = self.device_registry.source.open_stream(
+            device=self.device_id,
+            channels=self.channels,
+            samplerate=self.stream_sample_rate,
+            callback=self._audio_callback,
+            finished_callback=self._on_stream_finished,
+            blocksize=self.blocksize,
+            latency=self.latency
+        )
+        self.stream.start()
+        if self.blocksize or self.latency is not None:
+            logger.info(f"ストリーム設定: ブロックサイズ={self.blocksize or '自動'}, "
+                        f"遅延={self.latency if self.latency is not None else '既定'}")
+        self.device_registry.register_stream(self)
+
+    def _close_stream(self):
+        """ストリームを閉じる (デバイス切断時のエラーは無視)"""
+        with self._stream_lock:
+            stream, self.stream = self.stream, None
+        if stream is None:
+            return
+        self.device_registry.unregister_stream(self)
+        try:
+            stream.stop()
+        except Exception as e:
+            logger.debug(f"ストリーム停止エラー (無視): {e}")
+        try:
+            stream.close()
+        except Exception as e:
+            logger.debug(f"ストリームクローズエラー (無視): {e}")
+
+    def _on_stream_finished(self):
+        """ストリーム終了時のコールバック (デバイス切断の検出)"""
+        if self.is_capturing:
+            self._stream_failed = True
+
+    def _supervise_stream(self):
+        """ストリームを監視し、エラーやコールバック停止時に再接続する (別スレッド)"""
+        while not self._supervisor_stop.wait(0.5):
+            if time.monotonic() - self._last_status_report >= self.status_report_seconds:
+                self._report_stream_status()
+            if not self.is_capturing or self.is_reconnecting or self.input_finished:
+                continue
+            stalled = self._is_stalled()
+            if self._stream_failed or stalled:
+                reason = "ストリームエラー" if self._stream_failed else "コールバック停止"
+                logger.warning(f"音声デバイスの異常を検出 ({reason}): {self.device_name}")
+                self._reconnect()
+
+    def _is_stalled(self) -> bool:
+        """コールバックが止まっているか
+
+        入力側が下流を待ってブロックを送っていない間 (ストリームのpausedがTrue) は
+        止まっているとみなさない (リプレイの最速モードなど)。
+        """
+        if getattr(self.stream, 'paused', False):
+            return False
+        return time.monotonic() - self._last_callback_time > self.stall_timeout_seconds
+
+    def _suspend_stream(self) -> bool:
+        """他のソースの再スキャンのためにストリームを一時的に閉じる (デバイスレジストリから呼ばれる)
+
+        Returns:
+            bool: 閉じた場合True (再接続中などで閉じなかった場合False)
+        """
+        with self._stream_lock:
+            if self.is_reconnecting or self.stream is None or not self.is_capturing:
+                return False
+            self.is_reconnecting = True
+            self._suspended_since = self._last_callback_time
+            self._close_stream()
+        return True
+
+    def _resume_stream(self):
+        """再スキャン後に同じ名前のデバイスでストリームを開き直す (デバイスレジストリから呼ばれる)
+
+        開けなかった場合はストリームエラーとして監視スレッドの再接続に任せる。
+        """
+        with self._stream_lock:
+            gap_start, self._suspended_since = self._suspended_since, None
+            try:
+                device_info = self.device_registry.find_by_name(self.device_name)
+                if device_info is None:
+                    raise DeviceNotFoundError(f"音声デバイスが見つかりません: {self.device_name}")
+                if self.is_capturing:
+                    self._open_stream(device_info)
+            except Exception as e:
+                logger.warning(f"再スキャン後にストリームを開き直せません: {e}")
+                self._close_stream()
+                self._stream_failed = True
+                self._last_callback_time = gap_start
+            finally:
+                self.is_reconnecting = False
+            if self.stream is not None:
+                self._record_gap(gap_start, {'type': 'stream_reopened', 'attempts': 1})
+
+    def _reconnect(self):
+        """同じ名前のデバイスを上限付きバックオフで開き直す
+
+        リングバッファは保持したまま、欠落した時間をタイムラインイベントとして記録する。
+        """
+        with self._stream_lock:
+            # 他のソースの再スキャンで一時停止中の場合は開き直しを待つ
+            if self.is_reconnecting:
+                return
+            self.is_reconnecting = True
+            gap_start = self._last_callback_time
+            self._close_stream()
+
+        backoff = 0.5
+        attempt = 0
+        while self.is_capturing and not self._supervisor_stop.is_set():
+            attempt += 1
+            try:
+                self.device_registry.rescan()
+                device_info = self.device_registry.find_by_name(self.device_name)
+                if device_info is not None:
+                    self._open_stream(device_info)
+                    break
+                logger.info(f"再接続待ち: {self.device_name} が見つかりません (試行{attempt}回目)")
+            except Exception as e:
+                self._close_stream()
+                logger.warning(f"再接続失敗 (試行{attempt}回目): {e}")
+
+            self._supervisor_stop.wait(backoff)
+            backoff = min(backoff * 2, self.reconnect_max_backoff_seconds)
+
+        self.is_reconnecting = False
+        if self.stream is None:
+            return
+        self._record_gap(gap_start, {'type': 'device_reconnected', 'attempts': attempt})
+
+    def _record_gap(self, gap_start: float, event: Dict[str, Any]):
+        """ストリームが止まっていた時間を欠落として記録する
+
+        欠落は次に取得するチャンクのオフセットに反映され、タイムラインイベントにも残る。
+
+        Args:
+            gap_start (float): 最後にコールバックが届いた時刻 (time.monotonic)
+            event (Dict): タイムラインイベント (type, attempts)
+        """
+        gap_seconds = max(0.0, time.monotonic() - gap_start)
+        gap_samples = int(gap_seconds * self.sample_rate)
+        self._pending_gaps.append((self.audio_buffer.write_index, gap_samples))
+        event.update({
+            'device_name': self.device_name,
+            'device_id': self.device_id,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'gap_seconds': gap_seconds,
+        })
+        self.timeline_events.append(event)
+        if event['type'] == 'device_reconnected':
+            logger.info(f"音声デバイスに再接続しました: {self.device_name} "
+                        f"(欠落{gap_seconds:.2f}秒, 試行{event['attempts']}回)")
+        else:
+            logger.info(f"音声デバイスのストリームを開き直しました: {self.device_name} (欠落{gap_seconds:.2f}秒)")
+
+    def _report_stream_status(self, final: bool = False):
+        """前回の報告以降のオーバーフロー/アンダーフローをまとめてログに出す
+
+        Args:
+            final (bool): キャプチャ停止時の報告 (累計も出す)
+        """
+        self._last_status_report = time.monotonic()
+        stats = dict(self.stream_stats)
+        last = self._reported_stream_stats
+        self._reported_stream_stats = stats
+        overflow = stats['input_overflow'] - last['input_overflow']
+        underflow = stats['input_underflow'] - last['input_underflow']
+        other = stats['other_status'] - last['other_status']
+        if overflow or underflow or other:
+            logger.warning(f"音声キャプチャステータス ({self.device_name}): "
+                           f"入力オーバーフロー{overflow}回, アンダーフロー{underflow}回, その他{other}回 "
+                           f"(コールバック{stats['callbacks'] - last['callbacks']}回中)")
+        if final:
+            logger.info(f"ストリーム統計 ({self.device_name}): コールバック{stats['callbacks']}回, "
+                        f"入力オーバーフロー{stats['input_overflow']}回, "
+                        f"アンダーフロー{stats['input_underflow']}回, "
+                        f"最大ブロック{stats['max_block_frames']}フレーム, "
+                        f"最大処理時間{stats['max_callback_seconds'] * 1000:.2f}ms")
+
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """ストリームのコールバック統計を取得
+
+        Returns:
+            Dict: callbacks, input_overflow, input_underflow, other_status,
+                  max_block_frames, max_callback_seconds
+        """
+        return dict(self.stream_stats)
+
+    def find_stable_blocksize(self, device_id: int = None,
+                              candidates=(64, 128, 256, 512, 1024, 2048, 4096),
+                              trial_seconds: float = 5.0,
+                              max_load: float = 0.5) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """オーバーフローなく動く最小のブロックサイズを探す
+
+        小さい候補から順に実際にストリームを開き、trial_secondsの間キャプチャして
+        オーバーフロー・アンダーフローの有無とコールバック処理時間を調べる。
+        デバイスが受け付けないブロックサイズは不安定として記録し、次の候補へ進む。
+        リングバッファは読み捨てるため、文字起こし中には実行しないこと。
+
+        Args:
+            device_id (int): 対象デバイスID (Noneの場合は自動検出)
+            candidates: 試すブロックサイズ (フレーム数)
+            trial_seconds (float): 1候補あたりの計測時間 (秒)
+            max_load (float): ブロック長に対するコールバック処理時間の上限比
+
+        Returns:
+            Tuple[Optional[int], List[Dict]]: (安定した最小のブロックサイズ, 各候補の計測結果)
+        """
+        original_blocksize = self.blocksize
+        results = []
+        best = None
+        try:
+            for blocksize in sorted(int(c) for c in candidates if int(c) > 0):
+                self.blocksize = blocksize
+                try:
+                    self.start_capture(device_id)
+                except AudioCaptureError as e:
+                    self.stop_capture()
+                    results.append({
+                        'blocksize': blocksize,
+                        'latency_ms': blocksize / self.stream_sample_rate * 1000,
+                        'callbacks': 0,
+                        'input_overflow': 0,
+                        'input_underflow': 0,
+                        'max_load': None,
+                        'stable': False,
+                        'error': str(e),
+                    })
+                    logger.info(f"ブロックサイズ{blocksize}: 不安定 (ストリームを開けません: {e})")
+                    continue
+                deadline = time.monotonic() + trial_seconds
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    with self.buffer_lock:
+                        self.audio_buffer.consume(len(self.audio_buffer))
+                self.stop_capture()
+
+                stats = self.get_stream_stats()
+                block_seconds = blocksize / self.stream_sample_rate
+                load = stats['max_callback_seconds'] / block_seconds
+                stable = (stats['callbacks'] > 0 and stats['input_overflow'] == 0
+                          and stats['input_underflow'] == 0 and load <= max_load)
+                results.append({
+                    'blocksize': blocksize,
+                    'latency_ms': block_seconds * 1000,
+                    'callbacks': stats['callbacks'],
+                    'input_overflow': stats['input_overflow'],
+                    'input_underflow': stats['input_underflow'],
+                    'max_load': load,
+                    'stable': stable,
+                    'error': None,
+                })
+                logger.info(f"ブロックサイズ{blocksize}: {'安定' if stable else '不安定'} "
+                            f"(オーバーフロー{stats['input_overflow']}回, 最大負荷{load:.0%})")
+                if stable:
+                    best = blocksize
+                    break
+        finally:
+            self.blocksize = original_blocksize
+        return best, results
+
+    def _take_pending_gaps(self, end_index: int, hop: int):
+        """チャンクまでに発生した欠落をlead/hopへの加算量として取り出す
+
+        チャンク開始より前の欠落はleadに、チャンク内の欠落はhopに加える。
+
+        Args:
+            end_index (int): チャンク取得後のリングバッファ読み出し位置
+            hop (int): チャンクの進み幅 (サンプル)
+
+        Returns:
+            Tuple[int, int]: (leadへの加算, hopへの加算)
+        """
+        lead_gap = 0
+        hop_gap = 0
+        remaining = []
+        for position, gap_samples in self._pending_gaps:
+            if position <= end_index - hop:
+                lead_gap += gap_samples
+            elif position <= end_index:
+                hop_gap += gap_samples
+            else:
+                remaining.append((position, gap_samples))
+        self._pending_gaps = remaining
+        return lead_gap, hop_gap
+
     def _audio_callback(self, indata, frames, time_info, status):
         """音声データのコールバック (別スレッドで実行)
 
@@ -201,8 +993,23 @@ class AudioCapture:
             time_info: タイム情報
             status: ステータス
         """
+        callback_start = time.perf_counter()
+        self._last_callback_time = time.monotonic()
+        stats = self.stream_stats
+        stats['callbacks'] += 1
+        if frames > stats['max_block_frames']:
+            stats['max_block_frames'] = frames
         if status:
-            logger.warning(f"音声キャプチャステータス: {status}")
+            # ログは監視スレッドがまとめて出す
+            # 1回のコールバックで両方のフラグが立つことがあるため別々に数える
+            overflow = getattr(status, 'input_overflow', False)
+            underflow = getattr(status, 'input_underflow', False)
+            if overflow:
+                stats['input_overflow'] += 1
+            if underflow:
+                stats['input_underflow'] += 1
+            if not overflow and not underflow:
+                stats['other_status'] += 1
 
         try:
             # ステレオの場合はモノラルに変換
@@ -211,27 +1018,51 @@ class AudioCapture:
             else:
                 audio_data = indata[:, 0]
 
-            # バッファに追加
-            with self.buffer_lock:
-                self.audio_buffer.extend(audio_data)
+            # ネイティブレートからsample_rateへ変換
+            if self.resampler is not None:
+                audio_data = self.resampler.process(audio_data)
+
+            # バッファに追加 (ロックなし、コンシューマを待たない)
+            self.audio_buffer.write(audio_data)
 
             # 音声レベルを計算 (RMS)
-            rms = np.sqrt(np.mean(audio_data**2))
-            with self.audio_level_lock:
+            if len(audio_data) > 0:
+                rms = np.sqrt(np.mean(audio_data**2))
                 self.current_audio_level = min(rms * 10, 1.0)  # 0.0-1.0に正規化
 
         except Exception as e:
             logger.error(f"音声コールバックエラー: {e}")
 
+        elapsed = time.perf_counter() - callback_start
+        if elapsed > stats['max_callback_seconds']:
+            stats['max_callback_seconds'] = elapsed
+
     def stop_capture(self):
         """音声キャプチャを停止"""
         try:
             self.is_capturing = False
 
-            if self.stream:
-                self.stream.stop()
-                self.stream.close()
-                self.stream = None
+            # 再接続の監視を停止
+            self._supervisor_stop.set()
+            if (self.supervisor_thread and self.supervisor_thread.is_alive()
+                    and self.supervisor_thread is not threading.current_thread()):
+                self.supervisor_thread.join(timeout=2)
+            self.supervisor_thread = None
+
+            self._close_stream()
+            self._report_stream_status(final=True)
+
+            # バッファのドロップ状況を報告
+            stats = self.audio_buffer.get_stats()
+            logger.info(f"リングバッファ統計: オーバーフロー{stats['overflow_count']}回 "
+                        f"({stats['overflow_samples']}サンプル破棄)")
+
+            # リサンプリングのコストを報告
+            if self.resampler is not None:
+                stats = self.resampler.get_stats()
+                logger.info(f"リサンプリング統計: {self.stream_sample_rate}Hz→{self.sample_rate}Hz, "
+                            f"処理時間{stats['process_time']:.3f}秒 "
+                            f"(実時間比{stats['real_time_factor']:.4f})")
 
             logger.info("音声キャプチャを停止しました")
 
@@ -242,31 +1073,205 @@ class AudioCapture:
         """文字起こし用の音声バッファを取得
 
         Returns:
-            np.ndarray or None: 音声データ (最小5秒以上)
+            np.ndarray or None: float32の音声データ (最小6秒以上)
                                 バッファが最小サイズ未満の場合はNone
         """
         with self.buffer_lock:
             # 最小バッファサイズ（5秒）以上貯まったら取得
             if len(self.audio_buffer) >= self.min_buffer_samples:
                 # バッファから取得
-                audio_data = np.array(list(self.audio_buffer))
+                audio_data = self.audio_buffer.read()
 
-                # バッファをクリア
-                self.audio_buffer.clear()
+                # 読み出した分を破棄
+                self.audio_buffer.consume(len(audio_data))
 
                 logger.debug(f"音声バッファ取得: {len(audio_data)}サンプル ({len(audio_data)/self.sample_rate:.2f}秒)")
                 return audio_data
             else:
                 return None
 
+    @property
+    def input_finished(self) -> bool:
+        """入力が終端に達したか (リプレイなど終わりのある入力のみTrueになる)"""
+        return bool(getattr(self.stream, 'end_of_input', False))
+
+    @property
+    def is_finished(self) -> bool:
+        """入力が終端に達し、バッファも空になったか"""
+        return self.input_finished and len(self.audio_buffer) == 0
+
+    def acquire_chunk(self) -> Optional[AudioChunk]:
+        """文字起こし用の音声チャンクをプールバッファで取得
+
+        get_audio_bufferと同じ条件で取り出すが、リングバッファからプールの
+        バッファへ1回コピーするだけで新規確保は行わない。
+        slidingモードでは窓長分を読み出し、hop分だけバッファから破棄する
+        (残りは次の窓と重なる)。
+        使用後は必ずAudioChunk.release()を呼ぶこと。
+
+        Returns:
+            AudioChunk or None: 音声チャンク (hopはタイムラインの進み幅)
+                                バッファが最小サイズ未満の場合はNone
+        """
+        with self.buffer_lock:
+            if self.chunk_mode == "vad":
+                chunk = self._acquire_vad_chunk()
+            else:
+                chunk = self._acquire_window_chunk()
+
+            # デバイス再接続による欠落をタイムラインに反映
+            if chunk is not None and self._pending_gaps:
+                lead_gap, hop_gap = self._take_pending_gaps(self.audio_buffer.read_index, chunk.hop)
+                chunk.lead += lead_gap
+                chunk.hop += hop_gap
+
+        # 入力の終端では窓長に満たない残りも返す
+        if chunk is None and self.input_finished:
+            chunk = self.acquire_final_chunk()
+        return chunk
+
+    def acquire_final_chunk(self) -> Optional[AudioChunk]:
+        """入力の終端で、窓長に満たない残りのサンプルを最後のチャンクとして取得
+
+        ファイル入力などで以降の書き込みがない場合に使う。slidingモードで
+        残りが前の窓との重なり分のみの場合は、新しい音声がないためNoneを返す。
+
+        Returns:
+            AudioChunk or None: 最後のチャンク (残りがない場合はNone)
+        """
+        with self.buffer_lock:
+            remaining = len(self.audio_buffer)
+            overlap = self.min_buffer_samples - self.hop_samples
+            if self.chunk_mode == "sliding" and self.audio_buffer.read_index > 0 and remaining <= overlap:
+                self.audio_buffer.consume(remaining)
+                return None
+            if remaining == 0:
+                return None
+
+            lead = 0
+            if self.chunk_mode == "vad":
+                lead = self._vad_skipped
+                self._reset_vad_state()
+            buffer = self.chunk_pool.acquire()
+            length = len(self.audio_buffer.read(min(remaining, len(buffer)), out=buffer))
+            self.audio_buffer.consume(length)
+            logger.debug(f"最後のチャンク取得: {length}サンプル ({length/self.sample_rate:.2f}秒)")
+            return AudioChunk(self.chunk_pool, buffer, length, length, lead)
+
+    def _acquire_window_chunk(self) -> Optional[AudioChunk]:
+        """fixed/slidingモードのチャンクを切り出す (buffer_lock保持中に呼ぶ)
+
+        Returns:
+            AudioChunk or None: 音声チャンク (バッファが最小サイズ未満の場合はNone)
+        """
+        if len(self.audio_buffer) < self.min_buffer_samples:
+            return None
+
+        buffer = self.chunk_pool.acquire()
+        if self.chunk_mode == "sliding":
+            length = len(self.audio_buffer.read(self.min_buffer_samples, out=buffer))
+            hop = self.hop_samples
+        else:
+            length = len(self.audio_buffer.read(out=buffer))
+            hop = length
+        # 読み出した分だけ破棄する（読み出し後にコールバックが書き込んだ分は残す）
+        self.audio_buffer.consume(hop)
+
+        logger.debug(f"音声チャンク取得: {length}サンプル ({length/self.sample_rate:.2f}秒), "
+                     f"進み幅={hop/self.sample_rate:.2f}秒")
+        return AudioChunk(self.chunk_pool, buffer, length, hop)
+
+    def _reset_vad_state(self):
+        """vadモードの区切り状態をリセット (buffer_lock保持中に呼ぶ)"""
+        self.vad.reset()
+        self._vad_scanned = 0  # バッファ先頭から判定済みのサンプル数
+        self._vad_speech_start = None  # 発話開始位置 (バッファ先頭基準)
+        self._vad_last_speech_end = 0  # 最後の音声フレームの終了位置
+        self._vad_skipped = 0  # 直前のチャンク以降に読み飛ばした無音サンプル数
+
+    def _acquire_vad_chunk(self) -> Optional[AudioChunk]:
+        """発話単位のチャンクを切り出す (buffer_lock保持中に呼ぶ)
+
+        未判定のフレームをVADで判定し、一定時間の無音で発話を区切る。
+        発話開始前のプリロールを含め、最大長に達した場合は強制的に区切る。
+        発話外の無音はプリロール分だけ残して破棄し、読み飛ばした長さを
+        次のチャンクのleadとして返す。
+
+        Returns:
+            AudioChunk or None: 発話チャンク (区切りが確定していない場合はNone)
+        """
+        frame = self.vad.frame_samples
+        self._vad_scanned = min(self._vad_scanned, len(self.audio_buffer))
+        n_new = (len(self.audio_buffer) - self._vad_scanned) // frame * frame
+        cut = None
+
+        if n_new > 0:
+            # 未判定部分のみ読み出して判定
+            window = self.audio_buffer.read(n_new, skip=self._vad_scanned)
+            flags = self.vad.process(window)
+            for i, is_speech in enumerate(flags):
+                frame_end = self._vad_scanned + (i + 1) * frame
+                if is_speech:
+                    if self._vad_speech_start is None:
+                        self._vad_speech_start = max(0, frame_end - frame - self.vad_preroll_samples)
+                    self._vad_last_speech_end = frame_end
+                elif self._vad_speech_start is not None:
+                    # 一定時間の無音で発話を区切る
+                    if frame_end - self._vad_last_speech_end >= self.vad_min_silence_samples:
+                        cut = frame_end
+                        break
+
+                # 最大長に達したら強制的に区切る
+                if (self._vad_speech_start is not None and
+                        frame_end - self._vad_speech_start >= self.vad_max_chunk_samples):
+                    cut = frame_end
+                    break
+
+            self._vad_scanned = cut if cut is not None else self._vad_scanned + n_new
+
+        if cut is None:
+            # 発話外の無音はプリロール分だけ残して破棄
+            if self._vad_speech_start is None:
+                drop = self._vad_scanned - self.vad_preroll_samples
+                if drop > 0:
+                    self.audio_buffer.consume(drop)
+                    self._vad_scanned -= drop
+                    self._vad_skipped += drop
+            return None
+
+        start = self._vad_speech_start
+        self.audio_buffer.consume(start)
+        buffer = self.chunk_pool.acquire()
+        length = len(self.audio_buffer.read(cut - start, out=buffer))
+        self.audio_buffer.consume(length)
+
+        lead = self._vad_skipped + start
+        self._vad_skipped = 0
+        self._vad_scanned -= cut
+        self._vad_speech_start = None
+        self._vad_last_speech_end = 0
+
+        logger.debug(f"発話チャンク取得: {length}サンプル ({length/self.sample_rate:.2f}秒), "
+                     f"読み飛ばし={lead/self.sample_rate:.2f}秒")
+        return AudioChunk(self.chunk_pool, buffer, length, length, lead)
+
+    def get_overlap_compute_factor(self) -> float:
+        """重なりによる計算量の倍率を取得 (窓長 / 進み幅)
+
+        Returns:
+            float: 1.0は重なりなし、1.5は50%増しのデコード量
+        """
+        if self.chunk_mode != "sliding":
+            return 1.0
+        return self.min_buffer_samples / self.hop_samples
+
     def get_audio_level(self) -> float:
         """現在の音声レベルを取得 (0.0～1.0)
 
         Returns:
             float: 音声レベル
         """
-        with self.audio_level_lock:
-            return self.current_audio_level
+        return self.current_audio_level
 
     def get_buffer_fill_percentage(self) -> float:
         """バッファの充填率を取得
@@ -274,28 +1279,46 @@ class AudioCapture:
         Returns:
             float: 充填率 (0.0～1.0)
         """
-        with self.buffer_lock:
-            return len(self.audio_buffer) / self.max_buffer_samples
+        return len(self.audio_buffer) / self.max_buffer_samples
+
+    def get_buffer_stats(self) -> Dict[str, int]:
+        """リングバッファのオーバーフロー統計を取得
+
+        Returns:
+            Dict[str, int]: overflow_count, overflow_samples
+        """
+        return self.audio_buffer.get_stats()
 
     def clear_buffer(self):
         """バッファをクリア"""
         with self.buffer_lock:
             self.audio_buffer.clear()
+            self._reset_vad_state()
             logger.debug("音声バッファをクリアしました")
 
     def is_device_connected(self) -> bool:
         """デバイスが接続されているかチェック
 
+        キャプチャ中はコールバックが届いているかで判定する (再接続中は未接続)。
+        キャプチャしていない場合はバックエンドを再スキャンし、現在のデバイス一覧に
+        同じ名前のデバイスがあるかを調べる (キャッシュだけでは取り外しを検出できないため)。
+
         Returns:
             bool: 接続されている場合True
         """
-        if self.device_id is None:
+        if self.device_name is None:
+            return False
+        if self.is_reconnecting:
             return False
+        if self.stream is not None:
+            return not (self._stream_failed or self._is_stalled())
 
         try:
-            device_info = sd.query_devices(self.device_id)
-            return device_info is not None
-        except:
+            # 接続確認のためだけに他のソースのストリームは止めない
+            self.device_registry.rescan(suspend_streams=False)
+            return self.device_registry.find_by_name(self.device_name) is not None
+        except Exception as e:
+            logger.debug(f"デバイスの接続確認エラー: {e}")
             return False
 
 
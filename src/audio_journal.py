@@ -0,0 +1,353 @@
+"""
+OfflineVoiceLogger - 音声ジャーナルモジュール
+
+異常終了に備えてセッションの生音声をメモリマップファイルへ記録する
+- 事前確保したセグメントファイルへの追記 (次のセグメントはバックグラウンドで確保)
+- ヘッダーにサンプリングレート・開始時刻・確定サンプル数を保持
+- 次回起動時に未完了のジャーナルを検出して読み戻し (メモリ使用量は一定)
+"""
+
+import os
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, List
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class JournalError(Exception):
+    """ジャーナルファイルのエラー"""
+    pass
+
+
+# ヘッダーレイアウト (64バイト、各フィールドは自然境界に整列)
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('sample_format', '<u2'),  # 0=float32, 1=int16
+    ('sample_rate', '<u4'),
+    ('closed', '<u4'),  # 正常終了時に1
+    ('start_time', '<f8'),  # セッション開始時刻 (UNIX時間)
+    ('segment_index', '<u8'),
+    ('first_sample', '<u8'),  # このセグメント先頭のセッション内サンプル位置
+    ('capacity', '<u8'),  # このセグメントのサンプル容量
+    ('committed', '<u8'),  # 書き込み確定済みサンプル数
+    ('reserved', 'V8'),
+])
+assert HEADER_DTYPE.itemsize == HEADER_SIZE
+
+JOURNAL_MAGIC = b'OVLJ'
+JOURNAL_VERSION = 1
+SAMPLE_FORMATS = {'float32': (0, np.float32), 'int16': (1, np.int16)}
+FILE_SUFFIX = '.ovlj'
+
+
+def get_default_journal_directory() -> Path:
+    """ジャーナルの既定保存先 (%APPDATA%/OfflineVoiceLogger/journal)"""
+    appdata_dir = os.getenv('APPDATA')
+    if appdata_dir:
+        return Path(appdata_dir) / 'OfflineVoiceLogger' / 'journal'
+    return Path.cwd() / 'journal'
+
+
+class JournalSegment:
+    """1つのセグメントファイル (ヘッダー + 事前確保したデータ領域)"""
+
+    def __init__(self, path: Path, mode: str = 'r'):
+        """
+        Args:
+            path (Path): セグメントファイルのパス
+            mode (str): 'r' (読み込み) または 'r+' (書き込み)
+        """
+        self.path = Path(path)
+        self._map = np.memmap(self.path, dtype=np.uint8, mode=mode)
+        self.header = self._map[:HEADER_SIZE].view(HEADER_DTYPE)
+        if self.header['magic'][0] != JOURNAL_MAGIC:
+            raise JournalError(f"ジャーナルファイルではありません: {self.path}")
+
+        format_code = int(self.header['sample_format'][0])
+        self.dtype = np.int16 if format_code == 1 else np.float32
+        self.capacity = int(self.header['capacity'][0])
+        self.data = self._map[HEADER_SIZE:HEADER_SIZE + self.capacity * np.dtype(self.dtype).itemsize].view(self.dtype)
+
+    @classmethod
+    def create(cls, path: Path, sample_format: str, sample_rate: int, start_time: float,
+               segment_index: int, first_sample: int, capacity: int) -> 'JournalSegment':
+        """セグメントファイルを事前確保して作成"""
+        format_code, dtype = SAMPLE_FORMATS[sample_format]
+        size = HEADER_SIZE + capacity * np.dtype(dtype).itemsize
+        with open(path, 'wb') as f:
+            f.truncate(size)
+
+        header_map = np.memmap(path, dtype=np.uint8, mode='r+', shape=(HEADER_SIZE,))
+        header = header_map.view(HEADER_DTYPE)
+        header['magic'] = JOURNAL_MAGIC
+        header['version'] = JOURNAL_VERSION
+        header['sample_format'] = format_code
+        header['sample_rate'] = sample_rate
+        header['closed'] = 0
+        header['start_time'] = start_time
+        header['segment_index'] = segment_index
+        header['first_sample'] = first_sample
+        header['capacity'] = capacity
+        header['committed'] = 0
+        header_map.flush()
+        del header_map
+
+        return cls(path, mode='r+')
+
+    @property
+    def committed(self) -> int:
+        return int(self.header['committed'][0])
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        """マップを解放"""
+        if self._map is not None:
+            self.data = None
+            self.header = None
+            self._map = None
+
+
+class AudioJournal:
+    """セッションの生音声を記録するジャーナル (書き込み側)
+
+    write()はリングバッファ経由で音声コールバックから呼ばれる。コールバック内では
+    事前確保済み領域へのコピーとヘッダーの確定サンプル数更新のみを行い、
+    次のセグメントの確保はバックグラウンドスレッドで前もって行う。
+    """
+
+    def __init__(self, directory: str = None, sample_rate: int = 16000,
+                 sample_format: str = "int16", segment_seconds: int = 300,
+                 session_id: str = None):
+        """
+        Args:
+            directory (str): 保存先ディレクトリ (Noneの場合は%APPDATA%配下)
+            sample_rate (int): サンプリングレート
+            sample_format (str): "int16" (容量半分) または "float32"
+            segment_seconds (int): 1セグメントの長さ (秒)
+            session_id (str): セッションID (Noneの場合は開始時刻から生成)
+        """
+        if sample_format not in SAMPLE_FORMATS:
+            logger.warning(f"不明なサンプル形式: {sample_format}, int16を使用します")
+            sample_format = "int16"
+        self.directory = Path(directory) if directory else get_default_journal_directory()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.segment_samples = max(1, int(sample_rate * segment_seconds))
+        self.start_time = time.time()
+        self.session_id = session_id or time.strftime("%Y%m%d_%H%M%S", time.localtime(self.start_time))
+
+        self._segments: List[JournalSegment] = []
+        self._current = None
+        self._next = None
+        self._preparing = False
+        self.total_samples = 0
+        self.dropped_samples = 0  # 次のセグメントが間に合わず破棄したサンプル数
+
+        self._current = self._create_segment(0, 0)
+        logger.info(f"音声ジャーナル開始: {self.directory} (セッション={self.session_id}, 形式={sample_format})")
+
+    def _segment_path(self, index: int) -> Path:
+        return self.directory / f"journal_{self.session_id}_{index:04d}{FILE_SUFFIX}"
+
+    def _create_segment(self, index: int, first_sample: int) -> JournalSegment:
+        segment = JournalSegment.create(
+            self._segment_path(index), self.sample_format, self.sample_rate,
+            self.start_time, index, first_sample, self.segment_samples
+        )
+        self._segments.append(segment)
+        return segment
+
+    def _prepare_next_segment(self):
+        """次のセグメントを事前確保 (バックグラウンドスレッド)"""
+        try:
+            current = self._current
+            index = int(current.header['segment_index'][0]) + 1
+            first_sample = int(current.header['first_sample'][0]) + current.capacity
+            self._next = self._create_segment(index, first_sample)
+            current.flush()
+        except Exception as e:
+            logger.error(f"ジャーナルセグメント確保エラー: {e}")
+        finally:
+            self._preparing = False
+
+    def write(self, samples: np.ndarray):
+        """サンプルを追記 (音声コールバックから呼ばれる)
+
+        Args:
+            samples (np.ndarray): float32の音声データ
+        """
+        if self._current is None:
+            return
+        if self.sample_format == "int16":
+            samples = np.clip(samples * 32767.0, -32768, 32767).astype(np.int16)
+
+        position = 0
+        while position < len(samples):
+            segment = self._current
+            committed = segment.committed
+            n = min(len(samples) - position, segment.capacity - committed)
+            if n > 0:
+                segment.data[committed:committed + n] = samples[position:position + n]
+                # データを書き終えてから確定サンプル数を更新する
+                segment.header['committed'] = committed + n
+                position += n
+                self.total_samples += n
+
+            if segment.committed >= segment.capacity:
+                if self._next is None:
+                    self.dropped_samples += len(samples) - position
+                    return
+                self._current, self._next = self._next, None
+
+        # 半分を超えたら次のセグメントを前もって確保
+        segment = self._current
+        if self._next is None and not self._preparing and segment.committed * 2 >= segment.capacity:
+            self._preparing = True
+            threading.Thread(target=self._prepare_next_segment, daemon=True).start()
+
+    def close(self, delete: bool = False, finished: bool = True):
+        """ジャーナルを正常終了としてクローズ
+
+        Args:
+            delete (bool): Trueの場合はファイルを削除する
+            finished (bool): Falseの場合は正常終了の印を付けない (次回起動時に復旧対象になる)
+        """
+        current, self._current = self._current, None
+        if current is None:
+            return
+        # 確保中のセグメントを待つ
+        while self._preparing:
+            time.sleep(0.01)
+
+        for segment in self._segments:
+            try:
+                if finished:
+                    segment.header['closed'] = 1
+                segment.flush()
+            except Exception as e:
+                logger.error(f"ジャーナルクローズエラー: {e}")
+            segment.close()
+
+        if delete:
+            for segment in self._segments:
+                try:
+                    segment.path.unlink()
+                except OSError as e:
+                    logger.warning(f"ジャーナル削除失敗: {segment.path} - {e}")
+        self._segments = []
+
+        logger.info(f"音声ジャーナル終了: {self.total_samples / self.sample_rate:.1f}秒"
+                    f"{' (削除)' if delete else ''}{'' if finished else ' (未完了として保持)'}")
+        if self.dropped_samples:
+            logger.warning(f"ジャーナルで破棄したサンプル: {self.dropped_samples}")
+
+
+class JournalReader:
+    """ジャーナルの読み込み (異常終了したセッションの復旧用)"""
+
+    def __init__(self, paths: List[Path]):
+        """
+        Args:
+            paths (List[Path]): 同一セッションのセグメントファイル
+        """
+        self._segments = sorted(
+            (JournalSegment(path, mode='r') for path in paths),
+            key=lambda seg: int(seg.header['segment_index'][0])
+        )
+        if not self._segments:
+            raise JournalError("セグメントがありません")
+        header = self._segments[0].header
+        self.sample_rate = int(header['sample_rate'][0])
+        self.start_time = float(header['start_time'][0])
+        self.total_samples = sum(seg.committed for seg in self._segments)
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def iter_blocks(self, block_samples: int) -> Iterator[np.ndarray]:
+        """float32のブロックを先頭から順に返す (一度に保持するのは1ブロックのみ)
+
+        Args:
+            block_samples (int): ブロックのサンプル数
+
+        Yields:
+            np.ndarray: float32の音声データ
+        """
+        block = np.empty(block_samples, dtype=np.float32)
+        filled = 0
+        for segment in self._segments:
+            position = 0
+            committed = segment.committed
+            while position < committed:
+                n = min(block_samples - filled, committed - position)
+                data = segment.data[position:position + n]
+                if segment.dtype == np.int16:
+                    block[filled:filled + n] = data / 32768.0
+                else:
+                    block[filled:filled + n] = data
+                filled += n
+                position += n
+                if filled == block_samples:
+                    yield block.copy()
+                    filled = 0
+        if filled > 0:
+            yield block[:filled].copy()
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+
+    def delete(self):
+        """セグメントファイルを削除 (復旧完了後)"""
+        paths = [segment.path for segment in self._segments]
+        self.close()
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"ジャーナル削除失敗: {path} - {e}")
+
+
+def find_unfinished_sessions(directory: str = None) -> Dict[str, List[Path]]:
+    """正常終了していないジャーナルのセッションを探す
+
+    Args:
+        directory (str): ジャーナルの保存先 (Noneの場合は既定)
+
+    Returns:
+        Dict[str, List[Path]]: セッションID → セグメントファイルのリスト
+    """
+    directory = Path(directory) if directory else get_default_journal_directory()
+    if not directory.exists():
+        return {}
+
+    sessions: Dict[str, List[Path]] = {}
+    for path in sorted(directory.glob(f"journal_*{FILE_SUFFIX}")):
+        session_id = path.stem[len("journal_"):].rsplit('_', 1)[0]
+        sessions.setdefault(session_id, []).append(path)
+
+    unfinished = {}
+    for session_id, paths in sessions.items():
+        try:
+            closed = True
+            committed = 0
+            for path in paths:
+                segment = JournalSegment(path, mode='r')
+                closed = closed and int(segment.header['closed'][0]) == 1
+                committed += segment.committed
+                segment.close()
+            if not closed and committed > 0:
+                unfinished[session_id] = paths
+        except Exception as e:
+            logger.warning(f"ジャーナル確認エラー: {session_id} - {e}")
+    return unfinished
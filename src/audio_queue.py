@@ -0,0 +1,362 @@
+"""
+OfflineVoiceLogger - 音声キューモジュール
+
+キャプチャから文字起こしへ音声チャンクを渡すキュー
+- 満杯時のポリシー (古いものを破棄 / 新しいものを破棄 / 隣接チャンクを結合 / ディスク退避)
+- メモリマップしたスプールファイルへの退避と、追いついた後の読み戻し
+- キュー深さ・退避量・追いつき時間のメトリクス
+"""
+
+import os
+import queue
+import threading
+import time
+import collections
+import numpy as np
+from pathlib import Path
+from typing import Dict
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BufferedChunk:
+    """キューが所有する音声チャンク (結合・読み戻しで作成)
+
+    AudioChunkと同じインターフェースを持つが、プールには返却しない。
+    """
+
+    def __init__(self, data: np.ndarray, hop: int = None, lead: int = 0):
+        self.data = data
+        self.hop = len(data) if hop is None else hop
+        self.lead = lead
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def release(self):
+        """何もしない (AudioChunkとの互換用)"""
+        pass
+
+
+class SpoolFile:
+    """退避したチャンクを保存するメモリマップファイル (追記型、必要に応じて拡張)"""
+
+    def __init__(self, path: Path, initial_samples: int):
+        """
+        Args:
+            path (Path): スプールファイルのパス
+            initial_samples (int): 初期確保サンプル数
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.capacity = 0
+        self._map = None
+        self.write_pos = 0
+        self._grow(max(1, initial_samples))
+
+    def _grow(self, capacity: int):
+        """ファイルを拡張してマップし直す"""
+        if self._map is not None:
+            self._map.flush()
+            del self._map
+        with open(self.path, 'ab') as f:
+            f.truncate(capacity * 4)
+        self._map = np.memmap(self.path, dtype=np.float32, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+        logger.debug(f"スプールファイル確保: {self.path} ({capacity * 4 / 1024 / 1024:.1f}MB)")
+
+    def append(self, data: np.ndarray) -> int:
+        """データを追記して書き込み位置を返す"""
+        n = len(data)
+        if self.write_pos + n > self.capacity:
+            self._grow(max(self.capacity * 2, self.write_pos + n))
+        position = self.write_pos
+        self._map[position:position + n] = data
+        self.write_pos += n
+        return position
+
+    def read(self, position: int, length: int) -> np.ndarray:
+        """指定位置のデータをコピーして返す"""
+        return np.array(self._map[position:position + length])
+
+    def reset(self):
+        """全データを読み戻した後に書き込み位置を先頭へ戻す"""
+        self.write_pos = 0
+
+    def close(self):
+        """マップを解放してファイルを削除"""
+        if self._map is not None:
+            del self._map
+            self._map = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+class ChunkQueue:
+    """バックプレッシャー制御付きの音声チャンクキュー
+
+    要素は (chunk, offset, source) のタプル。putはブロックせず、
+    満杯時は設定されたポリシーに従う。getはqueue.Queueと同様にqueue.Emptyを送出する。
+    """
+
+    # 満杯時のポリシー
+    POLICIES = ['drop_oldest', 'drop_newest', 'merge', 'spill']
+
+    # 結合後のチャンクの最大長 (秒) - Whisperの1窓に収まる長さ
+    MAX_MERGED_SECONDS = 30.0
+
+    def __init__(self, maxsize: int = 20, policy: str = "spill", sample_rate: int = 16000,
+                 spool_dir: str = None):
+        """
+        Args:
+            maxsize (int): メモリ上に保持する最大チャンク数
+            policy (str): 満杯時のポリシー (drop_oldest / drop_newest / merge / spill)
+            sample_rate (int): サンプリングレート (メトリクス計算用)
+            spool_dir (str): スプールファイルの保存先 (Noneの場合は%APPDATA%配下)
+        """
+        if policy not in self.POLICIES:
+            logger.warning(f"不明なキューポリシー: {policy}, spillを使用します")
+            policy = "spill"
+        self.maxsize = maxsize
+        self.policy = policy
+        self.sample_rate = sample_rate
+
+        if spool_dir:
+            self.spool_dir = Path(spool_dir)
+        else:
+            appdata_dir = os.getenv('APPDATA')
+            base_dir = Path(appdata_dir) / 'OfflineVoiceLogger' if appdata_dir else Path.cwd()
+            self.spool_dir = base_dir / 'spool'
+        self._spool = None
+
+        self._memory = collections.deque()  # (chunk, offset, source)
+        self._spilled = collections.deque()  # (position, length, hop, lead, offset, source)
+        self._cond = threading.Condition()
+
+        self.reset_metrics()
+        logger.info(f"ChunkQueue初期化: 最大{maxsize}チャンク, ポリシー={policy}")
+
+    def reset_metrics(self):
+        """メトリクスをリセット (録音開始時に呼ぶ)"""
+        self.max_depth = 0
+        self.dropped_chunks = 0
+        self.dropped_seconds = 0.0
+        self.merged_chunks = 0
+        self.spilled_chunks = 0
+        self.spilled_seconds = 0.0
+        self.spilled_bytes = 0
+        self._backlog_start = None  # 溢れ始めた時刻
+        self.last_catch_up_seconds = 0.0
+        self.max_catch_up_seconds = 0.0
+
+    def qsize(self) -> int:
+        """キュー深さ (メモリ上 + 退避中) を取得"""
+        return len(self._memory) + len(self._spilled)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def put(self, item):
+        """チャンクを追加 (ブロックしない)
+
+        Args:
+            item: (chunk, offset, source) のタプル
+        """
+        chunk, offset, source = item
+        with self._cond:
+            if self._spilled:
+                # 退避中のチャンクがある間は順序を保つため新しいチャンクも退避する
+                self._spill(chunk, offset, source)
+            elif len(self._memory) < self.maxsize:
+                self._memory.append(item)
+            else:
+                self._on_full(item)
+
+            self.max_depth = max(self.max_depth, self.qsize())
+            self._cond.notify()
+
+    def _on_full(self, item):
+        """満杯時のポリシーを適用 (_cond保持中に呼ぶ)"""
+        chunk, offset, source = item
+        if self._backlog_start is None:
+            self._backlog_start = time.monotonic()
+
+        if self.policy == "spill":
+            self._spill(chunk, offset, source)
+            return
+
+        if self.policy == "merge" and self._merge_oldest():
+            self._memory.append(item)
+            return
+
+        if self.policy == "drop_newest":
+            self._drop(chunk)
+            logger.warning("音声キューが満杯です (新しいチャンクを破棄)")
+        else:
+            # drop_oldest (mergeできなかった場合も含む)
+            old_chunk, _, _ = self._memory.popleft()
+            self._drop(old_chunk)
+            self._memory.append(item)
+            logger.warning("音声キューが満杯です (古いチャンクを破棄)")
+
+    def _drop(self, chunk):
+        """チャンクを破棄して統計を更新"""
+        self.dropped_chunks += 1
+        self.dropped_seconds += chunk.hop / self.sample_rate
+        chunk.release()
+
+    def _merge_oldest(self) -> bool:
+        """先頭から探して、同一ソースで時間的に続く2チャンクを1つに結合する
+
+        前のチャンクは進み幅分だけを使う (slidingモードの重なり部分は次のチャンクの先頭に含まれる)。
+        vadモードで読み飛ばした無音の隙間は無音で埋め、結合後のタイムラインを保つ。
+        結合後が最大長を超える場合と、時間が重なる場合は結合しない。
+
+        Returns:
+            bool: 結合できた場合True
+        """
+        max_samples = int(self.MAX_MERGED_SECONDS * self.sample_rate)
+        for i in range(len(self._memory) - 1):
+            first, first_offset, first_source = self._memory[i]
+            # 同じソースの次のチャンクを探す
+            j = next((k for k in range(i + 1, len(self._memory)) if self._memory[k][2] == first_source), None)
+            if j is None:
+                continue
+            second, second_offset, _ = self._memory[j]
+            head = min(first.hop, len(first))
+            gap = int(round((second_offset - first_offset) * self.sample_rate)) - head
+            if gap < -int(0.01 * self.sample_rate) or head + max(gap, 0) + len(second) > max_samples:
+                continue
+            gap = max(gap, 0)
+
+            data = np.concatenate((first.data[:head], np.zeros(gap, dtype=np.float32), second.data))
+            merged = BufferedChunk(data, head + gap + second.hop, first.lead)
+            first.release()
+            second.release()
+            self._memory[i] = (merged, first_offset, first_source)
+            del self._memory[j]
+            self.merged_chunks += 1
+            logger.debug(f"隣接チャンクを結合: オフセット={first_offset:.2f}秒, {len(data)/self.sample_rate:.2f}秒"
+                         + (f" (隙間{gap/self.sample_rate:.2f}秒を無音で補完)" if gap else ""))
+            return True
+        return False
+
+    def _spill(self, chunk, offset: float, source):
+        """チャンクをスプールファイルへ退避 (_cond保持中に呼ぶ)"""
+        if self._spool is None:
+            spool_path = self.spool_dir / f"audio_spool_{os.getpid()}_{id(self)}.f32"
+            self._spool = SpoolFile(spool_path, self.maxsize * max(len(chunk), 1))
+            logger.info(f"スプールファイルを作成: {spool_path}")
+
+        position = self._spool.append(chunk.data)
+        self._spilled.append((position, len(chunk), chunk.hop, chunk.lead, offset, source))
+        self.spilled_chunks += 1
+        self.spilled_seconds += len(chunk) / self.sample_rate
+        self.spilled_bytes += len(chunk) * 4
+        chunk.release()
+
+    def get(self, timeout: float = None):
+        """チャンクを取り出す
+
+        Args:
+            timeout (float): 待機時間 (秒)
+
+        Returns:
+            (chunk, offset, source) のタプル
+
+        Raises:
+            queue.Empty: タイムアウトした場合
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.qsize() > 0, timeout=timeout):
+                raise queue.Empty
+            return self._pop()
+
+    def get_batch(self, max_items: int, timeout: float = None) -> list:
+        """溜まっているチャンクを最大max_items個まとめて取り出す
+
+        最初の1個は待つが、2個目以降は待たずに取り出せる分だけ取り出す。
+
+        Args:
+            max_items (int): 最大個数
+            timeout (float): 最初の1個の待機時間 (秒)
+
+        Returns:
+            list: (chunk, offset, source) のタプルのリスト (キューに入った順)
+
+        Raises:
+            queue.Empty: タイムアウトした場合
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.qsize() > 0, timeout=timeout):
+                raise queue.Empty
+            items = [self._pop()]
+            while len(items) < max_items and self.qsize() > 0:
+                items.append(self._pop())
+            return items
+
+    def _pop(self):
+        """先頭のチャンクを取り出す (_cond保持中に呼ぶ)"""
+        if self._memory:
+            item = self._memory.popleft()
+        else:
+            position, length, hop, lead, offset, source = self._spilled.popleft()
+            item = (BufferedChunk(self._spool.read(position, length), hop, lead), offset, source)
+            if not self._spilled:
+                self._spool.reset()
+
+        # 溢れた状態から追いついた時間を記録
+        if self._backlog_start is not None and not self._spilled and len(self._memory) < self.maxsize // 2:
+            self.last_catch_up_seconds = time.monotonic() - self._backlog_start
+            self.max_catch_up_seconds = max(self.max_catch_up_seconds, self.last_catch_up_seconds)
+            self._backlog_start = None
+            logger.info(f"音声キューが追いつきました ({self.last_catch_up_seconds:.1f}秒)")
+        return item
+
+    def clear(self):
+        """全チャンクを破棄"""
+        with self._cond:
+            while self._memory:
+                chunk, _, _ = self._memory.popleft()
+                chunk.release()
+            self._spilled.clear()
+            if self._spool is not None:
+                self._spool.reset()
+            self._backlog_start = None
+
+    def close(self):
+        """全チャンクを破棄してスプールファイルを削除"""
+        self.clear()
+        with self._cond:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+
+    def get_metrics(self) -> Dict:
+        """メトリクスを取得
+
+        Returns:
+            Dict: キュー深さ・破棄・結合・退避・追いつき時間
+        """
+        return {
+            "depth": self.qsize(),
+            "spilled_depth": len(self._spilled),
+            "max_depth": self.max_depth,
+            "dropped_chunks": self.dropped_chunks,
+            "dropped_seconds": self.dropped_seconds,
+            "merged_chunks": self.merged_chunks,
+            "spilled_chunks": self.spilled_chunks,
+            "spilled_seconds": self.spilled_seconds,
+            "spilled_bytes": self.spilled_bytes,
+            "last_catch_up_seconds": self.last_catch_up_seconds,
+            "max_catch_up_seconds": self.max_catch_up_seconds,
+        }
@@ -0,0 +1,342 @@
+"""
+OfflineVoiceLogger - 音声入力バックエンドモジュール
+
+AudioCaptureが使う入力バックエンドを差し替え可能にする
+- SoundDeviceSource: sounddevice (PortAudio) の実デバイス
+- ReplaySource: WAVファイルやNumPy配列を実デバイスと同じコールバック経路で再生
+  (等速・倍速・最速、現実的なブロックサイズとタイミングの揺らぎ)
+"""
+
+import re
+import threading
+import time
+import wave
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    # PortAudioのないビルドマシンなどではリプレイのみ利用可能
+    sd = None
+    SOUNDDEVICE_AVAILABLE = False
+    logger.warning("sounddeviceが利用できません。音声デバイスからのキャプチャは無効です")
+
+# PortAudioの再初期化に使う非公開API (sd._terminate/sd._initialize) を確認したバージョン
+SD_REINITIALIZE_MIN_VERSION = (0, 4, 0)
+
+
+def _sounddevice_can_reinitialize() -> bool:
+    """sounddeviceの非公開APIでPortAudioを再初期化できるか"""
+    if sd is None:
+        return False
+    version = tuple(int(part) for part in re.findall(r'\d+', getattr(sd, '__version__', '0'))[:3])
+    return (version >= SD_REINITIALIZE_MIN_VERSION
+            and callable(getattr(sd, '_terminate', None))
+            and callable(getattr(sd, '_initialize', None)))
+
+
+class AudioSource:
+    """音声入力バックエンドのインターフェース
+
+    デバイス情報はsounddeviceと同じ形式 (name, hostapi, max_input_channels,
+    default_samplerate) の辞書で返す。open_streamが返すストリームは
+    start/stop/closeを持ち、別スレッドから callback(indata, frames, time_info, status)
+    を呼ぶ。入力が終端に達するストリームはend_of_inputをTrueにする。
+    """
+
+    # reinitialize()でデバイス一覧を取り直せるか
+    can_reinitialize = False
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        """全デバイスの情報を取得"""
+        raise NotImplementedError
+
+    def query_hostapis(self) -> List[Dict[str, Any]]:
+        """ホストAPIの情報を取得"""
+        raise NotImplementedError
+
+    def reinitialize(self) -> bool:
+        """バックエンドを再初期化してホットプラグされたデバイスを反映する (任意)
+
+        開いているストリームは無効になるため、呼び出し側で閉じておくこと。
+
+        Returns:
+            bool: 再初期化した場合True (対応していない場合False)
+        """
+        return False
+
+    def open_stream(self, device: int, channels: int, samplerate: int,
+                    callback: Callable, finished_callback: Callable = None,
+                    blocksize: int = 0, latency=None):
+        """入力ストリームを作成 (開始はstart()で行う)
+
+        Args:
+            device (int): デバイスID
+            channels (int): チャンネル数
+            samplerate (int): サンプリングレート
+            callback (Callable): callback(indata, frames, time_info, status)
+            finished_callback (Callable): ストリームが終了したときに呼ばれる
+            blocksize (int): 1回のコールバックのフレーム数 (0の場合はバックエンドに任せる)
+            latency: 遅延 ("low", "high", 秒数、またはNoneで既定)
+
+        Returns:
+            ストリームオブジェクト
+        """
+        raise NotImplementedError
+
+
+class SoundDeviceSource(AudioSource):
+    """sounddevice (PortAudio) の入力デバイス"""
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        if sd is None:
+            return []
+        return list(sd.query_devices())
+
+    def query_hostapis(self) -> List[Dict[str, Any]]:
+        if sd is None:
+            return []
+        return list(sd.query_hostapis())
+
+    def __init__(self):
+        self.can_reinitialize = _sounddevice_can_reinitialize()
+        if sd is not None and not self.can_reinitialize:
+            logger.warning(f"このsounddevice ({getattr(sd, '__version__', '不明')}) では再初期化できません。"
+                           f"接続し直したデバイスはアプリの再起動まで反映されない場合があります")
+
+    def reinitialize(self) -> bool:
+        # PortAudioはデバイス一覧を初期化時にしか取得しないため、非公開APIで初期化し直す
+        if not self.can_reinitialize:
+            return False
+        try:
+            sd._terminate()
+            sd._initialize()
+        except Exception as e:
+            # 以降は再初期化せず、一覧の再取得のみ行う
+            logger.warning(f"PortAudioの再初期化に失敗しました。以降は行いません: {e}")
+            self.can_reinitialize = False
+            try:
+                sd._initialize()
+            except Exception:
+                pass
+            return False
+        return True
+
+    def open_stream(self, device: int, channels: int, samplerate: int,
+                    callback: Callable, finished_callback: Callable = None,
+                    blocksize: int = 0, latency=None):
+        if sd is None:
+            raise RuntimeError("sounddeviceが利用できません")
+        return sd.InputStream(
+            device=device,
+            channels=channels,
+            samplerate=samplerate,
+            callback=callback,
+            finished_callback=finished_callback,
+            dtype='float32',
+            blocksize=blocksize,
+            latency=latency
+        )
+
+
+def load_wav(path: str) -> Tuple[np.ndarray, int]:
+    """WAVファイル (PCM 8/16/32bit) を読み込む
+
+    Args:
+        path (str): WAVファイルのパス
+
+    Returns:
+        Tuple[np.ndarray, int]: (float32の音声 (サンプル数, チャンネル数), サンプリングレート)
+    """
+    with wave.open(str(path), 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        audio = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        audio = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        audio = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"サポートされていないサンプル幅: {sample_width * 8}bit")
+    return audio.reshape(-1, channels), sample_rate
+
+
+class ReplayStream:
+    """音声データをブロックごとにコールバックへ渡すストリーム (sounddeviceのInputStream互換)"""
+
+    def __init__(self, audio: np.ndarray, samplerate: int, callback: Callable,
+                 finished_callback: Callable = None, block_size: int = 480,
+                 speed: float = 1.0, jitter: float = 0.0, seed: int = None,
+                 backpressure: Callable[[], bool] = None, start_position: int = 0):
+        """
+        Args:
+            audio (np.ndarray): float32の音声 (サンプル数, チャンネル数)
+            samplerate (int): サンプリングレート
+            callback (Callable): callback(indata, frames, time_info, status)
+            finished_callback (Callable): stop()で終了したときに呼ばれる
+            block_size (int): 1回のコールバックのフレーム数
+            speed (float): 再生速度 (1.0=等速, 10.0=10倍速, 0以下=待ちなしの最速)
+            jitter (float): コールバック間隔の揺らぎ (ブロック長に対する比率, 0.0-1.0)
+            seed (int): 揺らぎの乱数シード
+            backpressure (Callable): 最速モードでTrueを返す間は次のブロックを待つ
+            start_position (int): 再生を始めるフレーム位置 (開き直した場合の続き)
+        """
+        self.audio = audio
+        self.samplerate = samplerate
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.block_size = max(1, int(block_size))
+        self.speed = speed
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self._rng = np.random.default_rng(seed)
+        self.backpressure = backpressure
+
+        self.active = False
+        self.end_of_input = False  # 最後まで再生した
+        self.paused = False  # 下流を待ってブロックを送っていない (コールバック停止とはみなさない)
+        self.position = min(max(0, int(start_position)), len(audio))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self.active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        if self.active:
+            self.active = False
+            if self.finished_callback is not None:
+                self.finished_callback()
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        """ブロックごとにコールバックを呼ぶ (別スレッド)"""
+        block_seconds = self.block_size / self.samplerate
+        next_time = time.perf_counter()
+        while not self._stop.is_set() and self.position < len(self.audio):
+            block = self.audio[self.position:self.position + self.block_size]
+            self.position += len(block)
+            self.callback(block, len(block), None, None)
+            # 次のブロックを渡し終えるまではpausedのままにする (待ち明けに停止と誤検出しない)
+            self.paused = False
+
+            if self.speed > 0:
+                # 予定時刻を基準に待つため、揺らぎは累積しない
+                next_time += block_seconds / self.speed
+                offset = self._rng.uniform(-self.jitter, self.jitter) * block_seconds / self.speed
+                delay = next_time + offset - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+            elif self.backpressure is not None:
+                # 最速モードでは下流が取り込める速さに合わせる (実デバイスと違い待てる)
+                while self.backpressure():
+                    self.paused = True
+                    if self._stop.wait(0.005):
+                        break
+
+        self.end_of_input = self.position >= len(self.audio)
+
+
+class ReplaySource(AudioSource):
+    """WAVファイルやNumPy配列を再生する入力バックエンド (ベンチマーク・回帰テスト用)
+
+    デバイスを1つだけ持ち、そのストリームは実デバイスと同じコールバック経路で
+    音声を渡す。オーディオハードウェアのない環境でもパイプライン全体を動かせる。
+    ストリームを開き直した場合 (再接続・再スキャン) は前のストリームの続きから再生する。
+    """
+
+    def __init__(self, audio: np.ndarray, sample_rate: int, name: str = "replay",
+                 speed: float = 1.0, block_size: int = None, jitter: float = 0.2,
+                 seed: int = None, backpressure: Callable[[], bool] = None):
+        """
+        Args:
+            audio (np.ndarray): 音声データ (1次元、または (サンプル数, チャンネル数))
+            sample_rate (int): 音声データのサンプリングレート
+            name (str): デバイス名に使う名前
+            speed (float): 再生速度 (1.0=等速, 10.0=10倍速, 0以下=最速)
+            block_size (int): 1回のコールバックのフレーム数 (Noneの場合は10ms分)
+            jitter (float): コールバック間隔の揺らぎ (ブロック長に対する比率)
+            seed (int): 揺らぎの乱数シード
+            backpressure (Callable): 最速モードでTrueを返す間は再生を待つ
+                (Noneの場合はリングバッファが溢れるまで送り続ける)
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        self.audio = audio.reshape(-1, 1) if audio.ndim == 1 else audio
+        self.sample_rate = int(sample_rate)
+        self.name = name
+        self.speed = speed
+        self.block_size = block_size or max(1, self.sample_rate // 100)
+        self.jitter = jitter
+        self.seed = seed
+        self.backpressure = backpressure
+        self.streams: List[ReplayStream] = []
+
+    @classmethod
+    def from_wav(cls, path: str, **kwargs) -> 'ReplaySource':
+        """WAVファイルから作成
+
+        Args:
+            path (str): WAVファイルのパス
+            **kwargs: ReplaySourceの引数
+
+        Returns:
+            ReplaySource: リプレイソース
+        """
+        audio, sample_rate = load_wav(path)
+        kwargs.setdefault('name', Path(path).name)
+        return cls(audio, sample_rate, **kwargs)
+
+    @property
+    def duration(self) -> float:
+        """音声の長さ (秒)"""
+        return len(self.audio) / self.sample_rate
+
+    def query_devices(self) -> List[Dict[str, Any]]:
+        return [{
+            'name': f"Replay: {self.name}",
+            'hostapi': 0,
+            'max_input_channels': self.audio.shape[1],
+            'default_samplerate': float(self.sample_rate),
+        }]
+
+    def query_hostapis(self) -> List[Dict[str, Any]]:
+        return [{'name': 'Replay'}]
+
+    def open_stream(self, device: int, channels: int, samplerate: int,
+                    callback: Callable, finished_callback: Callable = None,
+                    blocksize: int = 0, latency=None) -> ReplayStream:
+        if device != 0:
+            raise ValueError(f"リプレイデバイスが見つかりません (ID: {device})")
+        if int(samplerate) != self.sample_rate:
+            raise ValueError(f"リプレイはネイティブレート ({self.sample_rate}Hz) でのみ開けます")
+
+        # 要求チャンネル数に合わせる (デバイス側のダウンミックスを模擬)
+        audio = self.audio
+        if channels < audio.shape[1]:
+            audio = audio.mean(axis=1, keepdims=True).repeat(channels, axis=1).astype(np.float32)
+
+        # 開き直した場合は先頭からやり直さず、前のストリームが送った位置から続ける
+        start_position = self.streams[-1].position if self.streams else 0
+        stream = ReplayStream(audio, self.sample_rate, callback, finished_callback,
+                              block_size=blocksize or self.block_size, speed=self.speed,
+                              jitter=self.jitter, seed=self.seed,
+                              backpressure=self.backpressure, start_position=start_position)
+        self.streams.append(stream)
+        return stream
@@ -0,0 +1,258 @@
+"""
+パイプラインのベンチマーク (オーディオハードウェア不要)
+
+WAVファイルをリプレイソースから実デバイスと同じコールバック経路で流し、
+audio_worker → transcription_worker → check_transcription_results を
+GUIなしでエンドツーエンドに計測する (PyQt5がインストールされていない環境でも動く)。
+
+リングバッファの計測では、キャプチャのバッファを旧実装のdeque
+(サンプルごとのPython float) と現在のAudioRingBuffer (float32の事前確保配列) で
+比較する (コールバック側の書き込みと、チャンクの読み出しの時間)。
+
+ブロックサイズの探索では、実デバイスでオーバーフローなく動く最小の
+コールバックブロックサイズを調べる ([Audio] stream_blocksize に設定する値)。
+
+使用例:
+    python benchmark.py --wav sample.wav --model_path ../models/small --speed 0
+    python benchmark.py --ring_buffer --seconds 120
+    python benchmark.py --probe_blocksize --device_id 3
+"""
+
+import argparse
+import collections
+import json
+import sys
+import time
+import numpy as np
+
+from audio_source import ReplaySource
+from audio_capture import AudioCapture, AudioRingBuffer, DeviceRegistry
+from main import OfflineVoiceLoggerApp
+
+
+def run_benchmark(app: OfflineVoiceLoggerApp, source: ReplaySource, timeout: float = None) -> dict:
+    """リプレイソースでパイプラインを最後まで動かして計測
+
+    Args:
+        app (OfflineVoiceLoggerApp): モデルをロード済みのアプリ (windowはNone)
+        source (ReplaySource): 入力のリプレイソース
+        timeout (float): 打ち切りまでの秒数 (Noneの場合は無制限)
+
+    Returns:
+        dict: 計測結果
+    """
+    # リプレイソースのデバイスで設定どおりのキャプチャを構成する
+    app.device_registry = DeviceRegistry(source)
+    app.audio_capture = app._create_audio_capture()
+    sources = {"リプレイ": (app.audio_capture, 0)}
+    # 最速モードではリングバッファと音声キューの空きに合わせて送る
+    # (窓がバッファ全体を使う設定では溢れを許容し、止まらないようにする)
+    capture = app.audio_capture
+    ring = capture.audio_buffer
+    headroom = 4 * int(source.block_size * capture.sample_rate / source.sample_rate + 1)
+    ring_limit = ring.capacity - headroom
+    if capture.min_buffer_samples > ring_limit:
+        ring_limit = ring.capacity
+    queue_depth = app.config_mgr.get_int('Audio', 'file_queue_depth', 4)
+    source.backpressure = lambda: (len(ring) >= ring_limit
+                                   or app.audio_queue.qsize() >= queue_depth)
+    # 最速モードは常にキューが溜まるため、デコード設定は下げずに計測する
+    app.adaptive_decoding = app.adaptive_decoding and source.speed > 0
+
+    latencies = []
+    seen = 0
+    start = time.perf_counter()
+    app.start_pipeline(sources)
+    try:
+        while not app.is_input_drained():
+            if timeout is not None and time.perf_counter() - start > timeout:
+                break
+            time.sleep(0.5)
+            app.check_transcription_results()
+            now = time.perf_counter()
+            # 表示された時刻と、その音声がソースから届いた時刻の差
+            for segment in app.transcription_segments[seen:]:
+                if source.speed > 0:
+                    latencies.append(now - (start + segment['end'] / source.speed))
+            seen = len(app.transcription_segments)
+        app.check_transcription_results()
+        wall_time = time.perf_counter() - start
+    finally:
+        app.stop_pipeline(drain_timeout=0)
+
+    metrics = app.audio_queue.get_metrics()
+    latencies.sort()
+    result = {
+        'audio_seconds': round(source.duration, 2),
+        'speed': source.speed,
+        'block_size': source.block_size,
+        'wall_seconds': round(wall_time, 2),
+        'realtime_factor': round(wall_time / source.duration, 3) if source.duration else 0.0,
+        'speedup': round(source.duration / wall_time, 2) if wall_time else 0.0,
+        'chunks_queued': app.chunks_queued,
+        'chunks_done': app.chunks_done,
+        'dropped_chunks': metrics['dropped_chunks'],
+        'merged_chunks': metrics['merged_chunks'],
+        'segments': len(app.transcription_segments),
+        'completed': app.is_input_drained(),
+        'decode_levels': {name: round(seconds, 1) for name, seconds
+                          in app.decode_controller.get_stats()['seconds_by_level'].items()},
+    }
+    if latencies:
+        result['latency_p50'] = round(latencies[len(latencies) // 2], 2)
+        result['latency_p95'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+        result['latency_max'] = round(latencies[-1], 2)
+    return result
+
+
+def benchmark_ring_buffer(seconds: float = 60.0, sample_rate: int = 16000, block_size: int = 160,
+                          chunk_seconds: float = 3.0, buffer_seconds: float = 30.0, repeat: int = 3) -> dict:
+    """キャプチャバッファのdeque実装とリングバッファ実装を比較
+
+    コールバックと同じ大きさのブロックを書き込み、チャンクの長さが溜まるたびに
+    読み出して空にする (固定長チャンクの経路)。各実装を repeat 回実行した最速値を使う。
+
+    Args:
+        seconds (float): 流す音声の長さ (秒)
+        sample_rate (int): サンプリングレート
+        block_size (int): 1回のコールバックのサンプル数
+        chunk_seconds (float): チャンクの長さ (秒)
+        buffer_seconds (float): バッファの容量 (秒)
+        repeat (int): 計測の繰り返し回数
+
+    Returns:
+        dict: 実装ごとの書き込み・読み出し時間 (ブロック/チャンクあたりのマイクロ秒) と速度比
+    """
+    rng = np.random.default_rng(0)
+    blocks = [rng.standard_normal(block_size).astype(np.float32) * 0.1
+              for _ in range(int(seconds * sample_rate / block_size))]
+    chunk_samples = int(chunk_seconds * sample_rate)
+    capacity = int(buffer_seconds * sample_rate)
+
+    def run_deque():
+        # 旧実装: deque.extend と np.array(list(deque))
+        buffer = collections.deque(maxlen=capacity)
+        write_time = read_time = 0.0
+        chunks = 0
+        for block in blocks:
+            t0 = time.perf_counter()
+            buffer.extend(block)
+            t1 = time.perf_counter()
+            write_time += t1 - t0
+            if len(buffer) >= chunk_samples:
+                audio = np.array(list(buffer), dtype=np.float32)
+                buffer.clear()
+                read_time += time.perf_counter() - t1
+                chunks += 1
+        return write_time, read_time, chunks, audio
+
+    def run_ring():
+        # 現在の実装: ベクトル化した書き込みと、事前確保した配列への読み出し
+        buffer = AudioRingBuffer(capacity)
+        out = np.empty(chunk_samples, dtype=np.float32)
+        write_time = read_time = 0.0
+        chunks = 0
+        for block in blocks:
+            t0 = time.perf_counter()
+            buffer.write(block)
+            t1 = time.perf_counter()
+            write_time += t1 - t0
+            if len(buffer) >= chunk_samples:
+                count = len(buffer)
+                audio = buffer.read(count, out if count <= chunk_samples else None)
+                buffer.consume(count)
+                read_time += time.perf_counter() - t1
+                chunks += 1
+        return write_time, read_time, chunks, audio
+
+    result = {
+        'audio_seconds': seconds,
+        'block_size': block_size,
+        'chunk_seconds': chunk_seconds,
+    }
+    outputs = {}
+    for name, run in (('deque', run_deque), ('ring_buffer', run_ring)):
+        runs = [run() for _ in range(max(1, repeat))]
+        write_time = min(r[0] for r in runs)
+        read_time = min(r[1] for r in runs)
+        chunks = runs[0][2]
+        outputs[name] = runs[0][3]
+        result[name] = {
+            'write_us_per_block': round(write_time / len(blocks) * 1e6, 2),
+            'read_us_per_chunk': round(read_time / max(1, chunks) * 1e6, 1),
+            'total_ms': round((write_time + read_time) * 1000, 1),
+            'chunks': chunks,
+        }
+    # 両実装が同じ音声を返すことを確認する
+    result['identical_output'] = bool(np.array_equal(outputs['deque'], outputs['ring_buffer']))
+    result['speedup'] = round(result['deque']['total_ms'] / max(result['ring_buffer']['total_ms'], 1e-6), 1)
+    return result
+
+
+def probe_blocksize(device_id: int = None, trial_seconds: float = 5.0) -> dict:
+    """実デバイスで安定した最小のブロックサイズを探す
+
+    Args:
+        device_id (int): デバイスID (Noneの場合はループバック自動検出)
+        trial_seconds (float): 1候補あたりの計測時間 (秒)
+
+    Returns:
+        dict: 探索結果
+    """
+    capture = AudioCapture()
+    best, results = capture.find_stable_blocksize(device_id, trial_seconds=trial_seconds)
+    return {
+        'device': capture.device_name,
+        'sample_rate': capture.stream_sample_rate,
+        'stable_blocksize': best,
+        'trials': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="リプレイ音声でパイプラインを計測")
+    parser.add_argument("--wav", help="入力WAVファイル")
+    parser.add_argument("--ring_buffer", action="store_true",
+                        help="キャプチャバッファのdeque実装とリングバッファ実装を比較")
+    parser.add_argument("--seconds", type=float, default=60.0, help="リングバッファ比較で流す音声の長さ")
+    parser.add_argument("--probe_blocksize", action="store_true",
+                        help="実デバイスで安定した最小のブロックサイズを探す")
+    parser.add_argument("--device_id", type=int, default=None, help="ブロックサイズ探索のデバイスID")
+    parser.add_argument("--trial_seconds", type=float, default=5.0, help="ブロックサイズ1候補の計測時間")
+    parser.add_argument("--model_path", default=None, help="モデルのパス (省略時は設定のモデル)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute_type", default="int8")
+    parser.add_argument("--speed", type=float, default=0.0, help="再生速度 (1=等速, 0以下=最速)")
+    parser.add_argument("--block_size", type=int, default=None, help="コールバックのフレーム数 (省略時10ms)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="コールバック間隔の揺らぎ (ブロック長比)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.ring_buffer:
+        result = benchmark_ring_buffer(args.seconds, block_size=args.block_size or 160)
+        print(json.dumps(result, ensure_ascii=False, indent=2), flush=True)
+        sys.exit(0 if result['identical_output'] else 1)
+    if args.probe_blocksize:
+        result = probe_blocksize(args.device_id, args.trial_seconds)
+        print(json.dumps(result, ensure_ascii=False, indent=2), flush=True)
+        sys.exit(0 if result['stable_blocksize'] is not None else 1)
+    if not args.wav:
+        parser.error("--wav を指定してください")
+
+    source = ReplaySource.from_wav(args.wav, speed=args.speed, block_size=args.block_size,
+                                   jitter=args.jitter, seed=args.seed)
+
+    app = OfflineVoiceLoggerApp()
+    model_path = args.model_path or app._get_model_path()
+    language = app._session_language()
+    app.transcriber = app._create_transcriber(model_path, args.device, args.compute_type, language)
+    app.transcriber.load_model()
+
+    result = run_benchmark(app, source, timeout=args.timeout)
+    print(json.dumps(result, ensure_ascii=False, indent=2), flush=True)
+    sys.exit(0 if result['completed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,14 +30,48 @@ class ConfigManager:
             'device_name': '',
             'sample_rate': '16000',
             'buffer_size_seconds': '10',
-            'vad_threshold': '0.5'
+            'vad_threshold': '0.5',
+            'chunk_mode': 'fixed',  # fixed (重なりなし), sliding (重なり窓), vad (発話単位)
+            'window_seconds': '6',
+            'hop_seconds': '4',
+            'vad_min_silence_ms': '500',
+            'vad_preroll_ms': '300',
+            'vad_max_chunk_seconds': '8',
+            'silence_gate_enabled': 'True',  # 無音チャンクをモデルに渡さない
+            'silence_rms_threshold': '0.003',
+            'use_native_rate': 'True',  # デバイスのネイティブレートで開きアプリ側で16kHzに変換
+            'reconnect_stall_seconds': '2',  # コールバックがこの秒数止まったら再接続
+            'queue_max_chunks': '20',
+            'queue_overflow_policy': 'spill',  # drop_oldest, drop_newest, merge, spill (ディスク退避)
+            'file_queue_depth': '4',  # ファイル文字起こしで先読みするチャンク数
+            'stream_blocksize': '0',  # コールバック1回のフレーム数 (0=自動)
+            'stream_latency': '',  # low, high, 秒数 (空=既定)
+            'stream_status_report_seconds': '10'  # オーバーフロー等をまとめて報告する間隔
         },
         'Transcription': {
             'model': 'medium',  # large-v3 または medium を選択
             'language': 'ja',
             'beam_size': '5',
             'vad_filter': 'True',
-            'hallucination_threshold': '0.2'
+            'hallucination_threshold': '0.2',
+            'batch_size': '4',  # 溜まったチャンクをまとめてデコードする最大数 (1=バッチ推論なし)
+            'worker_threads': '1',  # 並行に文字起こしするワーカー数 (モデルは共有)
+            'cpu_threads': '0',  # 1デコードあたりのスレッド数 (0=コア数をワーカー数で等分)
+            'backend': 'thread',  # thread (同一プロセス), process (ワーカープロセス、GUIへの影響が小さい), server (常駐プロセス、GUI再起動時も再ロードなし)
+            'process_workers': '2',  # backend=processのワーカープロセス数 (プロセスごとにモデルを持つ)
+            'streaming_enabled': 'False',  # 短い間隔で再デコードし、一致した部分から表示する
+            'streaming_step_seconds': '1.0',  # ストリーミングの再デコード間隔
+            'streaming_max_buffer_seconds': '15',  # 一致しなくても確定するバッファ長
+            'refine_enabled': 'False',  # preview_modelで表示し、modelで後から置き換える (2段構成)
+            'preview_model': 'base',  # ライブ表示に使う小さいモデル (tiny, base)
+            'refine_window_seconds': '20',  # 精緻化で1回に再デコードする長さ
+            'refine_cpu_threads': '0',  # 精緻化モデルのスレッド数 (0=コアの半分)
+            'adaptive_decoding': 'True',  # 遅れたらビーム幅を下げ (5→2→greedy)、追いついたら戻す
+            'adaptive_step_down_rtf': '0.9',  # 実時間比 (デコード時間/音声長) がこれを超えたら下げる
+            'adaptive_step_up_rtf': '0.5',  # 実時間比がこれを下回り、キューが空なら上げる
+            'adaptive_queue_high': '3',  # キュー深さがこれ以上なら下げる
+            'warmup_seconds': '2.0',  # ロード直後にデコードする合成音声の長さ (0=ウォームアップなし)
+            'server_idle_minutes': '60'  # backend=serverの推論サーバーが要求なしで終了するまでの時間 (0=終了しない)
         },
         'UI': {
             'window_width': '800',
@@ -53,17 +87,27 @@ class ConfigManager:
             'file_name_template': 'transcript_{YYYYMMDD}_{HHMMSS}.txt',
             'auto_save_enabled': 'True',
             'auto_save_interval_minutes': '5',
-            'encoding': 'utf-8'
+            'encoding': 'utf-8',
+            # 録音音声の圧縮保存 (文字起こし結果と同じディレクトリ)
+            'audio_archive_enabled': 'False',
+            'audio_archive_format': 'opus',  # opus / flac
+            'audio_archive_bitrate': '32000',  # Opusのビットレート (bps)
+            'audio_archive_segment_seconds': '60'
         },
         'Storage': {
-            'max_memory_usage_mb': '1024',
+            'max_memory_usage_mb': '1024',  # 保持するモデルの見積もりメモリの上限
+            'max_resident_models': '2',  # 再ロードせずに切り替えられるよう保持するモデル数
             'max_buffer_size_seconds': '30',
             'disk_warning_threshold_mb': '500',
             'disk_critical_threshold_mb': '100',
             'auto_cleanup_enabled': 'True',
             'max_backup_files': '10',
             'max_log_files': '5',
-            'debug_audio_save_enabled': 'False'
+            'debug_audio_save_enabled': 'False',
+            # 異常終了に備えた生音声のジャーナル (次回起動時に文字起こしし直せる)
+            'journal_enabled': 'False',
+            'journal_sample_format': 'int16',  # int16 / float32
+            'journal_segment_minutes': '5'
         },
         'Advanced': {
             'log_level': 'INFO',
@@ -254,15 +298,116 @@ class ConfigManager:
             if buffer_size < 1 or buffer_size > 60:
                 errors.append(f"バッファサイズは1-60秒の範囲で指定してください: {buffer_size}")
 
+            # チャンク分割検証
+            chunk_mode = self.get('Audio', 'chunk_mode', 'fixed')
+            if chunk_mode not in ['fixed', 'sliding', 'vad']:
+                errors.append(f"無効なチャンクモード: {chunk_mode}")
+            window_seconds = self.get_float('Audio', 'window_seconds', 6.0)
+            hop_seconds = self.get_float('Audio', 'hop_seconds', 4.0)
+            if window_seconds <= 0 or window_seconds > buffer_size:
+                errors.append(f"窓長はバッファサイズ以下の正の値で指定してください: {window_seconds}")
+            if hop_seconds <= 0 or hop_seconds > window_seconds:
+                errors.append(f"進み幅は窓長以下の正の値で指定してください: {hop_seconds}")
+            vad_threshold = self.get_float('Audio', 'vad_threshold', 0.5)
+            if vad_threshold < 0.0 or vad_threshold > 1.0:
+                errors.append(f"VADしきい値は0.0-1.0の範囲で指定してください: {vad_threshold}")
+            vad_max_chunk = self.get_float('Audio', 'vad_max_chunk_seconds', 8.0)
+            if vad_max_chunk <= 0 or vad_max_chunk >= buffer_size:
+                errors.append(f"VAD最大チャンク長はバッファサイズ未満の正の値で指定してください: {vad_max_chunk}")
+
+            # 音声キューのポリシー検証
+            queue_policy = self.get('Audio', 'queue_overflow_policy', 'spill')
+            if queue_policy not in ['drop_oldest', 'drop_newest', 'merge', 'spill']:
+                errors.append(f"無効なキューポリシー: {queue_policy}")
+
+            # ストリーム設定検証
+            stream_blocksize = self.get_int('Audio', 'stream_blocksize', 0)
+            if stream_blocksize < 0:
+                errors.append(f"ブロックサイズは0以上で指定してください: {stream_blocksize}")
+            stream_latency = self.get('Audio', 'stream_latency', '').strip().lower()
+            if stream_latency not in ['', 'low', 'high']:
+                try:
+                    if float(stream_latency) <= 0:
+                        raise ValueError
+                except ValueError:
+                    errors.append(f"無効なストリーム遅延: {stream_latency}")
+
+            # 音声アーカイブ検証
+            archive_format = self.get('Files', 'audio_archive_format', 'opus')
+            if archive_format not in ['opus', 'flac']:
+                errors.append(f"無効なアーカイブ形式: {archive_format}")
+
+            # モデル保持検証
+            if self.get_int('Storage', 'max_memory_usage_mb', 1024) < 100:
+                errors.append("max_memory_usage_mbは100以上で指定してください")
+            max_models = self.get_int('Storage', 'max_resident_models', 2)
+            if max_models < 1 or max_models > 5:
+                errors.append(f"保持するモデル数は1-5の範囲で指定してください: {max_models}")
+
+            # 音声ジャーナル検証
+            journal_format = self.get('Storage', 'journal_sample_format', 'int16')
+            if journal_format not in ['int16', 'float32']:
+                errors.append(f"無効なジャーナル形式: {journal_format}")
+
             # 言語検証
             language = self.get('Transcription', 'language')
             if language not in ['ja', 'en']:
                 errors.append(f"サポートされていない言語: {language}")
 
+            # バッチ推論検証
+            batch_size = self.get_int('Transcription', 'batch_size', 4)
+            if batch_size < 1 or batch_size > 32:
+                errors.append(f"バッチサイズは1-32の範囲で指定してください: {batch_size}")
+
+            # 文字起こしワーカー検証
+            worker_threads = self.get_int('Transcription', 'worker_threads', 1)
+            if worker_threads < 1 or worker_threads > 16:
+                errors.append(f"文字起こしワーカー数は1-16の範囲で指定してください: {worker_threads}")
+            if self.get_int('Transcription', 'cpu_threads', 0) < 0:
+                errors.append("cpu_threadsは0以上で指定してください")
+            backend = self.get('Transcription', 'backend', 'thread')
+            if backend not in ['thread', 'process', 'server']:
+                errors.append(f"無効な文字起こしバックエンド: {backend}")
+            if self.get_float('Transcription', 'server_idle_minutes', 60.0) < 0:
+                errors.append("server_idle_minutesは0以上で指定してください")
+            process_workers = self.get_int('Transcription', 'process_workers', 2)
+            if process_workers < 1 or process_workers > 8:
+                errors.append(f"ワーカープロセス数は1-8の範囲で指定してください: {process_workers}")
+
+            # ストリーミング検証
+            step_seconds = self.get_float('Transcription', 'streaming_step_seconds', 1.0)
+            if step_seconds < 0.2 or step_seconds > 5.0:
+                errors.append(f"ストリーミングの間隔は0.2-5.0秒の範囲で指定してください: {step_seconds}")
+            max_buffer = self.get_float('Transcription', 'streaming_max_buffer_seconds', 15.0)
+            if max_buffer < 2.0 or max_buffer > 30.0:
+                errors.append(f"ストリーミングのバッファ長は2-30秒の範囲で指定してください: {max_buffer}")
+
+            # デコード設定の適応制御検証
+            step_down_rtf = self.get_float('Transcription', 'adaptive_step_down_rtf', 0.9)
+            step_up_rtf = self.get_float('Transcription', 'adaptive_step_up_rtf', 0.5)
+            if not 0.0 < step_up_rtf < step_down_rtf:
+                errors.append(f"adaptive_step_up_rtfは0より大きくadaptive_step_down_rtf未満で指定してください: "
+                              f"{step_up_rtf}, {step_down_rtf}")
+            if self.get_int('Transcription', 'adaptive_queue_high', 3) < 1:
+                errors.append("adaptive_queue_highは1以上で指定してください")
+
+            # ウォームアップ検証
+            warmup_seconds = self.get_float('Transcription', 'warmup_seconds', 2.0)
+            if warmup_seconds < 0.0 or warmup_seconds > 10.0:
+                errors.append(f"ウォームアップの長さは0-10秒の範囲で指定してください: {warmup_seconds}")
+
             # モデル検証
             model = self.get('Transcription', 'model')
             if model not in ['tiny', 'base', 'small', 'medium', 'large-v3']:
                 errors.append(f"サポートされていないモデル: {model}")
+            preview_model = self.get('Transcription', 'preview_model', 'base')
+            if preview_model not in ['tiny', 'base', 'small', 'medium', 'large-v3']:
+                errors.append(f"サポートされていないプレビューモデル: {preview_model}")
+            refine_window = self.get_float('Transcription', 'refine_window_seconds', 20.0)
+            if refine_window < 5.0 or refine_window > 30.0:
+                errors.append(f"精緻化の窓長は5-30秒の範囲で指定してください: {refine_window}")
+            if self.get_int('Transcription', 'refine_cpu_threads', 0) < 0:
+                errors.append("refine_cpu_threadsは0以上で指定してください")
 
             # 保存先ディレクトリ検証
             save_dir = self.get('Files', 'save_directory')
@@ -0,0 +1,141 @@
+"""
+OfflineVoiceLogger - デコード設定の適応制御モジュール
+
+処理が追いつかなくなったらデコードを軽くし、余裕が戻ったら元に戻す
+- チャンクごとの実時間比 (デコード時間 / 音声長) と音声キューの深さを監視
+- 段階: beam 5 → beam 2 → greedy
+- 下げる条件と上げる条件に差を持たせ (ヒステリシス)、設定が振動しないようにする
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DecodeController:
+    """実時間比とキュー深さからデコードの段階を選ぶクラス
+
+    select()で次のチャンクに使う段階を取得し、デコード後にrecord()で計測値を渡す。
+    実時間比は現在の段階で計測したものだけを平均する (切り替え前に投入した
+    チャンクの結果で判断しない)。
+    """
+
+    # デコードの段階 (先頭が最高品質)
+    LEVELS = [
+        ('beam5', {'beam_size': 5, 'best_of': 5}),
+        ('beam2', {'beam_size': 2, 'best_of': 2}),
+        ('greedy', {'beam_size': 1, 'best_of': 1}),
+    ]
+
+    def __init__(self, parallelism: int = 1, step_down_rtf: float = 0.9, step_up_rtf: float = 0.5,
+                 queue_high: int = 3, step_up_chunks: int = 5, smoothing: float = 0.3,
+                 enabled: bool = True):
+        """
+        Args:
+            parallelism (int): 並行にデコードするワーカー数 (実時間比をこれで割って負荷とする)
+            step_down_rtf (float): 負荷がこれを超えたら1段下げる
+            step_up_rtf (float): 負荷がこれを下回り、キューが空の状態が続いたら1段上げる
+            queue_high (int): キュー深さがこれ以上なら1段下げる
+            step_up_chunks (int): 1段上げるまでに余裕のある状態が続くチャンク数
+            smoothing (float): 実時間比の指数移動平均の係数
+            enabled (bool): Falseの場合は常に最高品質
+        """
+        self.parallelism = max(1, int(parallelism))
+        self.step_down_rtf = step_down_rtf
+        self.step_up_rtf = step_up_rtf
+        self.queue_high = max(1, int(queue_high))
+        self.step_up_chunks = max(1, int(step_up_chunks))
+        self.smoothing = smoothing
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """最高品質に戻し、統計をリセット (録音開始時に呼ぶ)"""
+        with self._lock:
+            self.level = 0
+            self._applied_level = 0
+            self._reason = None
+            self._load = None  # 現在の段階での負荷の移動平均
+            self._samples = 0  # 現在の段階で計測したチャンク数
+            self._calm = 0  # 余裕のある状態が続いたチャンク数
+            self.changes = 0
+            self.level_seconds = [0.0] * len(self.LEVELS)
+
+    def initial_options(self) -> Dict:
+        """録音開始時の段階 (最高品質) のデコードパラメータ (ウォームアップ用)"""
+        return dict(self.LEVELS[0][1])
+
+    def select(self) -> Tuple[int, Dict, Optional[str]]:
+        """次のチャンクに使うデコード設定を取得
+
+        Returns:
+            Tuple[int, Dict, Optional[str]]: (段階, デコードパラメータ,
+                この呼び出しで段階が切り替わった場合はその理由、それ以外はNone)
+        """
+        with self._lock:
+            level = self.level if self.enabled else 0
+            reason = None
+            if level != self._applied_level:
+                reason = (f"{self.LEVELS[self._applied_level][0]} → {self.LEVELS[level][0]}"
+                          + (f" ({self._reason})" if self._reason else ""))
+                self._applied_level = level
+            return level, dict(self.LEVELS[level][1]), reason
+
+    def record(self, level: int, audio_seconds: float, decode_seconds: float, queue_depth: int):
+        """デコード結果を記録し、必要なら段階を切り替える
+
+        Args:
+            level (int): デコードに使った段階
+            audio_seconds (float): デコードした音声の長さ (秒)
+            decode_seconds (float): デコードにかかった時間 (秒)
+            queue_depth (int): デコード後の音声キューの深さ
+        """
+        if audio_seconds <= 0:
+            return
+        with self._lock:
+            self.level_seconds[level] += audio_seconds
+            if not self.enabled or level != self.level:
+                return
+
+            load = decode_seconds / audio_seconds / self.parallelism
+            self._load = load if self._load is None else self._load + self.smoothing * (load - self._load)
+            self._samples += 1
+
+            if queue_depth >= self.queue_high or (self._samples >= 2 and self._load > self.step_down_rtf):
+                # 遅れている: 1段下げる
+                self._calm = 0
+                if self.level < len(self.LEVELS) - 1:
+                    self._change(self.level + 1, f"負荷{self._load:.2f}, キュー深さ{queue_depth}")
+            elif queue_depth == 0 and self._load < self.step_up_rtf:
+                # 追いついて余裕がある状態が続いたら1段上げる
+                self._calm += 1
+                if self._calm >= self.step_up_chunks and self.level > 0:
+                    self._change(self.level - 1, f"負荷{self._load:.2f}が{self._calm}チャンク続いた")
+            else:
+                self._calm = 0
+
+    def _change(self, level: int, reason: str):
+        """段階を切り替える (ロック内で呼ぶ)"""
+        logger.info(f"デコード設定を変更: {self.LEVELS[self.level][0]} → {self.LEVELS[level][0]} ({reason})")
+        self.level = level
+        self._reason = reason
+        self._load = None
+        self._samples = 0
+        self._calm = 0
+        self.changes += 1
+
+    def get_stats(self) -> Dict:
+        """段階ごとのデコード量と切り替え回数を取得
+
+        Returns:
+            Dict: changes, level (現在の段階名), seconds_by_level (段階名 → 音声秒数)
+        """
+        with self._lock:
+            return {
+                'changes': self.changes,
+                'level': self.LEVELS[self.level][0],
+                'seconds_by_level': {name: seconds for (name, _), seconds in zip(self.LEVELS, self.level_seconds)},
+            }
@@ -78,6 +78,25 @@ class FileManager:
         milliseconds = int((seconds % 1) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
 
+    def _format_text(self, segment: Dict, show_source: bool = False) -> str:
+        """セグメントのテキストを整形
+
+        Args:
+            segment (Dict): 文字起こしセグメント
+            show_source (bool): ソース名 (マイク/システム等) を付与するか
+
+        Returns:
+            str: 整形済みテキスト
+        """
+        source = segment.get('source')
+        if show_source and source:
+            return f"[{source}] {segment['text']}"
+        return segment['text']
+
+    def _has_multiple_sources(self, segments: List[Dict]) -> bool:
+        """複数の音声ソースのセグメントが含まれるか"""
+        return len({segment.get('source') for segment in segments}) > 1
+
     def save_as_text(self, segments: List[Dict], filepath: str = None,
                      encoding: str = "utf-8") -> bool:
         """TXT形式で保存
@@ -103,10 +122,11 @@ class FileManager:
             filepath.parent.mkdir(parents=True, exist_ok=True)
 
             # TXT形式で保存
+            show_source = self._has_multiple_sources(segments)
             with open(filepath, 'w', encoding=encoding) as f:
                 for segment in segments:
                     timestamp = self._format_timestamp(segment['start'])
-                    text = segment['text']
+                    text = self._format_text(segment, show_source)
                     f.write(f"[{timestamp}] {text}\n")
 
             logger.info(f"TXTファイル保存完了: {filepath}")
@@ -139,11 +159,12 @@ class FileManager:
             filepath.parent.mkdir(parents=True, exist_ok=True)
 
             # SRT形式で保存
+            show_source = self._has_multiple_sources(segments)
             with open(filepath, 'w', encoding='utf-8') as f:
                 for i, segment in enumerate(segments, 1):
                     start = self._format_srt_timestamp(segment['start'])
                     end = self._format_srt_timestamp(segment['end'])
-                    text = segment['text']
+                    text = self._format_text(segment, show_source)
 
                     f.write(f"{i}\n")
                     f.write(f"{start} --> {end}\n")
@@ -0,0 +1,181 @@
+"""
+OfflineVoiceLogger - ファイル入力モジュール
+
+録音済みの音声・動画ファイルを文字起こしの入力ソースにする
+- PyAVで音声ストリームのみをデコードし、16kHzモノラルへ変換
+- 一定サイズのブロックでリングバッファへ書き込み、メモリ使用量はファイル長に依存しない
+- 下流のキュー深さに応じて書き込みを待ち、実時間より速く処理する
+"""
+
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Callable
+from logger import get_logger
+from audio_capture import AudioCapture, AudioCaptureError
+
+logger = get_logger(__name__)
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+    logger.warning("PyAVがインストールされていません。ファイル文字起こしは無効です")
+
+
+class FileAudioSource(AudioCapture):
+    """音声・動画ファイルをデコードしてリングバッファへ書き込む入力ソース
+
+    デバイスのコールバックの代わりにデコードスレッドがプロデューサとなり、
+    チャンク分割 (fixed/sliding/vad) はAudioCaptureのものをそのまま使う。
+    """
+
+    def __init__(self, file_path: str, backpressure: Callable[[], bool] = None, **kwargs):
+        """
+        Args:
+            file_path (str): 入力ファイルのパス
+            backpressure (Callable): Trueを返す間はデコードを待つ (下流のキューが詰まっている場合など)
+            **kwargs: AudioCaptureの引数 (use_native_rateは無視)
+
+        Raises:
+            AudioCaptureError: PyAVが利用できない、またはファイルに音声ストリームがない場合
+        """
+        if not AV_AVAILABLE:
+            raise AudioCaptureError("PyAVがインストールされていません")
+        kwargs['use_native_rate'] = False
+        super().__init__(**kwargs)
+
+        self.file_path = Path(file_path)
+        self.device_name = self.file_path.name
+        self.backpressure = backpressure
+        self.duration = self._probe_duration()
+
+        self.decoder_thread = None
+        self._decoder_stop = threading.Event()
+        self.decoded_samples = 0
+        self.decode_finished = False
+        self.decode_error = None  # デコードが途中で失敗した場合のエラーメッセージ
+        self.decode_time = 0.0
+
+        logger.info(f"FileAudioSource初期化: {self.file_path} ({self.duration:.1f}秒)")
+
+    def _probe_duration(self) -> float:
+        """ファイルの長さ (秒) を取得"""
+        try:
+            with av.open(str(self.file_path)) as container:
+                if not container.streams.audio:
+                    raise AudioCaptureError(f"音声ストリームがありません: {self.file_path}")
+                stream = container.streams.audio[0]
+                if stream.duration is not None and stream.time_base is not None:
+                    return float(stream.duration * stream.time_base)
+                if container.duration is not None:
+                    return container.duration / av.time_base
+        except AudioCaptureError:
+            raise
+        except Exception as e:
+            raise AudioCaptureError(f"ファイルを開けません: {self.file_path} - {e}")
+        return 0.0
+
+    def start_capture(self, device_id: int = None) -> bool:
+        """デコードを開始 (device_idは無視)
+
+        Returns:
+            bool: 成功時True
+        """
+        with self.buffer_lock:
+            self.audio_buffer.clear()
+            self._reset_vad_state()
+        self.decoded_samples = 0
+        self.decode_finished = False
+        self.decode_error = None  # デコードが途中で失敗した場合のエラーメッセージ
+        self.decode_time = 0.0
+
+        self.is_capturing = True
+        self._decoder_stop.clear()
+        self.decoder_thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self.decoder_thread.start()
+        logger.info(f"ファイルのデコードを開始: {self.file_path}")
+        return True
+
+    def stop_capture(self):
+        """デコードを停止"""
+        self.is_capturing = False
+        self._decoder_stop.set()
+        if (self.decoder_thread and self.decoder_thread.is_alive()
+                and self.decoder_thread is not threading.current_thread()):
+            self.decoder_thread.join(timeout=2)
+        self.decoder_thread = None
+
+        audio_seconds = self.decoded_samples / self.sample_rate
+        logger.info(f"ファイルのデコードを停止: {audio_seconds:.1f}秒デコード, "
+                    f"デコード時間{self.decode_time:.2f}秒")
+
+    def _decode_loop(self):
+        """ファイルを先頭から順にデコードしてリングバッファへ書き込む (別スレッド)"""
+        try:
+            with av.open(str(self.file_path)) as container:
+                stream = container.streams.audio[0]
+                stream.thread_type = 'AUTO'
+                resampler = av.AudioResampler(format='flt', layout='mono', rate=self.sample_rate)
+
+                for frame in container.decode(stream):
+                    start = time.perf_counter()
+                    blocks = [out.to_ndarray().reshape(-1) for out in resampler.resample(frame)]
+                    self.decode_time += time.perf_counter() - start
+                    for block in blocks:
+                        if not self._write_block(block):
+                            return
+                for out in resampler.resample(None):
+                    if not self._write_block(out.to_ndarray().reshape(-1)):
+                        return
+
+            self.decode_finished = True
+            logger.info(f"ファイルのデコード完了: {self.decoded_samples / self.sample_rate:.1f}秒")
+
+        except Exception as e:
+            # デコードできた所までは文字起こしを続け、呼び出し元で未完了として報告する
+            logger.error(f"ファイルのデコードエラー ({self.decoded_samples / self.sample_rate:.1f}秒地点): {e}")
+            self.decode_error = str(e) or type(e).__name__
+            self.decode_finished = True
+
+    def _write_block(self, block: np.ndarray) -> bool:
+        """空きと下流の状況を待ちながらブロックを書き込む
+
+        Returns:
+            bool: 停止要求があった場合False
+        """
+        position = 0
+        while position < len(block):
+            if self._decoder_stop.is_set():
+                return False
+            free = self.audio_buffer.capacity - len(self.audio_buffer)
+            if free == 0 or (self.backpressure is not None and self.backpressure()):
+                self._decoder_stop.wait(0.01)
+                continue
+
+            n = min(free, len(block) - position)
+            samples = block[position:position + n]
+            self.audio_buffer.write(samples)
+            position += n
+            self.decoded_samples += n
+            self._last_callback_time = time.monotonic()
+            self.current_audio_level = min(float(np.sqrt(np.mean(samples ** 2))) * 10, 1.0)
+        return True
+
+    @property
+    def input_finished(self) -> bool:
+        """最後までデコードしたか (デコードエラーで打ち切った場合もTrue、decode_errorで区別する)"""
+        return self.decode_finished
+
+    def get_progress(self) -> float:
+        """デコードの進捗 (0.0-1.0)"""
+        if self.decode_finished:
+            return 1.0
+        if self.duration <= 0:
+            return 0.0
+        return min(self.decoded_samples / (self.duration * self.sample_rate), 1.0)
+
+    def is_device_connected(self) -> bool:
+        return self.file_path.exists()
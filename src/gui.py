@@ -10,6 +10,7 @@ OfflineVoiceLogger - GUI モジュール (PyQt5版)
 """
 
 import sys
+from html import escape as html_escape
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTextEdit, QLabel, QComboBox, QFileDialog,
@@ -34,6 +35,8 @@ class MainWindow(QMainWindow):
     stop_recording_signal = pyqtSignal()
     save_file_signal = pyqtSignal()
     reset_text_signal = pyqtSignal()
+    transcribe_file_signal = pyqtSignal(str)
+    model_changed_signal = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
@@ -87,10 +90,36 @@ class MainWindow(QMainWindow):
         device_layout.addWidget(language_label)
         device_layout.addWidget(self.language_combo)
 
+        # モデル選択（メモリに保持中のモデルは再ロードせずに切り替わる）
+        model_label = QLabel("モデル:")
+        self.model_combo = QComboBox()
+        for model_name in ['tiny', 'base', 'small', 'medium', 'large-v3']:
+            self.model_combo.addItem(model_name, model_name)
+        self.model_combo.setToolTip("小さいモデルほど速く、大きいモデルほど正確です")
+        self.model_combo.currentIndexChanged.connect(self.on_model_changed)
+        device_layout.addWidget(model_label)
+        device_layout.addWidget(self.model_combo)
+
         device_layout.addStretch()
 
         layout.addLayout(device_layout)
 
+        # 追加デバイス選択（マイク＋システム音声の同時キャプチャ用）
+        secondary_layout = QHBoxLayout()
+        secondary_label = QLabel("追加デバイス:")
+        self.secondary_device_combo = QComboBox()
+        self.secondary_device_combo.setMinimumWidth(350)
+        self.secondary_device_combo.setToolTip(
+            "同時に録音するデバイス（例: 自分のマイク）\n"
+            "ソースごとに個別に文字起こしし、時刻順に統合して表示します"
+        )
+        self.secondary_device_combo.addItem("なし", None)
+        secondary_layout.addWidget(secondary_label)
+        secondary_layout.addWidget(self.secondary_device_combo)
+        secondary_layout.addStretch()
+
+        layout.addLayout(secondary_layout)
+
         # 保存先選択
         save_layout = QHBoxLayout()
         save_label = QLabel("保存先:")
@@ -218,10 +247,35 @@ class MainWindow(QMainWindow):
         """)
         self.app_help_button.clicked.connect(self.show_app_selection_guide)
 
+        # ファイル文字起こしボタン
+        self.file_button = QPushButton("📂 ファイル文字起こし")
+        self.file_button.setMinimumHeight(40)
+        self.file_button.setStyleSheet("""
+            QPushButton {
+                background-color: #673AB7;
+                color: white;
+                font-size: 14px;
+                font-weight: bold;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #5E35B1;
+            }
+            QPushButton:pressed {
+                background-color: #512DA8;
+            }
+            QPushButton:disabled {
+                background-color: #CCCCCC;
+                color: #666666;
+            }
+        """)
+        self.file_button.clicked.connect(self.on_transcribe_file)
+
         button_layout.addWidget(self.start_button)
         button_layout.addWidget(self.stop_button)
         button_layout.addWidget(self.save_button)
         button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.file_button)
         button_layout.addWidget(self.app_help_button)
 
         layout.addLayout(button_layout)
@@ -286,6 +340,25 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(self.loading_widget)
 
+        # ファイル文字起こしの進捗表示UI
+        self.file_progress_bar = QProgressBar()
+        self.file_progress_bar.setMaximum(100)
+        self.file_progress_bar.setValue(0)
+        self.file_progress_bar.setTextVisible(True)
+        self.file_progress_bar.setStyleSheet("""
+            QProgressBar {
+                border: 1px solid #D1C4E9;
+                border-radius: 3px;
+                text-align: center;
+            }
+            QProgressBar::chunk {
+                background-color: #673AB7;
+            }
+        """)
+        self.file_progress_bar.setVisible(False)  # 初期状態は非表示
+
+        layout.addWidget(self.file_progress_bar)
+
     def setup_transcription_display(self, layout):
         """文字起こし結果表示UI"""
         # ラベル
@@ -303,6 +376,15 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(self.transcription_text)
 
+        # ストリーミングモードの認識途中のテキスト（確定部分は黒、仮の部分は灰色）
+        self.live_text_label = QLabel()
+        self.live_text_label.setFont(font)
+        self.live_text_label.setWordWrap(True)
+        self.live_text_label.setTextFormat(Qt.RichText)
+        self.live_text_label.setStyleSheet("QLabel { padding: 4px; background-color: #FAFAFA; }")
+        self.live_text_label.setVisible(False)  # 初期状態は非表示
+        layout.addWidget(self.live_text_label)
+
     def setup_status_bar(self):
         """ステータスバー"""
         self.status_bar = QStatusBar()
@@ -330,6 +412,7 @@ class MainWindow(QMainWindow):
         self.start_button.setEnabled(False)
         # 停止ボタンは実際にキャプチャ開始まで無効のまま
         self.stop_button.setEnabled(False)
+        self.file_button.setEnabled(False)
         self.update_status("準備中...", "blue")
         self.start_recording_signal.emit()
 
@@ -338,6 +421,7 @@ class MainWindow(QMainWindow):
         logger.info("停止ボタンがクリックされました")
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
+        self.file_button.setEnabled(True)
         self.is_recording = False
         self.update_status("停止", "orange")
         self.stop_recording_signal.emit()
@@ -366,6 +450,30 @@ class MainWindow(QMainWindow):
         else:
             logger.info("リセット確認: キャンセル")
 
+    def on_model_changed(self):
+        """モデル選択の変更"""
+        model_name = self.model_combo.currentData()
+        logger.info(f"モデル選択: {model_name}")
+        self.model_changed_signal.emit(model_name)
+
+    def on_transcribe_file(self):
+        """ファイル文字起こしボタンハンドラ"""
+        logger.info("ファイル文字起こしボタンがクリックされました")
+        filepath, _ = QFileDialog.getOpenFileName(
+            self,
+            "文字起こしするファイルを選択",
+            "",
+            "音声・動画ファイル (*.wav *.mp3 *.m4a *.aac *.flac *.ogg *.opus *.wma "
+            "*.mp4 *.mkv *.mov *.avi *.webm);;すべてのファイル (*)"
+        )
+        if filepath:
+            logger.info(f"ファイルを選択: {filepath}")
+            self.start_button.setEnabled(False)
+            self.file_button.setEnabled(False)
+            self.stop_button.setEnabled(False)
+            self.update_status("準備中...", "blue")
+            self.transcribe_file_signal.emit(filepath)
+
     def browse_save_directory(self):
         """保存先ディレクトリ選択"""
         directory = QFileDialog.getExistingDirectory(
@@ -395,6 +503,26 @@ class MainWindow(QMainWindow):
         scrollbar = self.transcription_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
+    def update_live_text(self, lines):
+        """認識途中のテキストを更新 (ストリーミングモード)
+
+        Args:
+            lines: (確定済みだが文が終わっていない部分, まだ変わりうる仮の部分) のリスト
+                   (ソースごとに1行、空の場合は非表示)
+        """
+        lines = [(committed, tentative) for committed, tentative in lines if committed or tentative]
+        if not lines:
+            self.live_text_label.clear()
+            self.live_text_label.setVisible(False)
+            return
+        html = "<br>".join(
+            f"<span>{html_escape(committed)}</span>"
+            f"<span style='color: #9E9E9E; font-style: italic;'>{html_escape(tentative)}</span>"
+            for committed, tentative in lines
+        )
+        self.live_text_label.setText(html)
+        self.live_text_label.setVisible(True)
+
     def clear_transcription_text(self):
         """文字起こし結果をクリア"""
         self.transcription_text.clear()
@@ -408,6 +536,21 @@ class MainWindow(QMainWindow):
         level_percent = int(level * 100)
         self.audio_level_bar.setValue(level_percent)
 
+    def update_file_progress(self, percent: float, message: str = ""):
+        """ファイル文字起こしの進捗を更新 (初回呼び出しで表示)
+
+        Args:
+            percent (float): 進捗 (0～100)
+            message (str): 進捗バーに表示する補足 (例: 処理速度)
+        """
+        self.file_progress_bar.setVisible(True)
+        self.file_progress_bar.setValue(int(percent))
+        self.file_progress_bar.setFormat(f"%p% {message}" if message else "%p%")
+
+    def hide_file_progress(self):
+        """ファイル文字起こしの進捗表示を非表示"""
+        self.file_progress_bar.setVisible(False)
+
     def show_loading(self, message: str = "準備中..."):
         """ローディング表示を表示
 
@@ -440,6 +583,8 @@ class MainWindow(QMainWindow):
             devices (list): デバイス情報のリスト
         """
         self.device_combo.clear()
+        self.secondary_device_combo.clear()
+        self.secondary_device_combo.addItem("なし", None)
         for device in devices:
             device_name = device.get('name', '')
             device_id = device.get('id', -1)
@@ -452,6 +597,7 @@ class MainWindow(QMainWindow):
                 display_name = device_name
 
             self.device_combo.addItem(display_name, device_id)
+            self.secondary_device_combo.addItem(display_name, device_id)
 
         logger.info(f"デバイスリスト更新: {len(devices)}個")
 
@@ -463,6 +609,14 @@ class MainWindow(QMainWindow):
         """
         return self.device_combo.currentData()
 
+    def get_selected_secondary_device_id(self):
+        """選択された追加デバイスIDを取得
+
+        Returns:
+            int or None: デバイスID ("なし"の場合はNone)
+        """
+        return self.secondary_device_combo.currentData()
+
     def get_selected_language(self) -> str:
         """選択された言語を取得
 
@@ -471,6 +625,18 @@ class MainWindow(QMainWindow):
         """
         return self.language_combo.currentData()
 
+    def set_selected_model(self, model_name: str):
+        """モデル選択を設定 (変更のシグナルは送らない)
+
+        Args:
+            model_name (str): モデル名
+        """
+        index = self.model_combo.findData(model_name)
+        if index >= 0:
+            self.model_combo.blockSignals(True)
+            self.model_combo.setCurrentIndex(index)
+            self.model_combo.blockSignals(False)
+
     def get_save_directory(self) -> str:
         """保存先ディレクトリを取得
 
@@ -517,6 +683,26 @@ class MainWindow(QMainWindow):
         QMessageBox.warning(self, title, message)
         logger.warning(f"警告ダイアログ表示: {title} - {message}")
 
+    def ask_question(self, title: str, message: str) -> bool:
+        """はい/いいえの確認ダイアログを表示
+
+        Args:
+            title (str): タイトル
+            message (str): メッセージ
+
+        Returns:
+            bool: 「はい」が選ばれた場合True
+        """
+        reply = QMessageBox.question(
+            self,
+            title,
+            message,
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        logger.info(f"確認ダイアログ: {title} - {'はい' if reply == QMessageBox.Yes else 'いいえ'}")
+        return reply == QMessageBox.Yes
+
     def update_model_status(self, status: str, color: str = "gray"):
         """モデル状態を更新
 
@@ -0,0 +1,307 @@
+"""
+OfflineVoiceLogger - 推論サーバーのクライアントモジュール
+
+常駐する推論サーバー (preload_worker.py) に接続し、Transcriberと同じインターフェースで文字起こしする
+- 同じモデル・設定のサーバーが動いていれば接続するだけ (モデルを再ロードしない)
+- なければサーバーを起動し、モデルのロード完了を待って接続する
+- 切断してもサーバーは残り、GUIを再起動しても即座に接続し直せる
+"""
+
+import json
+import struct
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Dict, List
+from logger import get_logger
+from transcriber import Transcriber, ModelLoadError, ModelNotFoundError, TranscriptionError
+import preload_worker as protocol
+
+logger = get_logger(__name__)
+
+
+class InferenceClient:
+    """推論サーバーへ要求を送るバックエンド (Transcriberと同じインターフェース)
+
+    呼び出し元のスレッドごとに接続を持つため、複数スレッドから同時に呼べる
+    (サーバーは接続ごとのスレッドで並行に処理する)。
+    """
+
+    def __init__(self, model_path: str, device: str = "cpu", compute_type: str = "int8",
+                 language: str = "ja", cpu_threads: int = None, num_workers: int = 1,
+                 batch_size: int = 1, warmup_seconds: float = 0.0, idle_minutes: float = 60.0,
+                 load_timeout: float = 600.0, warmup_decode_options: Dict = None):
+        """
+        Args:
+            model_path (str): ローカルモデルパス
+            device (str): "cpu" or "cuda"
+            compute_type (str): "int8", "float16", "float32"
+            language (str): "ja" or "en"
+            cpu_threads (int): 1デコードあたりのスレッド数
+            num_workers (int): サーバーで並行にデコードする数
+            batch_size (int): 1回のバッチ推論でまとめるチャンクの最大数
+            warmup_seconds (float): サーバー起動時のウォームアップの長さ (秒)
+            idle_minutes (float): 要求がない場合にサーバーが終了するまでの時間 (分)
+            load_timeout (float): サーバーのモデルロードを待つ最大時間 (秒)
+            warmup_decode_options (Dict): ウォームアップで使うデコードパラメータの上書き
+        """
+        self.model_path = Path(model_path)
+        self.device = device
+        self.compute_type = compute_type
+        self.language = language if language in Transcriber.SUPPORTED_LANGUAGES else "ja"
+        self.cpu_threads = cpu_threads
+        self.num_workers = max(1, int(num_workers or 1))
+        self.batch_size = max(1, int(batch_size))
+        self.warmup_seconds = warmup_seconds
+        self.warmup_decode_options = dict(warmup_decode_options or {})
+        self.idle_minutes = idle_minutes
+        self.load_timeout = load_timeout
+        self.warmup_stats = None
+
+        self.key = protocol.server_key(str(model_path), device, compute_type, cpu_threads, self.num_workers)
+        self.model_loaded = False
+        self._state = None
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        logger.info(f"InferenceClient初期化: モデル={model_path}, サーバー={self.key}")
+
+    def load_model(self) -> bool:
+        """稼働中のサーバーに接続する (なければ起動してロード完了を待つ)
+
+        Returns:
+            bool: 成功時True
+
+        Raises:
+            ModelNotFoundError: モデルが見つからない場合
+            ModelLoadError: サーバーの起動・接続に失敗した場合
+        """
+        if not self.model_path.exists():
+            raise ModelNotFoundError(f"モデルファイルが見つかりません: {self.model_path}")
+        try:
+            protocol.runtime_directory()
+        except OSError as e:
+            raise ModelLoadError(f"推論サーバーの実行ディレクトリを使用できません: {e}")
+
+        start = time.perf_counter()
+        if self._attach():
+            logger.info(f"稼働中の推論サーバーに接続: {(time.perf_counter() - start) * 1000:.0f}ms "
+                        f"(pid={self._state['pid']})")
+            self.model_loaded = True
+            return True
+
+        process = self._spawn_server()
+        deadline = time.monotonic() + self.load_timeout
+        while time.monotonic() < deadline:
+            if self._attach():
+                logger.info(f"推論サーバーを起動して接続: {time.perf_counter() - start:.1f}秒 "
+                            f"(pid={self._state['pid']})")
+                self.model_loaded = True
+                return True
+            if process.poll() is not None:
+                raise ModelLoadError(f"推論サーバーの起動に失敗しました: {self._read_server_error()}")
+            time.sleep(0.2)
+        # ロードを続けるサーバーを残さない (モデルのメモリを使い続けるため)
+        self._terminate_server(process)
+        raise ModelLoadError("推論サーバーのモデルロードがタイムアウトしました")
+
+    @staticmethod
+    def _terminate_server(process: subprocess.Popen, timeout: float = 5.0):
+        """起動したサーバーのプロセスを終了する (終了しない場合は強制終了)"""
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        logger.warning(f"ロードが終わらない推論サーバーを終了しました (pid={process.pid})")
+
+    def _attach(self) -> bool:
+        """状態ファイルの接続先へ接続し、応答を確認する"""
+        state_file = protocol.state_file_path(self.key)
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('protocol') != protocol.PROTOCOL_VERSION:
+            return False
+
+        self._state = state
+        try:
+            self._call(protocol.OP_PING)
+        except TranscriptionError:
+            # 異常終了したサーバーの状態ファイル
+            self._state = None
+            self._disconnect_local()
+            return False
+        return True
+
+    def _spawn_server(self) -> subprocess.Popen:
+        """推論サーバーをGUIから独立したプロセスとして起動する"""
+        command = protocol.server_command() + [
+            "--model_path", str(self.model_path),
+            "--device", self.device,
+            "--compute_type", self.compute_type,
+            "--num_workers", str(self.num_workers),
+            "--batch_size", str(self.batch_size),
+            "--language", self.language,
+            "--warmup_seconds", str(self.warmup_seconds),
+            "--warmup_options", json.dumps(self.warmup_decode_options),
+            "--idle_minutes", str(self.idle_minutes),
+        ]
+        if self.cpu_threads:
+            command += ["--cpu_threads", str(self.cpu_threads)]
+
+        # GUIの終了後も動き続けるよう、標準出力はファイルへ向けてセッションを分ける
+        output = open(self._server_log_path(), 'wb')
+        kwargs = {'stdin': subprocess.DEVNULL, 'stdout': output, 'stderr': subprocess.STDOUT}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        try:
+            process = subprocess.Popen(command, **kwargs)
+        finally:
+            output.close()
+        logger.info(f"推論サーバーを起動: pid={process.pid}, モデル={self.model_path}")
+        return process
+
+    def _server_log_path(self) -> Path:
+        return protocol.runtime_directory() / f"inference_server_{self.key}.log"
+
+    def _read_server_error(self) -> str:
+        """起動に失敗したサーバーの出力からエラーを取り出す"""
+        try:
+            lines = self._server_log_path().read_text(encoding='utf-8', errors='replace').splitlines()
+        except OSError:
+            return "不明なエラー"
+        for line in reversed(lines):
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(message, dict) and not message.get('ok', True):
+                return message.get('error', "不明なエラー")
+        return lines[-1] if lines else "不明なエラー"
+
+    def _connection(self):
+        """呼び出し元スレッドの接続 (なければ接続する)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = Client(self._state['address'], family=self._state['family'],
+                                authkey=bytes.fromhex(self._state['authkey']))
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _disconnect_local(self):
+        """呼び出し元スレッドの接続を閉じる"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._connections_lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+    def _call(self, op: int, audio_list: List[np.ndarray] = (), language: str = None,
+              decode_options: Dict = None) -> protocol.Chunks:
+        """要求を送り、応答を待つ
+
+        Raises:
+            TranscriptionError: 通信に失敗した、またはサーバーがエラーを返した場合
+        """
+        if self._state is None:
+            raise TranscriptionError("推論サーバーに接続していません。先にload_model()を実行してください。")
+        if language is None or language not in Transcriber.SUPPORTED_LANGUAGES:
+            language = self.language
+        try:
+            request = protocol.encode_request(op, audio_list, language, decode_options)
+        except (ValueError, TypeError, struct.error) as e:
+            # 送る前の失敗のため、接続はそのまま使える
+            raise TranscriptionError(f"推論サーバーへの要求を作成できません: {e}")
+        try:
+            connection = self._connection()
+            connection.send_bytes(request)
+            response = connection.recv_bytes()
+        except Exception as e:
+            self._disconnect_local()
+            raise TranscriptionError(f"推論サーバーとの通信に失敗しました: {e}")
+        try:
+            return protocol.decode_response(response)
+        except RuntimeError as e:
+            # サーバー側のTranscriberのエラーメッセージをそのまま伝える
+            raise TranscriptionError(str(e))
+
+    def transcribe(self, audio_data: np.ndarray, language: str = None, decode_options: Dict = None) -> Dict:
+        """音声データを文字起こし (Transcriber.transcribeと同じ形式)"""
+        return self.transcribe_batch([audio_data], language, decode_options)[0]
+
+    def transcribe_batch(self, audio_list: List[np.ndarray], language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """複数の音声チャンクをサーバーで文字起こし (Transcriber.transcribe_batchと同じ形式)
+
+        Raises:
+            TranscriptionError: 文字起こしに失敗した場合
+        """
+        results = []
+        for chunk_language, duration, records in self._call(protocol.OP_TRANSCRIBE, audio_list, language,
+                                                            decode_options):
+            segments = [
+                {"id": i + 1, "start": start, "end": end, "text": text, "confidence": confidence}
+                for i, (start, end, confidence, text) in enumerate(records)
+            ]
+            results.append({"segments": segments, "language": chunk_language, "duration": duration})
+        return results
+
+    def transcribe_words(self, audio_data: np.ndarray, language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """単語単位の文字起こし (Transcriber.transcribe_wordsと同じ形式)"""
+        chunks = self._call(protocol.OP_WORDS, [audio_data], language, decode_options)
+        return [
+            {"start": start, "end": end, "word": word, "probability": probability}
+            for start, end, probability, word in chunks[0][2]
+        ]
+
+    def set_language(self, language: str):
+        if language in Transcriber.SUPPORTED_LANGUAGES:
+            self.language = language
+
+    def get_supported_languages(self) -> List[str]:
+        return Transcriber.SUPPORTED_LANGUAGES.copy()
+
+    def is_model_loaded(self) -> bool:
+        return self.model_loaded
+
+    def close(self):
+        """サーバーから切断する (サーバーとロード済みのモデルは残り、GUIを再起動しても再接続できる)"""
+        self.model_loaded = False
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except OSError:
+                pass
+        self._local = threading.local()
+
+    def shutdown_server(self):
+        """サーバーを終了してモデルを解放する (ModelRegistryが予算のために解放する場合に呼ばれる)"""
+        try:
+            self._call(protocol.OP_SHUTDOWN)
+        except TranscriptionError:
+            pass
+        self.close()
+        self._state = None
+        logger.info(f"推論サーバーを終了: {self.key}")
@@ -12,27 +12,68 @@ import os
 import threading
 import queue
 import time
+import numpy as np
 from pathlib import Path
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QTimer
+
+try:
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    QT_AVAILABLE = True
+except ImportError:
+    # Qtのないビルドマシンではパイプラインのみ利用可能 (ベンチマーク・テスト)
+    QApplication = None
+    QTimer = None
+    QT_AVAILABLE = False
 
 # モジュールのインポート
 try:
     # 相対インポート (パッケージとして実行された場合)
     from .logger import setup_global_logger, get_logger
     from .config_manager import ConfigManager
-    from .audio_capture import AudioCapture, DeviceNotFoundError, AudioCaptureError
-    from .transcriber import Transcriber, ModelNotFoundError, TranscriptionError
+    from .audio_capture import AudioCapture, DeviceRegistry, DeviceNotFoundError, AudioCaptureError
+    from .transcriber import Transcriber, ModelNotFoundError, TranscriptionError, split_cpu_threads
+    from .process_transcriber import ProcessTranscriber
+    from .inference_client import InferenceClient
+    from .model_registry import ModelRegistry
     from .file_manager import FileManager
-    from .gui import MainWindow
+    from .segment_stitcher import SegmentStitcher
+    from .streaming import StreamingProcessor
+    from .refiner import RefinementLane
+    from .result_sequencer import ResultSequencer
+    from .decode_controller import DecodeController
+    from .audio_queue import ChunkQueue
+    from .audio_journal import AudioJournal, JournalReader, find_unfinished_sessions
+    from .audio_archiver import AudioArchiver
+    from .file_source import FileAudioSource
+    from .resampler import StreamingResampler
+    from .vad import SilenceGate
 except ImportError:
     # 絶対インポート (スクリプトとして直接実行された場合)
     from logger import setup_global_logger, get_logger
     from config_manager import ConfigManager
-    from audio_capture import AudioCapture, DeviceNotFoundError, AudioCaptureError
-    from transcriber import Transcriber, ModelNotFoundError, TranscriptionError
+    from audio_capture import AudioCapture, DeviceRegistry, DeviceNotFoundError, AudioCaptureError
+    from transcriber import Transcriber, ModelNotFoundError, TranscriptionError, split_cpu_threads
+    from process_transcriber import ProcessTranscriber
+    from inference_client import InferenceClient
+    from model_registry import ModelRegistry
     from file_manager import FileManager
-    from gui import MainWindow
+    from segment_stitcher import SegmentStitcher
+    from streaming import StreamingProcessor
+    from refiner import RefinementLane
+    from result_sequencer import ResultSequencer
+    from decode_controller import DecodeController
+    from audio_queue import ChunkQueue
+    from audio_journal import AudioJournal, JournalReader, find_unfinished_sessions
+    from audio_archiver import AudioArchiver
+    from file_source import FileAudioSource
+    from resampler import StreamingResampler
+    from vad import SilenceGate
+
+if QT_AVAILABLE:
+    try:
+        from .gui import MainWindow
+    except ImportError:
+        from gui import MainWindow
 
 logger = get_logger(__name__)
 
@@ -55,11 +96,42 @@ class OfflineVoiceLoggerApp:
 
         # 音声キャプチャ
         print("   3-3. 音声キャプチャ初期化...")
-        self.audio_capture = AudioCapture(
-            sample_rate=self.config_mgr.get_int('Audio', 'sample_rate', 16000),
-            channels=1,
-            buffer_size_seconds=self.config_mgr.get_int('Audio', 'buffer_size_seconds', 10)
+        # ストリーミングモード（伸びていくバッファを短い間隔で再デコードし、一致部分を確定）
+        self.streaming_enabled = self.config_mgr.get_bool('Transcription', 'streaming_enabled', False)
+        self.streaming_processors = {}
+
+        # デバイス一覧は全ソースで共有するレジストリにキャッシュする
+        self.device_registry = DeviceRegistry()
+        self.audio_capture = self._create_audio_capture()
+        # 同時キャプチャする音声ソース（ソース名 → AudioCapture）。録音開始時に構成する
+        # ソースごとにリングバッファ・チャンク分割・オフセット・セグメント統合を持つ
+        self.audio_sources = {}
+        self.source_offsets = {}
+        self.segment_stitchers = {}
+        # 無音チャンクをモデルに渡さないためのゲート
+        self.silence_gate_enabled = self.config_mgr.get_bool('Audio', 'silence_gate_enabled', True)
+        self.silence_gate = SilenceGate(
+            sample_rate=self.audio_capture.sample_rate,
+            rms_threshold=self.config_mgr.get_float('Audio', 'silence_rms_threshold', 0.003)
         )
+        # 異常終了に備えた生音声のジャーナル（ソース名 → AudioJournal）
+        self.journal_enabled = self.config_mgr.get_bool('Storage', 'journal_enabled', False)
+        self.journals = {}
+        self.recovery_thread = None
+        self.recovering = False  # ジャーナルから復旧中 (録音・ファイル文字起こしとは排他)
+        # 録音音声の圧縮保存（ソース名 → AudioArchiver）
+        self.audio_archive_enabled = self.config_mgr.get_bool('Files', 'audio_archive_enabled', False)
+        self.archivers = {}
+        # ファイル文字起こしモード（録音済みファイルを入力ソースにする）
+        self.file_mode = False
+        self.file_path = None
+        self.pending_file_path = None  # モデルロード後に開始するファイル
+        self.file_input_done = False  # 全ソースを最後まで読み、キューへ投入し終えた
+        self.file_transcription_start = None
+        # 処理中のチャンク数の把握用（キュー投入数 / 文字起こし完了数）
+        self.chunks_queued = 0
+        self.chunks_done = 0
+        self.first_chunk_reported = False  # 録音ごとの最初のデコード時間を報告済みか
         print("        -> 音声キャプチャOK")
 
         # 文字起こし
@@ -73,13 +145,25 @@ class OfflineVoiceLoggerApp:
         self.pending_full_load = False  # 検証完了後に本ロードを要求するフラグ
         self._load_seq = 0  # ロードリクエストの世代管理
         self.model_name = self.config_mgr.get('Transcription', 'model', 'medium')  # 現在のモデル名
+        # 2段構成（小さいモデルでプレビューを表示し、大きいモデルで後から置き換える）
+        self.refine_enabled = self.config_mgr.get_bool('Transcription', 'refine_enabled', False)
+        self.refine_model_name = self.model_name
+        if self.refine_enabled:
+            self.model_name = self.config_mgr.get('Transcription', 'preview_model', 'base')
+        self.refine_transcriber = None
+        self.refiner = None
+        self.refined_ranges = {}  # ソース名 → 精緻化済みの時間範囲 (開始, 終了) のリスト
+        # ロード済みモデルをメモリ予算内で保持し、切り替え時に再ロードしない
+        self.model_registry = ModelRegistry(
+            memory_budget_mb=self.config_mgr.get_int('Storage', 'max_memory_usage_mb', 1024),
+            max_models=self.config_mgr.get_int('Storage', 'max_resident_models', 2)
+        )
         print("        -> 文字起こしモジュールOK")
 
         # 録音開始時刻（実時刻表示用）
         self.recording_start_time = None
 
-        # 累積音声オフセット（秒）- 文字起こし済み音声の累積時間
-        self.audio_offset = 0.0
+        # 累積音声オフセット（秒）- ソースごとの文字起こし済み音声の累積時間は source_offsets
 
         # ファイル管理
         print("   3-5. ファイル管理初期化...")
@@ -94,9 +178,33 @@ class OfflineVoiceLoggerApp:
         # スレッド管理
         print("   3-7. スレッド管理初期化...")
         self.audio_thread = None
-        self.transcription_thread = None
+        # 文字起こしワーカー (threadは1つのモデルを共有して並行にデコード、
+        # processはワーカープロセスごとにモデルを持ち、スレッドはプロセスへの受け渡しのみ)
+        self.transcription_backend = self.config_mgr.get('Transcription', 'backend', 'thread')
+        if self.transcription_backend == 'process':
+            self.transcription_workers = max(1, self.config_mgr.get_int('Transcription', 'process_workers', 2))
+        else:
+            self.transcription_workers = max(1, self.config_mgr.get_int('Transcription', 'worker_threads', 1))
+        self.transcription_threads = []
+        self._dequeue_lock = threading.Lock()  # 取り出し順と連番を一致させる
+        self._count_lock = threading.Lock()
+        self.result_sequencer = ResultSequencer()
+        # 遅れたらビーム幅を下げ、追いついたら戻す（実時間の入力のみ）
+        self.adaptive_decoding = self.config_mgr.get_bool('Transcription', 'adaptive_decoding', True)
+        self.decode_controller = DecodeController(
+            parallelism=self.transcription_workers,
+            step_down_rtf=self.config_mgr.get_float('Transcription', 'adaptive_step_down_rtf', 0.9),
+            step_up_rtf=self.config_mgr.get_float('Transcription', 'adaptive_step_up_rtf', 0.5),
+            queue_high=self.config_mgr.get_int('Transcription', 'adaptive_queue_high', 3)
+        )
         self.is_running = False
-        self.audio_queue = queue.Queue(maxsize=20)  # 10→20に増やしてオーバーフロー対策
+        self.draining = False  # 入力の停止後、キューに残ったチャンクを文字起こし中
+        # 満杯時はポリシーに従って破棄・結合・ディスク退避する（既定: ディスク退避で欠落なし）
+        self.audio_queue = ChunkQueue(
+            maxsize=self.config_mgr.get_int('Audio', 'queue_max_chunks', 20),
+            policy=self.config_mgr.get('Audio', 'queue_overflow_policy', 'spill'),
+            sample_rate=self.audio_capture.sample_rate
+        )
         self.result_queue = queue.Queue()
 
         # タイマー
@@ -105,9 +213,76 @@ class OfflineVoiceLoggerApp:
         self.ui_sync_timer = None
         print("        -> 全初期化完了")
 
-    def _get_model_path(self):
-        """モデルパスを取得 (スクリプトの場所を基準)"""
-        model_name = self.config_mgr.get('Transcription', 'model', 'medium')
+    def _create_audio_capture(self):
+        """設定に基づいてAudioCaptureを作成 (ソースごとに1つ)"""
+        chunk_mode = self.config_mgr.get('Audio', 'chunk_mode', 'fixed')
+        window_seconds = self.config_mgr.get_float('Audio', 'window_seconds', 6.0)
+        if self.streaming_enabled:
+            # ストリーミングでは短い間隔で届いた分をそのまま渡し、バッファはStreamingProcessorが持つ
+            chunk_mode = 'fixed'
+            window_seconds = self.config_mgr.get_float('Transcription', 'streaming_step_seconds', 1.0)
+        return AudioCapture(
+            sample_rate=self.config_mgr.get_int('Audio', 'sample_rate', 16000),
+            channels=1,
+            buffer_size_seconds=self.config_mgr.get_int('Audio', 'buffer_size_seconds', 10),
+            chunk_mode=chunk_mode,
+            window_seconds=window_seconds,
+            hop_seconds=self.config_mgr.get_float('Audio', 'hop_seconds', 4.0),
+            vad_threshold=self.config_mgr.get_float('Audio', 'vad_threshold', 0.5),
+            vad_min_silence_ms=self.config_mgr.get_int('Audio', 'vad_min_silence_ms', 500),
+            vad_preroll_ms=self.config_mgr.get_int('Audio', 'vad_preroll_ms', 300),
+            vad_max_chunk_seconds=self.config_mgr.get_float('Audio', 'vad_max_chunk_seconds', 8.0),
+            use_native_rate=self.config_mgr.get_bool('Audio', 'use_native_rate', True),
+            device_registry=self.device_registry,
+            stall_timeout_seconds=self.config_mgr.get_float('Audio', 'reconnect_stall_seconds', 2.0),
+            blocksize=self.config_mgr.get_int('Audio', 'stream_blocksize', 0),
+            latency=self.config_mgr.get('Audio', 'stream_latency', ''),
+            status_report_seconds=self.config_mgr.get_float('Audio', 'stream_status_report_seconds', 10.0)
+        )
+
+    def _build_audio_sources(self, device_id, secondary_device_id=None):
+        """録音に使う音声ソースを構成
+
+        Args:
+            device_id: メインデバイスID (Noneの場合はループバック自動検出)
+            secondary_device_id: 同時にキャプチャする追加デバイスID (オプション)
+
+        Returns:
+            Dict[str, Tuple[AudioCapture, int]]: ソース名 → (キャプチャ, デバイスID)
+        """
+        try:
+            # デバイス構成が変わっている場合のみ再分類される
+            self.device_registry.refresh()
+            devices = {d['id']: d for d in self.audio_capture.list_devices()}
+        except Exception:
+            devices = {}
+
+        def source_name(dev_id, used):
+            device = devices.get(dev_id)
+            if device is None or device.get('device_type') == 'system_audio':
+                base = "システム"
+            else:
+                base = "マイク"
+            name = base
+            n = 2
+            while name in used:
+                name = f"{base}{n}"
+                n += 1
+            return name
+
+        sources = {}
+        sources[source_name(device_id, sources)] = (self.audio_capture, device_id)
+        if secondary_device_id is not None and secondary_device_id != device_id:
+            sources[source_name(secondary_device_id, sources)] = (self._create_audio_capture(), secondary_device_id)
+        return sources
+
+    def _get_model_path(self, model_name: str = None):
+        """モデルパスを取得 (スクリプトの場所を基準)
+
+        Args:
+            model_name (str): モデル名 (Noneの場合はライブ表示に使うモデル)
+        """
+        model_name = model_name or self.model_name
 
         # スクリプトファイルの場所を基準にする
         script_dir = Path(__file__).parent.parent  # srcディレクトリの親
@@ -170,12 +345,76 @@ class OfflineVoiceLoggerApp:
         ))
         return True, None
 
+    def _session_language(self) -> str:
+        """文字起こしに使う言語（GUIで選択した言語、GUIなしで動かす場合は設定値）"""
+        if self.window is not None:
+            return self.window.get_selected_language()
+        return self.config_mgr.get('Transcription', 'language', 'ja')
+
+    def _create_transcriber(self, model_path, device: str, compute_type: str, language: str):
+        """設定に基づいてTranscriber (またはProcessTranscriber, InferenceClient) を作成
+
+        ワーカーが1つの場合はスレッド数をCTranslate2の既定に任せる。
+        複数の場合はnum_workers (並行デコード数) = ワーカー数とし、
+        CPUコアをワーカー間で分けてcpu_threads (1デコード内の並列数) を決める。
+        """
+        num_workers = self.transcription_workers
+        cpu_threads = self.config_mgr.get_int('Transcription', 'cpu_threads', 0) or None
+        if num_workers > 1 and cpu_threads is None:
+            cpu_threads = split_cpu_threads(num_workers)
+        if num_workers > 1 or cpu_threads is not None:
+            logger.info(f"文字起こしのスレッド配分: ワーカー{num_workers} × {cpu_threads or '既定'}スレッド")
+
+        if self.transcription_backend == 'process':
+            # 共有メモリのスロットは結合されたチャンクも収まる大きさにする
+            sample_rate = self.audio_capture.sample_rate
+            max_chunk_samples = max(self.audio_capture.max_buffer_samples,
+                                    int(ChunkQueue.MAX_MERGED_SECONDS * sample_rate))
+            return ProcessTranscriber(
+                model_path=str(model_path),
+                device=device,
+                compute_type=compute_type,
+                language=language,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+                batch_size=self.config_mgr.get_int('Transcription', 'batch_size', 4),
+                max_chunk_samples=max_chunk_samples,
+                warmup_seconds=self.config_mgr.get_float('Transcription', 'warmup_seconds', 2.0),
+                warmup_decode_options=self.decode_controller.initial_options()
+            )
+        if self.transcription_backend == 'server':
+            # 常駐する推論サーバーに接続する (同じ設定のサーバーが動いていればロードしない)
+            return InferenceClient(
+                model_path=str(model_path),
+                device=device,
+                compute_type=compute_type,
+                language=language,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+                batch_size=self.config_mgr.get_int('Transcription', 'batch_size', 4),
+                warmup_seconds=self.config_mgr.get_float('Transcription', 'warmup_seconds', 2.0),
+                warmup_decode_options=self.decode_controller.initial_options(),
+                idle_minutes=self.config_mgr.get_float('Transcription', 'server_idle_minutes', 60.0)
+            )
+        return Transcriber(
+            model_path=str(model_path),
+            device=device,
+            compute_type=compute_type,
+            language=language,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+            batch_size=self.config_mgr.get_int('Transcription', 'batch_size', 4),
+            warmup_seconds=self.config_mgr.get_float('Transcription', 'warmup_seconds', 2.0),
+            warmup_decode_options=self.decode_controller.initial_options()
+        )
+
     def _load_transcriber_sync(self):
         """実体のTranscriberを作成し、WhisperModelをロードする（重い処理）"""
         try:
             print("[モデルロード] 本ロード開始")
             model_path = self._get_model_path()
-            language = self.config_mgr.get('Transcription', 'language', 'ja')
+            # ウォームアップも録音と同じ言語でデコードする
+            language = self._session_language()
             print(f"[モデルロード] モデルパス: {model_path}")
             print(f"[モデルロード] 言語: {language}")
 
@@ -193,30 +432,34 @@ class OfflineVoiceLoggerApp:
             compute_type = "float16" if use_cuda else "int8"
             print(f"[モデルロード] デバイス: {device}, compute_type: {compute_type}")
 
-            # Transcriber初期化（cpu_threadsとnum_workersはデフォルトに任せる）
-            self.transcriber = Transcriber(
-                model_path=str(model_path),
-                device=device,
-                compute_type=compute_type,
-                language=language
-            )
-            # モデルロード
-            logger.info("faster-whisperモデルをロード中...")
-            print("[モデルロード] faster-whisperモデルをロード中...")
-            try:
-                self.transcriber.load_model()
-            except Exception as e:
-                # CUDA 失敗時は CPU/int8 にフォールバックして再試行
-                logger.error(f"モデルロードに失敗: {e}. CPU/int8 にフォールバックします。")
-                print("[モデルロード] フォールバック: CPU/int8 で再試行")
-                self.transcriber = Transcriber(
-                    model_path=str(model_path),
-                    device="cpu",
-                    compute_type="int8",
-                    language=language
-                )
-                self.transcriber.load_model()
+            def load():
+                nonlocal device, compute_type
+                # Transcriber初期化（ワーカー数に応じてスレッドを割り当てる）
+                transcriber = self._create_transcriber(model_path, device, compute_type, language)
+                # モデルロード
+                logger.info("faster-whisperモデルをロード中...")
+                print("[モデルロード] faster-whisperモデルをロード中...")
+                try:
+                    transcriber.load_model()
+                except Exception as e:
+                    # CUDA 失敗時は CPU/int8 にフォールバックして再試行
+                    logger.error(f"モデルロードに失敗: {e}. CPU/int8 にフォールバックします。")
+                    print("[モデルロード] フォールバック: CPU/int8 で再試行")
+                    device, compute_type = "cpu", "int8"
+                    transcriber = self._create_transcriber(model_path, device, compute_type, language)
+                    transcriber.load_model()
+                return transcriber
+
+            # 保持中のモデルはロードせずに使う（ワーカープロセスはプロセス数分のメモリを使う、
+            # 推論サーバーのモデルも別プロセスだが同じマシンのメモリを使うため予算に含める）
+            memory_mb = ModelRegistry.estimate_memory_mb(model_path, compute_type, self.model_name)
+            if self.transcription_backend == 'process':
+                memory_mb *= self.transcription_workers
+            pinned = [self._refine_model_key()] if self.refiner is not None else []
+            self.transcriber = self.model_registry.get(self.model_name, load, memory_mb, pinned)
             logger.info("モデルロード完了")
+            if self.refine_enabled:
+                self._load_refiner(device, compute_type, language)
             print("[モデルロード] 本ロード完了")
             return True, None
 
@@ -233,6 +476,109 @@ class OfflineVoiceLoggerApp:
             traceback.print_exc()
             return False, ("初期化エラー", f"モデルのロードに失敗しました:\n{e}")
 
+    def _load_refiner(self, device: str, compute_type: str, language: str):
+        """精緻化用の大きいモデルをロードし、精緻化レーンを起動する
+
+        プレビューのデコードにCPUを残すため、既定ではコアの半分だけを使う。
+        ロードに失敗してもプレビューのみで文字起こしを続ける。
+        """
+        cpu_threads = self.config_mgr.get_int('Transcription', 'refine_cpu_threads', 0) or split_cpu_threads(2)
+        model_path = self._get_model_path(self.refine_model_name)
+
+        def load():
+            print(f"[モデルロード] 精緻化モデル: {model_path}")
+            transcriber = Transcriber(
+                model_path=str(model_path),
+                device=device,
+                compute_type=compute_type,
+                language=language,
+                cpu_threads=cpu_threads,
+                batch_size=self.config_mgr.get_int('Transcription', 'batch_size', 4)
+            )
+            transcriber.load_model()
+            return transcriber
+
+        try:
+            memory_mb = ModelRegistry.estimate_memory_mb(model_path, compute_type, self.refine_model_name)
+            transcriber = self.model_registry.get(self._refine_model_key(), load, memory_mb, [self.model_name])
+        except Exception as e:
+            logger.error(f"精緻化モデルのロードに失敗しました。プレビューのみで続行します: {e}")
+            if self.refiner is not None:
+                self.refiner.close()
+            self.refiner = None
+            self.refine_transcriber = None
+            return
+        if self.refiner is not None and self.refiner.transcriber is transcriber:
+            return
+        if self.refiner is not None:
+            self.refiner.close()
+
+        self.refine_transcriber = transcriber
+        self.refiner = RefinementLane(
+            transcriber,
+            emit=self.result_queue.put,
+            sample_rate=self.audio_capture.sample_rate,
+            window_seconds=self.config_mgr.get_float('Transcription', 'refine_window_seconds', 20.0),
+            busy=lambda: self.is_running and self._pending_chunks() > 0
+        )
+        self.refiner.start()
+        logger.info(f"2段構成: プレビュー={self.model_name}, 精緻化={self.refine_model_name} "
+                    f"({cpu_threads}スレッド)")
+
+    def _refine_model_key(self) -> str:
+        """精緻化モデルのレジストリのキー (スレッド数が異なるためライブ表示用とは別に保持)"""
+        return f"{self.refine_model_name} (精緻化)"
+
+    def switch_model(self, model_name: str):
+        """ライブ表示に使うモデルを切り替える (UIスレッド)
+
+        保持中のモデルは再ロードせずに即座に切り替える。それ以外はロード済みのモデルが
+        ある場合のみ非同期にロードし、未ロードの場合は次の録音開始時にロードする。
+
+        Args:
+            model_name (str): モデル名
+        """
+        if model_name == self.model_name or model_name not in Transcriber.SUPPORTED_MODELS:
+            return
+        if self.is_running or self.draining or self.recovering or self.model_loading:
+            self.window.show_warning("モデル切り替え", "録音中・ロード中・復旧中はモデルを切り替えできません。")
+            self.window.set_selected_model(self.model_name)
+            return
+
+        previous = self.model_name
+        self.model_name = model_name
+        logger.info(f"モデル切り替え: {previous} → {model_name}")
+        if self.model_registry.is_resident(model_name):
+            self.transcriber = self.model_registry.get(model_name, None)
+            self.window.update_model_status(f"{model_name} (ロード完了)", "green")
+        elif self.transcriber is not None:
+            def on_loaded(success, error):
+                if not success:
+                    self._revert_model_switch(previous)
+            self.initialize_transcriber_async(on_loaded, verify_only=False)
+        else:
+            self.window.update_model_status(f"{model_name} (未ロード)", "orange")
+
+    def _revert_model_switch(self, previous: str):
+        """モデルのロードに失敗した場合に、切り替え前のモデルへ戻す (GUIスレッド)
+
+        Args:
+            previous (str): 切り替え前のモデル名
+        """
+        failed = self.model_name
+        # 遅れて届いたロード結果で選択が戻らないよう、ロード世代を進める
+        self._load_seq += 1
+        self.model_name = previous
+        self.window.set_selected_model(previous)
+        # 新しいモデルの領域確保で解放されていた場合は、次の録音開始時にロードする
+        if self.model_registry.is_resident(previous):
+            self.transcriber = self.model_registry.get(previous, None)
+            self.window.update_model_status(f"{previous} (ロード完了)", "green")
+        else:
+            self.transcriber = None
+            self.window.update_model_status(f"{previous} (未ロード)", "orange")
+        logger.warning(f"モデル切り替えに失敗したため元に戻しました: {failed} → {previous}")
+
     def initialize_transcriber_async(self, callback, verify_only: bool = False):
         """文字起こしモジュールの初期化 (非同期 - 別スレッドで実行)
 
@@ -321,7 +667,10 @@ class OfflineVoiceLoggerApp:
             else:
                 # 本ロード完了 → 録音開始準備完了（この後キャプチャ開始）
                 self.window.update_status("録音開始準備完了", "green")
-                self.window.update_model_status(f"{self.model_name} (ロード完了)", "green")
+                model_label = self.model_name
+                if self.refiner is not None:
+                    model_label += f" + {self.refine_model_name}"
+                self.window.update_model_status(f"{model_label} (ロード完了)", "green")
                 print("\n[モデルロード] GUI更新: ロード完了")
             callback(True, None)
         else:
@@ -352,6 +701,9 @@ class OfflineVoiceLoggerApp:
         self.window.stop_recording_signal.connect(self.stop_recording)
         self.window.save_file_signal.connect(self.save_file)
         self.window.reset_text_signal.connect(self.reset_text)
+        self.window.transcribe_file_signal.connect(self.start_file_transcription)
+        self.window.set_selected_model(self.model_name)
+        self.window.model_changed_signal.connect(self.switch_model)
         print("        -> シグナル接続OK")
 
         # デバイスリスト更新
@@ -415,6 +767,13 @@ class OfflineVoiceLoggerApp:
 
     def start_recording(self):
         """録音開始"""
+        if self.draining:
+            logger.warning("停止処理中のため録音を開始できません")
+            return
+        if self.recovering:
+            self.window.show_warning("録音開始", "前回のセッションの復旧中は録音を開始できません。")
+            self._set_recovering(True)
+            return
         try:
             print("\n[録音開始] 処理開始")
             logger.info("録音開始処理")
@@ -491,45 +850,106 @@ class OfflineVoiceLoggerApp:
             except Exception:
                 pass
 
-    def _start_capture(self):
-        """録音キャプチャを開始 (内部メソッド)"""
+    def start_file_transcription(self, file_path: str):
+        """ファイル文字起こし開始
+
+        Args:
+            file_path (str): 音声・動画ファイルのパス
+        """
+        if self.draining:
+            logger.warning("停止処理中のためファイル文字起こしを開始できません")
+            return
+        if self.recovering:
+            self.window.show_warning("ファイル文字起こし", "前回のセッションの復旧中はファイル文字起こしを開始できません。")
+            self._set_recovering(True)
+            return
         try:
-            # デバイスID取得
-            device_id = self.window.get_selected_device_id()
+            logger.info(f"ファイル文字起こし開始処理: {file_path}")
+            self.window.show_loading("準備中...")
 
-            # スレッド開始準備
-            self.is_running = True
-            self.transcription_segments.clear()
-            self.window.clear_transcription_text()
+            if self.transcriber is None:
+                # モデルロード後に開始する（検証中のジョブは世代管理で無効化される）
+                self.pending_file_path = file_path
+                self.window.show_loading("モデルをロード中...")
+                self.initialize_transcriber_async(self._on_file_transcriber_ready, verify_only=False)
+                return
 
-            # 録音開始時刻を記録（実時刻表示用）
-            from datetime import datetime
-            self.recording_start_time = datetime.now()
+            self._start_file_capture(file_path)
 
-            # 累積音声オフセットをリセット
-            self.audio_offset = 0.0
+        except Exception as e:
+            logger.error(f"ファイル文字起こし開始エラー: {e}", exc_info=True)
+            self.window.hide_loading()
+            self.window.show_error("ファイルエラー", f"ファイル文字起こしの開始に失敗しました:\n{e}")
+            self.window.start_button.setEnabled(True)
+            self.window.file_button.setEnabled(True)
 
-            # ワーカースレッドを先に起動
-            self.transcription_thread = threading.Thread(
-                target=self.transcription_worker,
-                daemon=True
-            )
-            self.transcription_thread.start()
-            logger.info("文字起こしスレッド開始")
+    def _on_file_transcriber_ready(self, success, error):
+        """ファイル文字起こし用のモデルロード完了後のコールバック"""
+        file_path, self.pending_file_path = self.pending_file_path, None
+        if success and file_path:
+            self._start_file_capture(file_path)
+        else:
+            try:
+                self.window.hide_loading()
+                self.window.start_button.setEnabled(True)
+                self.window.file_button.setEnabled(True)
+            except Exception:
+                pass
 
-            self.audio_thread = threading.Thread(
-                target=self.audio_worker,
-                daemon=True
+    def _start_file_capture(self, file_path: str):
+        """ファイルを入力ソースとして文字起こしを開始 (内部メソッド)"""
+        # キューが一定の深さに達したらデコードを待つ（メモリを一定に保ちつつ実時間より速く処理）
+        max_depth = self.config_mgr.get_int('Audio', 'file_queue_depth', 4)
+        try:
+            source = FileAudioSource(
+                file_path,
+                backpressure=lambda: self.audio_queue.qsize() >= max_depth,
+                sample_rate=self.config_mgr.get_int('Audio', 'sample_rate', 16000),
+                channels=1,
+                buffer_size_seconds=self.config_mgr.get_int('Audio', 'buffer_size_seconds', 10),
+                chunk_mode=self.config_mgr.get('Audio', 'chunk_mode', 'fixed'),
+                window_seconds=self.config_mgr.get_float('Audio', 'window_seconds', 6.0),
+                hop_seconds=self.config_mgr.get_float('Audio', 'hop_seconds', 4.0),
+                vad_threshold=self.config_mgr.get_float('Audio', 'vad_threshold', 0.5),
+                vad_min_silence_ms=self.config_mgr.get_int('Audio', 'vad_min_silence_ms', 500),
+                vad_preroll_ms=self.config_mgr.get_int('Audio', 'vad_preroll_ms', 300),
+                vad_max_chunk_seconds=self.config_mgr.get_float('Audio', 'vad_max_chunk_seconds', 8.0),
+                device_registry=self.device_registry
             )
-            self.audio_thread.start()
-            logger.info("音声処理スレッド開始")
+        except Exception as e:
+            logger.error(f"ファイルを開けません: {e}")
+            self.window.hide_loading()
+            self.window.show_error("ファイルエラー", str(e))
+            self.window.start_button.setEnabled(True)
+            self.window.file_button.setEnabled(True)
+            return
 
-            # スレッドの起動を待つ
-            time.sleep(0.1)
+        self.file_mode = True
+        self.file_path = Path(file_path)
+        self._start_capture({"ファイル": (source, None)})
+        if self.is_running:
+            # タイムスタンプはファイル先頭からの経過時間で表示
+            self.recording_start_time = None
+            self.file_transcription_start = time.time()
+            self.window.update_status(f"ファイル文字起こし中: {self.file_path.name}", "green")
+            self.window.update_file_progress(0)
 
-            # 音声キャプチャ開始 (これ以降コールバックが呼ばれる)
-            self.audio_capture.start_capture(device_id)
-            logger.info("音声キャプチャ開始")
+    def _start_capture(self, sources=None):
+        """録音キャプチャを開始 (内部メソッド)
+
+        Args:
+            sources: ソース名 → (キャプチャ, デバイスID)。Noneの場合は選択中のデバイスから構成
+        """
+        try:
+            if sources is None:
+                # デバイスID取得（追加デバイスがあれば同時キャプチャ）
+                self.file_mode = False
+                device_id = self.window.get_selected_device_id()
+                secondary_device_id = self.window.get_selected_secondary_device_id()
+                sources = self._build_audio_sources(device_id, secondary_device_id)
+
+            self.window.clear_transcription_text()
+            self.start_pipeline(sources)
 
             # タイマー開始
             self.audio_level_timer.start(100)  # 100ms
@@ -573,59 +993,508 @@ class OfflineVoiceLoggerApp:
             except Exception:
                 pass
 
+    def start_pipeline(self, sources):
+        """ワーカースレッドと音声ソースを起動する (GUIに依存しない部分)
+
+        Args:
+            sources: ソース名 → (キャプチャ, デバイスID)
+
+        Raises:
+            DeviceNotFoundError, AudioCaptureError: キャプチャ開始に失敗した場合
+        """
+        # スレッド開始準備
+        self.is_running = True
+        self.transcription_segments.clear()
+        self.refined_ranges = {}
+
+        # 録音開始時刻を記録（実時刻表示用）
+        from datetime import datetime
+        self.recording_start_time = datetime.now()
+
+        # ソースごとの累積音声オフセットと統合状態をリセット
+        self.audio_sources = {name: capture for name, (capture, _) in sources.items()}
+        self.source_offsets = {name: 0.0 for name in sources}
+        self.segment_stitchers = {
+            name: SegmentStitcher(capture.min_buffer_samples / capture.sample_rate,
+                                  capture.hop_samples / capture.sample_rate)
+            for name, capture in self.audio_sources.items()
+        }
+        self.silence_gate.reset_stats()
+        self.audio_queue.clear()
+        self.audio_queue.reset_metrics()
+        self.chunks_queued = 0
+        self.chunks_done = 0
+        self.first_chunk_reported = False
+        self.file_input_done = False
+        self.result_sequencer.reset()
+        if self.refiner is not None:
+            self.refiner.reset()
+        if self.streaming_enabled:
+            self.streaming_processors = {
+                name: StreamingProcessor(
+                    sample_rate=capture.sample_rate,
+                    max_buffer_seconds=self.config_mgr.get_float('Transcription', 'streaming_max_buffer_seconds', 15.0)
+                )
+                for name, capture in self.audio_sources.items()
+            }
+        self._open_journals()
+        self._open_archivers()
+
+        # ワーカースレッドを先に起動
+        self.transcription_threads = []
+        # ストリーミングはソースごとに順に再デコードするため1スレッドで処理する
+        thread_count = 1 if self.streaming_enabled else self.transcription_workers
+        # ファイル入力は下流に合わせて読むため遅れても欠落しない (常に最高品質)
+        self.decode_controller.reset()
+        self.decode_controller.enabled = self.adaptive_decoding and not self.file_mode
+        self.decode_controller.parallelism = thread_count
+        for _ in range(thread_count):
+            thread = threading.Thread(
+                target=self.transcription_worker,
+                daemon=True
+            )
+            thread.start()
+            self.transcription_threads.append(thread)
+        logger.info(f"文字起こしスレッド開始 ({thread_count}個)")
+
+        self.audio_thread = threading.Thread(
+            target=self.audio_worker,
+            daemon=True
+        )
+        self.audio_thread.start()
+        logger.info("音声処理スレッド開始")
+
+        # スレッドの起動を待つ
+        time.sleep(0.1)
+
+        # 音声キャプチャ開始 (これ以降コールバックが呼ばれる)
+        # ソースごとに独立したストリームを開く（ミックスダウンしない）
+        try:
+            for name, (capture, source_device_id) in sources.items():
+                capture.start_capture(source_device_id)
+                logger.info(f"音声キャプチャ開始: ソース={name}")
+        except Exception:
+            for capture in self.audio_sources.values():
+                capture.stop_capture()
+            self._close_journals()
+            self._close_archivers()
+            raise
+
+    def stop_input(self):
+        """音声ソースを止め、バッファに残った音声もキューへ投入する (GUIに依存しない部分)
+
+        文字起こしワーカーは止めず、キューに残ったチャンクの文字起こしを続ける。
+        finish_pipeline()でワーカーを止めて停止を完了する。
+        """
+        self.draining = True
+        self.is_running = False
+
+        # 音声キャプチャ停止（全ソース）
+        for capture in self.audio_sources.values():
+            capture.stop_capture()
+        if self.audio_thread and self.audio_thread.is_alive():
+            self.audio_thread.join(timeout=2)
+
+        # 窓長に満たない最後の音声も文字起こしする
+        for source, capture in self.audio_sources.items():
+            while True:
+                chunk = capture.acquire_chunk() or capture.acquire_final_chunk()
+                if chunk is None:
+                    break
+                self._enqueue_chunk(source, capture, chunk)
+
+        # 残りの音声をエンコードしてアーカイブを閉じる
+        self._close_archivers()
+
+        # デバイス再接続などのタイムラインイベントを報告
+        for name, capture in self.audio_sources.items():
+            for event in capture.timeline_events:
+                kind = "再接続" if event['type'] == 'device_reconnected' else "再スキャンで開き直し"
+                logger.info(f"タイムラインイベント ({name}): {event['time']} {event['device_name']} "
+                            f"{kind}, 欠落{event['gap_seconds']:.2f}秒")
+
+        pending = self._pending_chunks()
+        if pending > 0:
+            logger.info(f"入力を停止しました。キューに残った{pending}チャンクを文字起こしします")
+
+    def wait_drained(self, timeout: float = None) -> bool:
+        """キューに残ったチャンクの文字起こしが終わるのを待つ
+
+        Args:
+            timeout (float): 最大待ち時間 (秒、Noneの場合は無制限)
+
+        Returns:
+            bool: すべて終わった場合True
+        """
+        start = time.monotonic()
+        last_report = start
+        while self._pending_chunks() > 0:
+            now = time.monotonic()
+            if timeout is not None and now - start > timeout:
+                return False
+            if now - last_report >= 5.0:
+                last_report = now
+                logger.info(f"停止待ち: 残り{self._pending_chunks()}チャンク")
+            time.sleep(0.1)
+        return True
+
+    def stop_pipeline(self, drain_timeout: float = None):
+        """音声ソースを止め、キューに残ったチャンクを文字起こししてから停止する (GUIに依存しない部分)
+
+        Args:
+            drain_timeout (float): 残りの文字起こしを待つ最大時間 (秒、Noneの場合は無制限)
+        """
+        if self.is_running:
+            self.stop_input()
+        self.wait_drained(drain_timeout)
+        self.finish_pipeline()
+
+    def finish_pipeline(self):
+        """文字起こしワーカーを止め、統計を報告する (GUIに依存しない部分)
+
+        文字起こしを打ち切って未処理のチャンクが残る場合は、その音声を次回起動時に
+        復旧できるよう、ジャーナルを正常終了にせず残す。
+        """
+        pending = self._pending_chunks()
+        self.draining = False
+        self.is_running = False
+
+        # スレッド終了待機
+        for thread in self.transcription_threads:
+            if thread.is_alive():
+                thread.join(timeout=2)
+
+        # 正常終了したセッションのジャーナルは不要なので削除
+        if pending > 0:
+            logger.warning(f"文字起こしを打ち切りました: 未処理{pending}チャンク"
+                           + ("（音声ジャーナルは次回起動時に復旧できるよう残します）" if self.journals else ""))
+        self._close_journals(finished=pending == 0)
+
+        # ストリーミングの未確定部分を確定して結果に加える
+        for name, processor in self.streaming_processors.items():
+            segments = processor.finish()
+            for segment in segments:
+                segment['source'] = name
+            if segments:
+                self.result_queue.put({"segments": segments, "language": None, "duration": 0.0})
+            stats = processor.get_stats()
+            logger.info(f"ストリーミングの統計 ({name}): デコード{stats['decode_count']}回, "
+                        f"{stats['decoded_seconds']:.1f}秒 / 入力{stats['received_seconds']:.1f}秒 "
+                        f"(再デコード{stats['redecode_factor']:.1f}倍)")
+        # 残りの音声も精緻化に回す (録音停止後もバックグラウンドで続ける)
+        if self.refiner is not None:
+            self.refiner.flush()
+            stats = self.refiner.get_stats()
+            logger.info(f"精緻化の統計: {stats['refined_windows']}窓 ({stats['refined_seconds']:.1f}秒), "
+                        f"デコード時間{stats['decode_time']:.1f}秒, 残り{stats['backlog_seconds']:.1f}秒")
+        if self.decode_controller.enabled:
+            stats = self.decode_controller.get_stats()
+            seconds = ", ".join(f"{name} {value:.1f}秒" for name, value in stats['seconds_by_level'].items())
+            logger.info(f"デコード設定の統計: 切り替え{stats['changes']}回, 最終{stats['level']}, {seconds}")
+        if self.transcription_workers > 1:
+            logger.info(f"文字起こしワーカーの統計: {self.transcription_workers}個, "
+                        f"並べ替え待ちの最大{self.result_sequencer.max_pending}件")
+
+        # 音声キューのメトリクスを報告し、スプールファイルを削除
+        metrics = self.audio_queue.get_metrics()
+        logger.info(
+            f"音声キューの統計: 残り{metrics['depth']}チャンク, 最大深さ{metrics['max_depth']}, "
+            f"破棄{metrics['dropped_chunks']}チャンク ({metrics['dropped_seconds']:.1f}秒), "
+            f"結合{metrics['merged_chunks']}回, "
+            f"退避{metrics['spilled_chunks']}チャンク ({metrics['spilled_seconds']:.1f}秒, "
+            f"{metrics['spilled_bytes'] / 1024 / 1024:.1f}MB), "
+            f"最大追いつき時間{metrics['max_catch_up_seconds']:.1f}秒"
+        )
+        self.audio_queue.close()
+
+        # 無音ゲートで節約したデコード時間を報告
+        if self.silence_gate_enabled:
+            stats = self.silence_gate.get_stats()
+            logger.info(
+                f"無音ゲートの統計: 読み飛ばし{stats['skipped_chunks']}チャンク "
+                f"({stats['skipped_seconds']:.1f}秒), 通過{stats['passed_chunks']}チャンク, "
+                f"推定節約デコード時間{stats['saved_decode_time']:.1f}秒"
+            )
+
+        # 重なり窓の追加コストを報告
+        if self.audio_capture.chunk_mode == "sliding":
+            for name, stitcher in self.segment_stitchers.items():
+                stats = stitcher.get_stats()
+                logger.info(
+                    f"重なり窓の統計 ({name}): デコード{stats['decoded_seconds']:.1f}秒 / "
+                    f"タイムライン{stats['timeline_seconds']:.1f}秒 "
+                    f"(追加コスト{stats['overhead_ratio']:.0%}, "
+                    f"推定{stats['overhead_decode_time']:.1f}秒), "
+                    f"除外セグメント{stats['dropped_segments']}個"
+                )
+
     def stop_recording(self):
-        """録音停止"""
+        """録音停止
+
+        文字起こしが遅れてキューにチャンクが残っている場合は、入力だけを止めて残りの
+        文字起こしを続け、終わってから停止を完了する (進捗はステータスに表示)。
+        その間にもう一度停止を押すと、残りを打ち切って停止する。
+        """
         try:
-            logger.info("録音停止処理")
+            if self.draining and not self.is_running:
+                logger.info("残りの文字起こしを打ち切って停止します")
+                self._complete_stop()
+                return
 
-            # タイマー停止
+            logger.info("録音停止処理")
             if self.audio_level_timer:
                 self.audio_level_timer.stop()
-            if self.transcription_check_timer:
-                self.transcription_check_timer.stop()
 
-            # スレッド停止
-            self.is_running = False
+            self.stop_input()
+            if self._pending_chunks() > 0:
+                # 結果の反映は続け、完了は_sync_ui_stateで確認する
+                self._update_drain_progress()
+                return
+            self._complete_stop()
 
-            # 音声キャプチャ停止
-            self.audio_capture.stop_capture()
+        except Exception as e:
+            logger.error(f"録音停止エラー: {e}")
+            self.window.show_error("停止エラー", f"録音の停止に失敗しました:\n{e}")
 
-            # スレッド終了待機
-            if self.audio_thread and self.audio_thread.is_alive():
-                self.audio_thread.join(timeout=2)
-            if self.transcription_thread and self.transcription_thread.is_alive():
-                self.transcription_thread.join(timeout=2)
+    def _update_drain_progress(self):
+        """停止後の残りの文字起こしの進捗を表示し、終わったら停止を完了する (UIスレッド)"""
+        pending = self._pending_chunks()
+        if pending <= 0:
+            self._complete_stop()
+            return
+        self.window.update_status(f"停止処理中: 残り{pending}チャンクを文字起こし中...（停止で打ち切り）", "orange")
+        self.window.start_button.setEnabled(False)
+        self.window.file_button.setEnabled(False)
+        self.window.stop_button.setEnabled(True)
+
+    def _complete_stop(self):
+        """文字起こしワーカーを止めて停止を完了する (UIスレッド)"""
+        if self.transcription_check_timer:
+            self.transcription_check_timer.stop()
+        self.finish_pipeline()
+        # 停止時に確定した結果を反映し、認識途中の表示を消す
+        self.check_transcription_results()
+        self.window.update_live_text([])
+
+        self.window.hide_file_progress()
+        self.window.start_button.setEnabled(True)
+        self.window.file_button.setEnabled(True)
+        self.window.stop_button.setEnabled(False)
+        self.window.is_recording = False
+        self.window.update_status("停止", "orange")
+        logger.info("録音停止完了")
+
+    def _open_journals(self):
+        """ソースごとに音声ジャーナルを開き、リングバッファのタップとして登録"""
+        self.journals = {}
+        if not self.journal_enabled or self.file_mode:
+            return
+        session_id = self.recording_start_time.strftime("%Y%m%d_%H%M%S")
+        for index, (name, capture) in enumerate(self.audio_sources.items()):
+            try:
+                journal = AudioJournal(
+                    sample_rate=capture.sample_rate,
+                    sample_format=self.config_mgr.get('Storage', 'journal_sample_format', 'int16'),
+                    segment_seconds=self.config_mgr.get_int('Storage', 'journal_segment_minutes', 5) * 60,
+                    session_id=f"{session_id}_{index}"
+                )
+            except Exception as e:
+                # ジャーナルは補助機能のため、失敗しても録音は続ける
+                logger.error(f"音声ジャーナルの作成に失敗 ({name}): {e}")
+                continue
+            capture.audio_buffer.add_tap(journal)
+            self.journals[name] = journal
 
-            self.window.update_status("停止", "orange")
-            logger.info("録音停止完了")
+    def _close_journals(self, finished: bool = True):
+        """タップを解除してジャーナルを正常終了・削除
 
+        Args:
+            finished (bool): Falseの場合は未完了のまま残す (次回起動時に復旧対象になる)
+        """
+        for name, journal in self.journals.items():
+            capture = self.audio_sources.get(name)
+            if capture is not None:
+                capture.audio_buffer.remove_tap(journal)
+            journal.close(delete=finished, finished=finished)
+        self.journals = {}
+
+    def _open_archivers(self):
+        """ソースごとに音声アーカイブを開始し、リングバッファのタップとして登録"""
+        self.archivers = {}
+        if not self.audio_archive_enabled or self.file_mode:
+            return
+        save_dir = self.window.get_save_directory() if self.window is not None else None
+        if save_dir:
+            self.file_manager.base_directory = Path(save_dir)
+        session_id = self.recording_start_time.strftime("%Y%m%d_%H%M%S")
+        for index, (name, capture) in enumerate(self.audio_sources.items()):
+            suffix = f"_{index}" if len(self.audio_sources) > 1 else ""
+            try:
+                archiver = AudioArchiver(
+                    self.file_manager.base_directory / f"audio_{session_id}{suffix}",
+                    sample_rate=capture.sample_rate,
+                    audio_format=self.config_mgr.get('Files', 'audio_archive_format', 'opus'),
+                    bitrate=self.config_mgr.get_int('Files', 'audio_archive_bitrate', 32000),
+                    segment_seconds=self.config_mgr.get_float('Files', 'audio_archive_segment_seconds', 60.0)
+                )
+            except Exception as e:
+                logger.error(f"音声アーカイブの作成に失敗 ({name}): {e}")
+                continue
+            capture.audio_buffer.add_tap(archiver.tap)
+            archiver.start()
+            self.archivers[name] = archiver
+
+    def _close_archivers(self):
+        """タップを解除してアーカイブを閉じる"""
+        for name, archiver in self.archivers.items():
+            capture = self.audio_sources.get(name)
+            if capture is not None:
+                capture.audio_buffer.remove_tap(archiver.tap)
+            archiver.stop()
+        self.archivers = {}
+
+    def _check_unfinished_journals(self):
+        """前回異常終了したセッションのジャーナルを確認し、文字起こしし直すか尋ねる"""
+        try:
+            sessions = find_unfinished_sessions()
         except Exception as e:
-            logger.error(f"録音停止エラー: {e}")
-            self.window.show_error("停止エラー", f"録音の停止に失敗しました:\n{e}")
+            logger.error(f"ジャーナル確認エラー: {e}")
+            return
+        if not sessions:
+            return
+
+        logger.info(f"異常終了したセッションのジャーナル: {len(sessions)}件")
+        if not self.window.ask_question(
+            "前回のセッションの復旧",
+            f"前回のセッションが正常に終了しませんでした（{len(sessions)}件）。\n"
+            "音声ジャーナルから文字起こしし直しますか？\n\n"
+            "「いいえ」を選ぶとジャーナルは削除されます。"
+        ):
+            for paths in sessions.values():
+                try:
+                    JournalReader(paths).delete()
+                except Exception as e:
+                    logger.warning(f"ジャーナル削除エラー: {e}")
+            return
+
+        # モデルのロード中から録音の開始を止める
+        self._set_recovering(True)
+
+        def _on_ready(success, error):
+            if success:
+                self._start_journal_recovery(sessions)
+            else:
+                self._set_recovering(False)
+
+        if self.transcriber is None:
+            self.initialize_transcriber_async(_on_ready, verify_only=False)
+        else:
+            self._start_journal_recovery(sessions)
+
+    def _set_recovering(self, recovering: bool):
+        """ジャーナルからの復旧中は録音・ファイル文字起こしを開始できないようにする (UIスレッド)
+
+        復旧は録音と同じ文字起こしモデルを使うため、同時に動かすとデコードを奪い合う。
+        """
+        self.recovering = recovering
+        self.window.start_button.setEnabled(not recovering)
+        self.window.file_button.setEnabled(not recovering)
+
+    def _start_journal_recovery(self, sessions):
+        """ジャーナルの文字起こしをバックグラウンドで開始"""
+        self._set_recovering(True)
+        self.window.update_status("ジャーナルから復旧中...", "blue")
+        self.recovery_thread = threading.Thread(
+            target=self.journal_recovery_worker, args=(sessions,), daemon=True
+        )
+        self.recovery_thread.start()
+
+    def journal_recovery_worker(self, sessions):
+        """ジャーナルを窓長ごとに読み戻して文字起こしし、テキストファイルに保存する (別スレッド)
+
+        一度に読み込むのは1窓分のみで、録音全体をメモリに載せない。
+
+        Args:
+            sessions (Dict[str, List[Path]]): セッションID → セグメントファイル
+        """
+        sample_rate = self.audio_capture.sample_rate
+        window_samples = self.audio_capture.min_buffer_samples
+        language = self.config_mgr.get('Transcription', 'language', 'ja')
+        saved_files = []
+        # 録音セッションの無音ゲートの統計に混ざらないよう、復旧用のゲートを使う
+        silence_gate = SilenceGate(sample_rate=sample_rate, rms_threshold=self.silence_gate.rms_threshold)
+
+        for session_id, paths in sessions.items():
+            try:
+                reader = JournalReader(paths)
+                logger.info(f"ジャーナル復旧開始: {session_id} ({reader.duration:.1f}秒)")
+                resampler = None
+                if reader.sample_rate != sample_rate:
+                    resampler = StreamingResampler(reader.sample_rate, sample_rate)
+                # ジャーナルのサンプル数換算で窓長分ずつ読む
+                block_samples = max(1, window_samples * reader.sample_rate // sample_rate)
+
+                segments = []
+                offset = 0.0
+                processed = 0
+                for block in reader.iter_blocks(block_samples):
+                    processed += len(block)
+                    audio = resampler.process(block) if resampler is not None else block
+                    duration = len(audio) / sample_rate
+                    if len(audio) > 0 and not (self.silence_gate_enabled and silence_gate.is_silent(audio)):
+                        result = (self.refine_transcriber or self.transcriber).transcribe(audio, language)
+                        for segment in result['segments']:
+                            segment['start'] += offset
+                            segment['end'] += offset
+                            segments.append(segment)
+                    offset += duration
+
+                    progress = processed / reader.total_samples * 100 if reader.total_samples else 100.0
+                    QTimer.singleShot(0, lambda p=progress: self.window.update_status(
+                        f"ジャーナルから復旧中... {p:.0f}%", "blue"))
+
+                filepath = self.file_manager.base_directory / f"transcript_recovered_{session_id}.txt"
+                if self.file_manager.save_as_text(segments, str(filepath)):
+                    saved_files.append(str(filepath))
+                    reader.delete()
+                    logger.info(f"ジャーナル復旧完了: {filepath} ({len(segments)}セグメント)")
+                else:
+                    reader.close()
+
+            except Exception as e:
+                logger.error(f"ジャーナル復旧エラー ({session_id}): {e}", exc_info=True)
+
+        def _on_finished():
+            self._set_recovering(False)
+            self.window.update_status("待機中", "")
+            if saved_files:
+                self.window.show_info("復旧完了", "前回のセッションを文字起こししました:\n" + "\n".join(saved_files))
+        QTimer.singleShot(0, _on_finished)
 
     def audio_worker(self):
-        """音声処理ワーカー (別スレッド)"""
+        """音声処理ワーカー (別スレッド)
+
+        全ソースを順番にポーリングし、チャンクをソース名付きで共有キューへ投入する。
+        キューが文字起こしのスケジューラを兼ね、ソース間で交互に処理される。
+        """
         logger.info("音声処理スレッド開始")
 
         while self.is_running:
             try:
-                # バッファが満杯になったら取得
-                audio_buffer = self.audio_capture.get_audio_buffer()
+                finished_sources = 0
+                for source, capture in list(self.audio_sources.items()):
+                    # バッファが満杯になったら取得（プールバッファ、コピーは1回のみ）
+                    chunk = capture.acquire_chunk()
+                    if chunk is None:
+                        # ファイル・リプレイ入力は最後まで読み終えたら完了
+                        if getattr(capture, 'is_finished', False):
+                            finished_sources += 1
+                        continue
 
-                if audio_buffer is not None:
-                    # 現在のオフセットを保存
-                    current_offset = self.audio_offset
+                    self._enqueue_chunk(source, capture, chunk)
 
-                    # オフセットを更新（このバッファの長さ分進める）
-                    buffer_duration = len(audio_buffer) / self.audio_capture.sample_rate
-                    self.audio_offset += buffer_duration
-
-                    # キューに追加（音声データとオフセットのタプル）
-                    try:
-                        self.audio_queue.put((audio_buffer, current_offset), timeout=1)
-                        logger.debug(f"音声バッファをキューに追加: {len(audio_buffer)}サンプル, オフセット={current_offset:.2f}秒")
-                    except queue.Full:
-                        logger.warning("音声キューが満杯です")
+                if finished_sources == len(self.audio_sources):
+                    self.file_input_done = True
 
                 time.sleep(0.1)
 
@@ -634,45 +1503,64 @@ class OfflineVoiceLoggerApp:
 
         logger.info("音声処理スレッド終了")
 
+    def _enqueue_chunk(self, source: str, capture, chunk):
+        """チャンクにオフセットを付けてキューへ投入する (無音チャンクはオフセットのみ進める)
+
+        Args:
+            source (str): ソース名
+            capture (AudioCapture): チャンクを取り出したキャプチャ
+            chunk (AudioChunk): 音声チャンク
+        """
+        # チャンクの開始オフセット（直前に読み飛ばした無音の分を加える）
+        sample_rate = capture.sample_rate
+        current_offset = self.source_offsets[source] + chunk.lead / sample_rate
+
+        # オフセットを更新（読み飛ばし分とチャンクの進み幅分進める。slidingモードでは窓長より短い）
+        self.source_offsets[source] = current_offset + chunk.hop / sample_rate
+
+        # 無音チャンクはモデルに渡さない（オフセットのみ進める）
+        if self.silence_gate_enabled and self.silence_gate.is_silent(chunk.data):
+            chunk.release()
+            logger.debug(f"無音チャンクをスキップ: ソース={source}, オフセット={current_offset:.2f}秒")
+            return
+
+        # キューに追加（音声チャンク・オフセット・ソース名のタプル）
+        # 満杯時はキューのポリシー（破棄・結合・ディスク退避）に従う
+        self.audio_queue.put((chunk, current_offset, source))
+        self.chunks_queued += 1
+        logger.debug(f"音声チャンクをキューに追加: ソース={source}, {len(chunk)}サンプル, "
+                     f"オフセット={current_offset:.2f}秒, キュー深さ={self.audio_queue.qsize()}")
+
     def transcription_worker(self):
-        """文字起こしワーカー (別スレッド)"""
+        """文字起こしワーカー (別スレッド、worker_threads個が1つのモデルを共有)
+
+        キューに複数のチャンクが溜まっている場合は最大batch_size個をまとめて取り出し、
+        1回のバッチ推論でデコードする (停止後の追いつきを速くする)。
+        """
         print("[文字起こしスレッド] 開始")
         logger.info("文字起こしスレッド開始")
 
-        while self.is_running:
+        # 入力の停止後もキューに残ったチャンクを処理する
+        while self.is_running or self.draining:
             try:
-                # キューから音声データとオフセットを取得
-                try:
-                    audio_data, offset = self.audio_queue.get(timeout=1)
-                except queue.Empty:
-                    continue
-
-                print(f"[文字起こしスレッド] 音声データ受信 (オフセット={offset:.2f}秒) - 処理開始")
-                logger.info(f"文字起こし処理開始 (オフセット={offset:.2f}秒)...")
-
-                # transcriberがNoneでないことを確認
-                if self.transcriber is None:
-                    print("[文字起こしスレッド] エラー: transcriberが初期化されていません")
-                    logger.error("transcriber is None")
-                    continue
-
-                # 言語取得
-                language = self.window.get_selected_language()
-                print(f"[文字起こしスレッド] 言語: {language}")
-
-                # 文字起こし実行
-                result = self.transcriber.transcribe(audio_data, language)
-                print(f"[文字起こしスレッド] 文字起こし完了")
-
-                # セグメントのタイムスタンプにオフセットを追加
-                for segment in result['segments']:
-                    segment['start'] += offset
-                    segment['end'] += offset
-
-                # 結果をキューに追加
-                self.result_queue.put(result)
+                # キューから音声チャンク・オフセット・ソース名を取得（溜まっていればまとめて）
+                # 複数ワーカーの場合も取り出し順に連番を振る
+                batch_size = self.transcriber.batch_size if self.transcriber is not None else 1
+                with self._dequeue_lock:
+                    try:
+                        items = self.audio_queue.get_batch(batch_size, timeout=1)
+                    except queue.Empty:
+                        continue
+                    sequence = self.result_sequencer.issue()
 
-                logger.info(f"文字起こし完了: {len(result['segments'])}セグメント")
+                outputs = None
+                try:
+                    outputs = self._transcribe_items(items)
+                finally:
+                    # 並行に処理した結果を取り出し順に戻してから結果キューへ
+                    self.result_sequencer.complete(sequence, outputs, self._emit_results)
+                    with self._count_lock:
+                        self.chunks_done += len(items)
 
             except Exception as e:
                 print(f"[文字起こしスレッド] エラー: {e}")
@@ -683,15 +1571,271 @@ class OfflineVoiceLoggerApp:
         print("[文字起こしスレッド] 終了")
         logger.info("文字起こしスレッド終了")
 
+    def _transcribe_items(self, items):
+        """キューから取り出したチャンクを文字起こしする (複数ワーカーから並行に呼ばれる)
+
+        Args:
+            items: (chunk, offset, source) のタプルのリスト
+
+        Returns:
+            list: (ソース, オフセット, 結果, 窓長, 進み幅, デコード時間, 精緻化用の音声) のリスト
+                  (transcriberが未初期化の場合はNone)
+        """
+        for _, offset, source in items:
+            print(f"[文字起こしスレッド] 音声データ受信 (ソース={source}, オフセット={offset:.2f}秒) - 処理開始")
+            logger.info(f"文字起こし処理開始 (ソース={source}, オフセット={offset:.2f}秒)...")
+
+        # チャンクは処理後に必ずプールへ返却する
+        try:
+            # transcriberがNoneでないことを確認
+            if self.transcriber is None:
+                print("[文字起こしスレッド] エラー: transcriberが初期化されていません")
+                logger.error("transcriber is None")
+                return None
+
+            language = self._session_language()
+            print(f"[文字起こしスレッド] 言語: {language}")
+
+            # デコード設定（切り替わった場合は適用したチャンクと合わせて記録）
+            level, decode_options, change = self.decode_controller.select()
+            if change:
+                _, first_offset, first_source = items[0]
+                logger.info(f"デコード設定 {change} を適用: ソース={first_source}, "
+                            f"オフセット={first_offset:.2f}秒のチャンクから")
+
+            if self.streaming_enabled:
+                return self._transcribe_streaming(items, language, level, decode_options)
+
+            # 文字起こし実行（読み取り専用ビューをそのまま渡す）
+            decode_start = time.time()
+            if len(items) == 1:
+                results = [self.transcriber.transcribe(items[0][0].data, language, decode_options)]
+            else:
+                results = self.transcriber.transcribe_batch([chunk.data for chunk, _, _ in items], language,
+                                                            decode_options)
+            decode_time = time.time() - decode_start
+            print(f"[文字起こしスレッド] 文字起こし完了 ({len(items)}チャンク)")
+            self._report_first_chunk(items, decode_time)
+
+            # バッチのデコード時間は音声長で按分する
+            total_samples = sum(len(chunk) for chunk, _, _ in items) or 1
+            windows = []
+            for chunk, offset, source in items:
+                sample_rate = self.audio_sources[source].sample_rate
+                chunk_decode_time = decode_time * len(chunk) / total_samples
+                # 精緻化レーンへ渡す音声はプールへ返却する前にコピーする
+                refine_audio = [(np.array(chunk.data), offset, chunk.hop)] if self.refiner is not None else []
+                windows.append((len(chunk) / sample_rate, chunk.hop / sample_rate, chunk_decode_time, refine_audio))
+                self.silence_gate.record_decode(len(chunk) / sample_rate, chunk_decode_time)
+            self.decode_controller.record(level, sum(window[0] for window in windows), decode_time,
+                                          self.audio_queue.qsize())
+        finally:
+            for chunk, _, _ in items:
+                chunk.release()
+
+        return [
+            (source, offset, result, window_duration, hop_duration, chunk_decode_time, refine_audio)
+            for (_, offset, source), result, (window_duration, hop_duration, chunk_decode_time, refine_audio)
+            in zip(items, results, windows)
+        ]
+
+    def _report_first_chunk(self, items, decode_time: float):
+        """録音で最初のデコード時間を、ウォームアップの計測値と合わせて報告する"""
+        with self._count_lock:
+            if self.first_chunk_reported:
+                return
+            self.first_chunk_reported = True
+        audio_seconds = sum(len(chunk) / self.audio_sources[source].sample_rate for chunk, _, source in items)
+        message = f"最初のチャンクのデコード: {decode_time:.2f}秒 ({audio_seconds:.1f}秒の音声)"
+        stats = getattr(self.transcriber, 'warmup_stats', None)
+        if stats and stats['cold_seconds'] is not None:
+            message += f", ウォームアップ{stats['seconds']:.2f}秒 (初回{stats['cold_seconds']:.2f}秒"
+            if stats['warm_seconds'] is not None:
+                message += f" → {stats['warm_seconds']:.2f}秒"
+            message += ")"
+            # 最初のデコードが実行中のウォームアップを待った・並行した時間 (デコード時間に含まれる)
+            if stats.get('wait_seconds'):
+                message += f", うちウォームアップの終了待ち{stats['wait_seconds']:.2f}秒"
+            elif stats.get('overlap_seconds'):
+                message += f", ウォームアップと並行{stats['overlap_seconds']:.2f}秒"
+        logger.info(message)
+
+    def _transcribe_streaming(self, items, language, level, decode_options):
+        """ストリーミングモードでチャンクを追加し、ソースごとにバッファを再デコードする
+
+        溜まっていた複数のチャンクはまとめて追加してから1回だけデコードする。
+        セグメントの時刻は絶対時刻のため、オフセットは0として返す。
+
+        Args:
+            items: (chunk, offset, source) のタプルのリスト
+            language (str): 言語
+            level (int): デコードの段階 (DecodeController)
+            decode_options (Dict): デコードパラメータの上書き
+
+        Returns:
+            list: _transcribe_itemsと同じ形式
+        """
+        segments_by_source = {}
+        refine_audio = {}
+        for chunk, offset, source in items:
+            segments_by_source.setdefault(source, []).extend(
+                self.streaming_processors[source].insert_audio(chunk.data, offset)
+            )
+            if self.refiner is not None:
+                refine_audio.setdefault(source, []).append((np.array(chunk.data), offset, chunk.hop))
+
+        outputs = []
+        for source, segments in segments_by_source.items():
+            decode_start = time.time()
+            segments = segments + self.streaming_processors[source].process(self.transcriber, language,
+                                                                            decode_options)
+            decode_time = time.time() - decode_start
+            duration = sum(len(chunk) for chunk, _, s in items if s == source) / self.audio_sources[source].sample_rate
+            self.silence_gate.record_decode(duration, decode_time)
+            self._report_first_chunk(items, decode_time)
+            # 新たに届いた音声に対する再デコード時間で追いついているかを判断する
+            self.decode_controller.record(level, duration, decode_time, self.audio_queue.qsize())
+            result = {"segments": segments, "language": language, "duration": duration}
+            outputs.append((source, 0.0, result, duration, duration, decode_time, refine_audio.get(source, [])))
+        return outputs
+
+    def _emit_results(self, outputs):
+        """文字起こし結果をオフセット順に統合して結果キューへ入れる (連番順に1スレッドずつ呼ばれる)
+
+        Args:
+            outputs: _transcribe_itemsの戻り値
+        """
+        for source, offset, result, window_duration, hop_duration, chunk_decode_time, refine_audio in outputs:
+            # セグメントのタイムスタンプにオフセットを追加し、ソース名を付与
+            for segment in result['segments']:
+                segment['start'] += offset
+                segment['end'] += offset
+                segment['source'] = source
+
+            # 重なり窓のセグメントを時刻で統合（ソースごと）
+            if self.audio_capture.chunk_mode == "sliding":
+                result['segments'] = self.segment_stitchers[source].stitch(
+                    result['segments'], offset, window_duration, hop_duration, chunk_decode_time
+                )
+
+            # 結果をキューに追加
+            self.result_queue.put(result)
+
+            # プレビューを送出してから精緻化に回す (置き換えが必ずプレビューの後になる)
+            if refine_audio and self.refiner is not None:
+                self.refiner.add(source, refine_audio, result.get('language'))
+
+            logger.info(f"文字起こし完了: {len(result['segments'])}セグメント")
+
     def update_audio_level(self):
         """音声レベル更新 (UIスレッド)"""
         if self.is_running:
-            level = self.audio_capture.get_audio_level()
+            # 複数ソースの場合は最大レベルを表示
+            level = max((capture.get_audio_level() for capture in self.audio_sources.values()), default=0.0)
             self.window.update_audio_level(level)
 
+            if self.file_mode:
+                self._update_file_progress()
+                return
+
+            # デバイス再接続中はステータスに表示
+            reconnecting = [name for name, capture in self.audio_sources.items() if capture.is_reconnecting]
+            if reconnecting:
+                self.window.update_status(f"デバイス再接続中... ({', '.join(reconnecting)})", "orange")
+                self._reconnect_status_shown = True
+            elif getattr(self, "_reconnect_status_shown", False):
+                self._reconnect_status_shown = False
+                self.window.update_status("録音中", "green")
+
+    def _update_file_progress(self):
+        """ファイル文字起こしの進捗を表示し、全チャンクの処理が終わったら完了処理を行う (UIスレッド)"""
+        source = next(iter(self.audio_sources.values()), None)
+        if source is None:
+            return
+        elapsed = time.time() - (self.file_transcription_start or time.time())
+        audio_seconds = source.decoded_samples / source.sample_rate
+        speed = f"(実時間の{audio_seconds / elapsed:.1f}倍速)" if elapsed > 0 else ""
+        self.window.update_file_progress(source.get_progress() * 100, speed)
+
+        if self.is_input_drained():
+            self._finish_file_transcription()
+
+    def _pending_chunks(self) -> int:
+        """キューに投入され、まだ文字起こしが終わっていないチャンク数"""
+        # 破棄・結合されたチャンクは文字起こしされないため、その分を差し引く
+        metrics = self.audio_queue.get_metrics()
+        return self.chunks_queued - self.chunks_done - metrics['dropped_chunks'] - metrics['merged_chunks']
+
+    def is_input_drained(self) -> bool:
+        """終わりのある入力 (ファイル・リプレイ) を最後まで読み、全チャンクの文字起こしが終わったか
+
+        精緻化を使う場合は、残りの音声を精緻化に回し、その完了も待つ。
+        """
+        if not self.file_input_done or self._pending_chunks() > 0:
+            return False
+        if self.refiner is not None:
+            self.refiner.flush()
+            return self.refiner.is_idle()
+        return True
+
+    def _finish_file_transcription(self):
+        """ファイル文字起こしの完了処理 (UIスレッド)"""
+        # 最後の結果を反映してから停止
+        self.check_transcription_results()
+        elapsed = time.time() - (self.file_transcription_start or time.time())
+        source = self.audio_sources.get("ファイル")
+        decode_error = getattr(source, 'decode_error', None)
+        self.stop_recording()
+        self.window.hide_file_progress()
+        try:
+            self.window.start_button.setEnabled(True)
+            self.window.stop_button.setEnabled(False)
+            self.window.file_button.setEnabled(True)
+            self.window.is_recording = False
+        except Exception:
+            pass
+
+        save_dir = self.window.get_save_directory()
+        if save_dir:
+            self.file_manager.base_directory = Path(save_dir)
+        filepath = self.file_manager.base_directory / f"transcript_{self.file_path.stem}.txt"
+        saved = self.file_manager.save_as_text(self.transcription_segments, str(filepath))
+
+        if decode_error is not None:
+            # デコードが途中で失敗した: できた所までの結果を保存して報告する
+            decoded_seconds = source.decoded_samples / source.sample_rate
+            logger.warning(f"ファイル文字起こし未完了: {self.file_path.name} "
+                           f"({decoded_seconds:.1f}秒 / {source.duration:.1f}秒でデコードエラー: {decode_error})")
+            if decoded_seconds <= 0:
+                self.window.update_status("ファイル文字起こし失敗", "red")
+                self.window.show_error("文字起こし失敗",
+                                       f"{self.file_path.name} をデコードできませんでした。\n\n{decode_error}")
+                return
+            self.window.update_status("ファイル文字起こし未完了", "orange")
+            message = (f"{self.file_path.name} のデコード中にエラーが発生したため、"
+                       f"{decoded_seconds:.0f}秒 / {source.duration:.0f}秒までで文字起こしを終了しました。"
+                       f"\n\n{decode_error}")
+            if saved:
+                message += f"\n\n途中までの結果の保存先:\n{filepath}"
+            self.window.show_warning("文字起こし未完了", message)
+            return
+
+        logger.info(f"ファイル文字起こし完了: {self.file_path.name} ({elapsed:.1f}秒, "
+                    f"{len(self.transcription_segments)}セグメント)")
+
+        self.window.update_status("ファイル文字起こし完了", "green")
+        message = f"{self.file_path.name} の文字起こしが完了しました（{elapsed:.0f}秒）。"
+        if saved:
+            message += f"\n\n保存先:\n{filepath}"
+        self.window.show_info("文字起こし完了", message)
+
     def _sync_ui_state(self):
         """UIの状態を定期的に同期（安全弁）"""
         try:
+            # 録音停止後も精緻化の結果を反映する
+            if not self.is_running and not self.result_queue.empty():
+                self.check_transcription_results()
+
             # モデルロード結果が準備できていれば処理
             if self._load_result_ready:
                 self._load_result_ready = False
@@ -701,10 +1845,17 @@ class OfflineVoiceLoggerApp:
                     print(f"[UIタイマー] モデルロード結果を処理: success={success}")
                     self._on_model_load_complete(success, error, callback)
 
-            # モデル検証済みなのに開始ボタンが有効でない場合は有効化
-            if getattr(self, "preload_verified", False) and not self.is_running:
+            # 停止後の残りの文字起こしの進捗
+            if self.draining and not self.is_running:
+                self._update_drain_progress()
+                return
+
+            # モデル検証済みなのに開始ボタンが有効でない場合は有効化 (復旧中を除く)
+            if getattr(self, "preload_verified", False) and not self.is_running and not self.recovering:
                 if not self.window.start_button.isEnabled():
                     self.window.start_button.setEnabled(True)
+                if not self.window.file_button.isEnabled():
+                    self.window.file_button.setEnabled(True)
                 # モデル状態表示が「ロード中」のままなら「検証済み」に更新
                 # テキスト比較は厳密でなくてもよいが、ここでは簡易に
                 current = self.window.model_status_label.text()
@@ -720,6 +1871,13 @@ class OfflineVoiceLoggerApp:
             while not self.result_queue.empty():
                 result = self.result_queue.get_nowait()
 
+                # 精緻化した結果は、同じ時間範囲のプレビューのセグメントと置き換える
+                replaced = 0
+                refined = result.get('refined')
+                if refined:
+                    replaced = self._remove_segments_in_range(*refined)
+                    self.refined_ranges.setdefault(refined[0], []).append(refined[1:])
+
                 # セグメントを追加（重複を防ぐ）
                 new_segments = []
 
@@ -747,6 +1905,14 @@ class OfflineVoiceLoggerApp:
                         is_duplicate = True
                         logger.debug(f"空または短すぎるセグメントをスキップ")
 
+                    # 精緻化済みの範囲に遅れて届いたプレビュー (ストリーミングの確定待ちなど) は除外
+                    if not is_duplicate and not refined:
+                        middle = (segment['start'] + segment['end']) / 2
+                        for range_start, range_end in self.refined_ranges.get(segment.get('source'), []):
+                            if range_start <= middle < range_end:
+                                is_duplicate = True
+                                break
+
                     # ブラックリストチェック
                     if not is_duplicate:
                         for blacklisted_phrase in hallucination_blacklist:
@@ -786,18 +1952,49 @@ class OfflineVoiceLoggerApp:
                         new_segments.append(segment)
 
                 # GUIを完全に再構築（常に時系列順を保証）
-                if new_segments:
+                if (new_segments or replaced) and self.window is not None:
                     # 表示をクリアして全て再構築
-                    self.window.transcription_text.clear()
+                    self.window.clear_transcription_text()
+                    # 複数ソースの場合はソース名を表示
+                    show_source = len(self.audio_sources) > 1
                     for seg in self.transcription_segments:
                         timestamp = self._format_timestamp(seg['start'])
-                        self.window.add_transcription_text(seg['text'], timestamp)
+                        text = f"[{seg['source']}] {seg['text']}" if show_source and seg.get('source') else seg['text']
+                        self.window.add_transcription_text(text, timestamp)
 
         except queue.Empty:
             pass
         except Exception as e:
             logger.error(f"結果チェックエラー: {e}")
 
+        # ストリーミングの認識途中のテキストを表示
+        if self.streaming_processors and self.window is not None and self.is_running:
+            show_source = len(self.streaming_processors) > 1
+            self.window.update_live_text([
+                ((f"[{name}] " if show_source else "") + processor.committed_text, processor.tentative_text)
+                for name, processor in self.streaming_processors.items()
+                if processor.committed_text or processor.tentative_text
+            ])
+
+    def _remove_segments_in_range(self, source: str, start: float, end: float) -> int:
+        """ソースのセグメントのうち、中点が時間範囲内にあるものを除く
+
+        Args:
+            source (str): ソース名
+            start (float): 範囲の開始 (秒)
+            end (float): 範囲の終了 (秒)
+
+        Returns:
+            int: 除いたセグメント数
+        """
+        kept = [
+            seg for seg in self.transcription_segments
+            if seg.get('source') != source or not start <= (seg['start'] + seg['end']) / 2 < end
+        ]
+        removed = len(self.transcription_segments) - len(kept)
+        self.transcription_segments[:] = kept
+        return removed
+
     def _format_timestamp(self, seconds: float) -> str:
         """タイムスタンプフォーマット - 実時刻を表示"""
         from datetime import datetime, timedelta
@@ -844,8 +2041,11 @@ class OfflineVoiceLoggerApp:
             # GUIのテキストエリアをクリア
             self.window.clear_transcription_text()
 
-            # 内部の文字起こしデータをクリア
+            # 内部の文字起こしデータをクリア (精緻化待ちの音声も破棄)
             self.transcription_segments = []
+            self.refined_ranges = {}
+            if self.refiner is not None:
+                self.refiner.reset()
 
             # 成功メッセージ
             self.window.show_info("リセット完了", "文字起こし結果の履歴をクリアしました。")
@@ -855,6 +2055,18 @@ class OfflineVoiceLoggerApp:
             logger.error(f"リセットエラー: {e}")
             self.window.show_error("リセットエラー", f"リセット中にエラーが発生しました:\n{e}")
 
+    def shutdown(self):
+        """終了処理 (ワーカープロセスと共有メモリを解放)"""
+        if self.is_running:
+            self.stop_input()
+        if self.draining:
+            # 終了時は残りを待たない（未処理の音声はジャーナルから次回復旧できる）
+            self.finish_pipeline()
+        if self.refiner is not None:
+            self.refiner.close()
+        # 推論サーバーは切断のみ（次回起動時にモデルを再ロードせずに接続し直す）
+        self.model_registry.clear(keep_servers=True)
+
     def run(self):
         """アプリケーション実行"""
         print("   4. GUIセットアップ開始...")
@@ -879,6 +2091,9 @@ class OfflineVoiceLoggerApp:
         QTimer.singleShot(0, _post_show_sync)
         QTimer.singleShot(1000, _post_show_sync)
 
+        # 前回異常終了したセッションのジャーナルを確認
+        QTimer.singleShot(500, self._check_unfinished_journals)
+
 
 def main():
     """メインエントリポイント"""
@@ -926,6 +2141,7 @@ def main():
         print("=" * 60)
 
         # イベントループ
+        app.aboutToQuit.connect(voice_logger.shutdown)
         sys.exit(app.exec_())
 
     except Exception as e:
@@ -943,4 +2159,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 文字起こしのワーカープロセス (spawn) をexe化した環境でも起動できるようにする
+    import multiprocessing
+    multiprocessing.freeze_support()
+    # exe化した環境では推論サーバーもアプリ本体から起動する (preload_worker.server_command)
+    import preload_worker
+    if sys.argv[1:2] == [preload_worker.INFERENCE_SERVER_FLAG]:
+        preload_worker.main(sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,183 @@
+"""
+OfflineVoiceLogger - モデルレジストリモジュール
+
+ロード済みのモデルをメモリ予算の範囲で保持し、再ロードせずに切り替える
+- モデルの使用メモリはmodel.binの大きさとcompute_typeから見積もる
+- 予算 (Storage.max_memory_usage_mb) か保持数を超える場合は最も長く使っていないモデルを解放 (LRU)
+- 使用中のモデル (録音中のプレビュー・精緻化など) は解放しない
+- 推論サーバーのモデルは解放時にサーバーを終了する (アプリの終了時は切断のみで残す)
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelRegistry:
+    """ロード済みの文字起こしモデルをLRUで保持するクラス
+
+    モデルはキー (モデル名など) ごとに1つ保持する。get()は保持中なら即座に返し、
+    なければloaderでロードしてから登録する。ロードはロック内で順に行う。
+    """
+
+    # model.binが見つからない場合のファイルサイズの目安 (MB, float16)
+    MODEL_FILE_MB = {
+        'tiny': 75,
+        'base': 145,
+        'small': 484,
+        'medium': 1530,
+        'large-v3': 3090,
+    }
+
+    # float16の重みをcompute_typeでロードした場合の倍率
+    COMPUTE_TYPE_FACTOR = {
+        'int8': 0.5,
+        'int8_float16': 0.5,
+        'int8_float32': 0.5,
+        'float16': 1.0,
+        'float32': 2.0,
+    }
+
+    def __init__(self, memory_budget_mb: float = 1024, max_models: int = 2):
+        """
+        Args:
+            memory_budget_mb (float): 保持するモデルの見積もりメモリの合計の上限 (MB)
+            max_models (int): 保持するモデル数の上限
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.max_models = max(1, int(max_models))
+        self._lock = threading.RLock()
+        self._models: "OrderedDict[str, Dict]" = OrderedDict()  # キー → {"transcriber", "memory_mb"}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    @classmethod
+    def estimate_memory_mb(cls, model_path, compute_type: str = "int8", model_name: str = None) -> float:
+        """モデルをロードした場合の使用メモリを見積もる
+
+        Args:
+            model_path: モデルのディレクトリ
+            compute_type (str): "int8", "float16", "float32"
+            model_name (str): model.binがない場合に目安を引くモデル名
+
+        Returns:
+            float: 見積もりメモリ (MB、実行時のバッファ分として1割を加える)
+        """
+        model_file = Path(model_path) / 'model.bin'
+        if model_file.exists():
+            file_mb = model_file.stat().st_size / 1024 / 1024
+        else:
+            file_mb = cls.MODEL_FILE_MB.get(model_name or Path(model_path).name, 0)
+        return file_mb * cls.COMPUTE_TYPE_FACTOR.get(compute_type, 1.0) * 1.1
+
+    def get(self, key: str, loader: Callable[[], object], memory_mb: float = 0.0,
+            pinned: Iterable[str] = ()):
+        """モデルを取得 (保持中なら再ロードしない)
+
+        Args:
+            key (str): モデルのキー
+            loader (Callable): モデルをロードして返す関数 (保持していない場合のみ呼ぶ)
+            memory_mb (float): ロードする場合の見積もりメモリ (MB)
+            pinned (Iterable[str]): 解放してはいけない使用中のモデルのキー
+
+        Returns:
+            ロード済みのモデル
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                logger.info(f"保持中のモデルに切り替え: {key}")
+                return entry['transcriber']
+
+            # 予算と保持数に収まるまで古いモデルを解放してからロードする
+            self._evict_for(memory_mb, set(pinned))
+            logger.info(f"モデルをロード: {key} (見積もり{memory_mb:.0f}MB, "
+                        f"保持中{self.memory_usage_mb():.0f}/{self.memory_budget_mb:.0f}MB)")
+            transcriber = loader()
+            self._models[key] = {'transcriber': transcriber, 'memory_mb': memory_mb}
+            self.loads += 1
+            return transcriber
+
+    def _evict_for(self, memory_mb: float, pinned: set):
+        """新しいモデルが収まるまでLRUで解放する (ロック内で呼ぶ)"""
+        for key in list(self._models):
+            fits = (self.memory_usage_mb() + memory_mb <= self.memory_budget_mb
+                    and len(self._models) < self.max_models)
+            if fits:
+                return
+            if key in pinned:
+                continue
+            self.evict(key)
+        if self.memory_usage_mb() + memory_mb > self.memory_budget_mb:
+            logger.warning(f"モデルのメモリ予算を超えます: 保持中{self.memory_usage_mb():.0f}MB + "
+                           f"{memory_mb:.0f}MB > {self.memory_budget_mb:.0f}MB")
+
+    def evict(self, key: str, keep_servers: bool = False) -> bool:
+        """モデルを解放する (ワーカープロセスや推論サーバーを持つ場合は終了する)
+
+        Args:
+            key (str): モデルのキー
+            keep_servers (bool): Trueの場合、推論サーバーは終了せずに切断のみ行う
+
+        Returns:
+            bool: 保持していた場合True
+        """
+        with self._lock:
+            entry = self._models.pop(key, None)
+        if entry is None:
+            return False
+        transcriber = entry['transcriber']
+        release = None if keep_servers else getattr(transcriber, 'shutdown_server', None)
+        if release is None:
+            release = getattr(transcriber, 'close', None)
+        if release is not None:
+            release()
+        self.evictions += 1
+        logger.info(f"モデルを解放: {key} ({entry['memory_mb']:.0f}MB)")
+        return True
+
+    def is_resident(self, key: str) -> bool:
+        """モデルを保持しているか (再ロードなしで切り替えられるか)"""
+        with self._lock:
+            return key in self._models
+
+    def resident_keys(self) -> List[str]:
+        """保持中のモデルのキー (古い順)"""
+        with self._lock:
+            return list(self._models)
+
+    def memory_usage_mb(self) -> float:
+        """保持中のモデルの見積もりメモリの合計 (MB)"""
+        with self._lock:
+            return sum(entry['memory_mb'] for entry in self._models.values())
+
+    def clear(self, keep_servers: bool = False):
+        """すべてのモデルを解放する
+
+        Args:
+            keep_servers (bool): Trueの場合、推論サーバーは終了せずに切断のみ行う
+        """
+        for key in self.resident_keys():
+            self.evict(key, keep_servers)
+
+    def get_stats(self) -> Dict:
+        """保持状況の統計を取得
+
+        Returns:
+            Dict: resident, memory_mb, loads, hits, evictions
+        """
+        with self._lock:
+            return {
+                'resident': list(self._models),
+                'memory_mb': self.memory_usage_mb(),
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions,
+            }
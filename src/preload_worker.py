@@ -1,25 +1,385 @@
 """
-モデルプリロード用ワーカー (サブプロセスで実行)
+ローカル推論サーバー (常駐するサブプロセスで実行)
 
-指定されたパラメータでWhisperModelの初期化のみを行い、即終了する。
-成功時はexit code 0、失敗時は1を返す。
+指定されたパラメータでモデルを1回だけロードし、ローカルのパイプ (Windows) または
+Unixソケットで文字起こし要求を受け付け続ける。GUIを再起動してもモデルを再ロード
+せずに接続し直せる (接続先は状態ファイルに書き出す)。
+
+通信はmultiprocessing.connectionのメッセージ単位で、中身はstructによる簡潔な
+バイナリ形式 (音声はfloat32の生データ、結果はセグメントごとの固定長レコード + UTF-8テキスト)。
+
+起動完了時は {"ok": true, "address": ...}、失敗時は {"ok": false, "error": ...} を
+標準出力に1行出力する (失敗時はexit code 1)。
+一定時間要求がなければ終了する (--idle_minutes、0の場合は終了しない)。
+exe化した環境ではアプリ本体を --inference-server 付きで起動してサーバーにする。
 """
 
 import argparse
+import getpass
+import hashlib
 import json
 import os
+import secrets
+import stat
+import struct
 import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from multiprocessing.connection import Listener
 from pathlib import Path
+from typing import Dict, List, Tuple
+
+# プロトコル
+PROTOCOL_VERSION = 1
+OP_PING = 1
+OP_TRANSCRIBE = 2
+OP_WORDS = 3
+OP_SHUTDOWN = 4
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# exe化した環境でアプリ本体をサーバーとして起動する引数
+INFERENCE_SERVER_FLAG = "--inference-server"
+
+# 要求: バージョン, 操作, beam_size, best_of (0=既定), 言語, チャンク数
+#       → チャンクごとのサンプル数 (uint32) → float32の音声 (全チャンクを連結)
+REQUEST_HEADER = struct.Struct('<BBBB2sH')
+# 応答: バージョン, 状態, チャンク数 → チャンクごとに (言語, 長さ, レコード数) とレコード
+#       (エラー時はUTF-8のメッセージ)
+RESPONSE_HEADER = struct.Struct('<BBH')
+CHUNK_HEADER = struct.Struct('<2sfH')
+# レコード: 開始, 終了, 信頼度 (単語の場合は確率), テキストのバイト数 → UTF-8テキスト
+RECORD = struct.Struct('<fffH')
+
+# (言語, 長さ, [(開始, 終了, 信頼度, テキスト), ...]) のリスト
+Chunks = List[Tuple[str, float, List[Tuple[float, float, float, str]]]]
+
+
+def encode_request(op: int, audio_list: List[np.ndarray] = (), language: str = "",
+                   decode_options: Dict = None) -> bytes:
+    """要求をバイト列にする
+
+    Raises:
+        ValueError: ヘッダーに収まらない値 (beam_size・best_ofが0-255の範囲外、
+            言語が2文字の英字コードでない、チャンク数が65535を超える) の場合
+    """
+    decode_options = decode_options or {}
+    beam_size = int(decode_options.get('beam_size', 0))
+    best_of = int(decode_options.get('best_of', 0))
+    for name, value in (('beam_size', beam_size), ('best_of', best_of)):
+        if not 0 <= value <= 255:
+            raise ValueError(f"{name}は0-255の範囲で指定してください: {value}")
+    language = language or ""
+    if len(language) > 2 or not language.isascii():
+        raise ValueError(f"言語は2文字の言語コードで指定してください: {language}")
+    if len(audio_list) > 0xFFFF:
+        raise ValueError(f"1回の要求のチャンク数が多すぎます: {len(audio_list)}")
+    header = REQUEST_HEADER.pack(
+        PROTOCOL_VERSION, op, beam_size, best_of, language.encode('ascii').ljust(2), len(audio_list)
+    )
+    lengths = struct.pack(f'<{len(audio_list)}I', *(len(audio) for audio in audio_list))
+    audio = b''.join(np.ascontiguousarray(audio, dtype=np.float32).tobytes() for audio in audio_list)
+    return header + lengths + audio
+
+
+def decode_request(data: bytes) -> Tuple[int, List[np.ndarray], str, Dict]:
+    """バイト列から要求を取り出す (音声はdata上のビューでコピーしない)
+
+    Returns:
+        Tuple: (操作, 音声のリスト, 言語, デコードパラメータの上書き)
+    """
+    version, op, beam_size, best_of, language, count = REQUEST_HEADER.unpack_from(data, 0)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"プロトコルのバージョンが異なります: {version}")
+    position = REQUEST_HEADER.size
+    lengths = struct.unpack_from(f'<{count}I', data, position)
+    position += 4 * count
+    audio_list = []
+    for length in lengths:
+        audio_list.append(np.frombuffer(data, dtype=np.float32, count=length, offset=position))
+        position += 4 * length
+    decode_options = {}
+    if beam_size:
+        decode_options['beam_size'] = beam_size
+    if best_of:
+        decode_options['best_of'] = best_of
+    return op, audio_list, language.decode('ascii').strip(), decode_options
+
+
+def encode_response(chunks: Chunks) -> bytes:
+    """結果をバイト列にする"""
+    parts = [RESPONSE_HEADER.pack(PROTOCOL_VERSION, STATUS_OK, len(chunks))]
+    for language, duration, records in chunks:
+        parts.append(CHUNK_HEADER.pack((language or "").encode('ascii')[:2].ljust(2), duration, len(records)))
+        for start, end, confidence, text in records:
+            encoded = text.encode('utf-8')[:0xFFFF]
+            parts.append(RECORD.pack(start, end, confidence, len(encoded)))
+            parts.append(encoded)
+    return b''.join(parts)
+
+
+def encode_error(message: str) -> bytes:
+    """エラー応答をバイト列にする"""
+    return RESPONSE_HEADER.pack(PROTOCOL_VERSION, STATUS_ERROR, 0) + message.encode('utf-8')
+
+
+def decode_response(data: bytes) -> Chunks:
+    """バイト列から結果を取り出す
+
+    Raises:
+        RuntimeError: サーバーがエラーを返した場合
+    """
+    version, status, count = RESPONSE_HEADER.unpack_from(data, 0)
+    if version != PROTOCOL_VERSION:
+        raise RuntimeError(f"プロトコルのバージョンが異なります: {version}")
+    position = RESPONSE_HEADER.size
+    if status != STATUS_OK:
+        raise RuntimeError(bytes(data[position:]).decode('utf-8', errors='replace'))
+    chunks = []
+    for _ in range(count):
+        language, duration, record_count = CHUNK_HEADER.unpack_from(data, position)
+        position += CHUNK_HEADER.size
+        records = []
+        for _ in range(record_count):
+            start, end, confidence, length = RECORD.unpack_from(data, position)
+            position += RECORD.size
+            text = bytes(data[position:position + length]).decode('utf-8')
+            position += length
+            records.append((start, end, confidence, text))
+        chunks.append((language.decode('ascii').strip(), duration, records))
+    return chunks
+
+
+def server_key(model_path: str, device: str, compute_type: str, cpu_threads: int = None,
+               num_workers: int = 1) -> str:
+    """モデルとロード設定ごとのサーバーの識別子"""
+    text = f"{Path(model_path).resolve()}|{device}|{compute_type}|{cpu_threads or 0}|{num_workers}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def runtime_directory() -> Path:
+    """状態ファイルとソケットを置くユーザー専用のディレクトリ
+
+    共有の一時ディレクトリに置くため、他のユーザーが先に作ったディレクトリや
+    シンボリックリンクは使わない (接続先と認証キーを差し替えられないようにする)。
+
+    Raises:
+        PermissionError: 既存のディレクトリが自分の所有でない、シンボリックリンク、
+            または他のユーザーに開いている場合
+    """
+    directory = Path(tempfile.gettempdir()) / f"offline_voice_logger-{getpass.getuser()}"
+    directory.mkdir(mode=0o700, exist_ok=True)
+    if sys.platform != 'win32':
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"実行ディレクトリがディレクトリではありません: {directory}")
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"実行ディレクトリの所有者が異なります: {directory}")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            raise PermissionError(f"実行ディレクトリが他のユーザーに開いています "
+                                  f"(モード{stat.S_IMODE(info.st_mode):o}): {directory}")
+    return directory
+
+
+def server_command() -> List[str]:
+    """推論サーバーを起動するコマンドの先頭部分 (この後にmain()の引数を続ける)
 
+    exe化した環境ではスクリプトを実行できないため、アプリ本体を引数付きで起動する。
+    """
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, INFERENCE_SERVER_FLAG]
+    return [sys.executable, str(Path(__file__).resolve())]
 
-def main():
+
+def state_file_path(key: str) -> Path:
+    """サーバーの接続先を書き出す状態ファイルのパス"""
+    return runtime_directory() / f"inference_server_{key}.json"
+
+
+def server_address(key: str) -> Tuple[str, str]:
+    """サーバーの待ち受けアドレス
+
+    Returns:
+        Tuple[str, str]: (アドレス, ファミリー) Windowsは名前付きパイプ、それ以外はUnixソケット
+    """
+    if sys.platform == 'win32':
+        return rf"\\.\pipe\offline_voice_logger-{getpass.getuser()}-{key}", 'AF_PIPE'
+    return str(runtime_directory() / f"inference_server_{key}.sock"), 'AF_UNIX'
+
+
+class InferenceServer:
+    """1つのモデルを保持し、接続ごとのスレッドで要求を処理するサーバー"""
+
+    def __init__(self, transcriber, key: str, idle_minutes: float = 60.0):
+        """
+        Args:
+            transcriber (Transcriber): ロード済みのTranscriber
+            key (str): サーバーの識別子
+            idle_minutes (float): 要求がない場合に終了するまでの時間 (分、0の場合は終了しない)
+        """
+        self.transcriber = transcriber
+        self.key = key
+        self.idle_seconds = idle_minutes * 60
+        self.address, self.family = server_address(key)
+        self.authkey = secrets.token_bytes(32)
+        self.state_file = state_file_path(key)
+        self.listener = None
+        self.requests = 0
+        self._last_activity = time.monotonic()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self):
+        """待ち受けを開始し、接続先を状態ファイルに書き出す"""
+        if self.family == 'AF_UNIX' and os.path.exists(self.address):
+            # 前回異常終了したサーバーのソケット
+            os.unlink(self.address)
+        self.listener = Listener(self.address, family=self.family, authkey=self.authkey)
+        state = {
+            'address': self.address,
+            'family': self.family,
+            'authkey': self.authkey.hex(),
+            'pid': os.getpid(),
+            'model_path': str(self.transcriber.model_path),
+            'protocol': PROTOCOL_VERSION,
+        }
+        temporary = self.state_file.with_suffix('.tmp')
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(state, f)
+        os.replace(temporary, self.state_file)
+        if self.idle_seconds > 0:
+            threading.Thread(target=self._idle_watchdog, daemon=True).start()
+
+    def serve_forever(self):
+        """接続を受け付け続ける"""
+        while not self._stopping.is_set():
+            try:
+                connection = self.listener.accept()
+            except Exception:
+                if self._stopping.is_set():
+                    break
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        """1つの接続の要求を順に処理する (別スレッド)"""
+        with self._lock:
+            self._active += 1
+        try:
+            while True:
+                try:
+                    data = connection.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                self._touch()
+                response = self._process(data)
+                try:
+                    connection.send_bytes(response)
+                except (EOFError, OSError):
+                    break
+                self._touch()
+                if self._stopping.is_set():
+                    # 終了要求: acceptの待機を解除できないため、後片付けをしてからプロセスごと終了する
+                    connection.close()
+                    self.cleanup()
+                    os._exit(0)
+        finally:
+            connection.close()
+            with self._lock:
+                self._active -= 1
+            self._touch()
+
+    def _process(self, data: bytes) -> bytes:
+        """要求を文字起こしし、応答を作る"""
+        try:
+            op, audio_list, language, decode_options = decode_request(data)
+            language = language or None
+            if op == OP_PING:
+                return encode_response([])
+            if op == OP_SHUTDOWN:
+                self.stop()
+                return encode_response([])
+            with self._lock:
+                self.requests += 1
+            if op == OP_WORDS:
+                words = self.transcriber.transcribe_words(audio_list[0], language, decode_options)
+                records = [(w['start'], w['end'], w['probability'], w['word']) for w in words]
+                return encode_response([(language or "", len(audio_list[0]) / 16000, records)])
+            if op == OP_TRANSCRIBE:
+                if len(audio_list) == 1:
+                    outputs = [self.transcriber.transcribe(audio_list[0], language, decode_options)]
+                else:
+                    outputs = self.transcriber.transcribe_batch(audio_list, language, decode_options)
+                return encode_response([
+                    (output['language'], output['duration'],
+                     [(seg['start'], seg['end'], seg['confidence'], seg['text']) for seg in output['segments']])
+                    for output in outputs
+                ])
+            return encode_error(f"不明な操作: {op}")
+        except Exception as e:
+            return encode_error(str(e))
+
+    def _touch(self):
+        with self._lock:
+            self._last_activity = time.monotonic()
+
+    def _idle_watchdog(self):
+        """接続も要求もない状態が続いたら終了する (別スレッド)"""
+        while not self._stopping.wait(10):
+            with self._lock:
+                idle = self._active == 0 and time.monotonic() - self._last_activity > self.idle_seconds
+            if idle:
+                self.stop()
+                # acceptの待機を解除できないため、後片付けをしてからプロセスごと終了する
+                self.cleanup()
+                os._exit(0)
+
+    def stop(self):
+        """待ち受けを終了する"""
+        self._stopping.set()
+        if self.listener is not None:
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+
+    def cleanup(self):
+        """状態ファイルとソケットを削除する"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                owned = json.load(f).get('pid') == os.getpid()
+        except Exception:
+            owned = False
+        if owned:
+            self.state_file.unlink(missing_ok=True)
+        if self.family == 'AF_UNIX' and os.path.exists(self.address):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+
+def main(argv: List[str] = None):
+    """サーバーを起動して要求を待ち続ける
+
+    Args:
+        argv (List[str]): コマンドライン引数 (Noneの場合はsys.argv[1:])
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument("--model_path", required=True)
     parser.add_argument("--device", default="cpu")
     parser.add_argument("--compute_type", default="int8")
     parser.add_argument("--cpu_threads", type=int, default=None)
     parser.add_argument("--num_workers", type=int, default=1)
-    args = parser.parse_args()
+    parser.add_argument("--batch_size", type=int, default=1)
+    parser.add_argument("--language", default="ja")
+    parser.add_argument("--warmup_seconds", type=float, default=0.0)
+    parser.add_argument("--warmup_options", default="{}")
+    parser.add_argument("--idle_minutes", type=float, default=60.0)
+    args = parser.parse_args(argv)
 
     # 完全オフライン環境変数
     os.environ['no_proxy'] = '*'
@@ -29,36 +389,41 @@ def main():
     os.environ['HTTP_PROXY'] = ''
     os.environ['HTTPS_PROXY'] = ''
 
+    server = None
     try:
-        from faster_whisper import WhisperModel
-
-        kwargs = {
-            "model_size_or_path": args.model_path,
-            "device": args.device,
-            "compute_type": args.compute_type,
-            "download_root": None,
-            "local_files_only": True,
-        }
-        if args.cpu_threads is not None:
-            kwargs["cpu_threads"] = max(1, int(args.cpu_threads))
-        kwargs["num_workers"] = max(1, int(args.num_workers))
-
-        # モデル初期化のみ行う（保持しない）
-        model = WhisperModel(**kwargs)
-        # メタ情報を可能なら返す（失敗しても致命ではない）
-        info = {
-            "ok": True,
-            "device": args.device,
-            "compute_type": args.compute_type,
-        }
-        print(json.dumps(info), flush=True)
-        sys.exit(0)
+        sys.path.insert(0, str(Path(__file__).parent))
+        from transcriber import Transcriber
+
+        transcriber = Transcriber(
+            model_path=args.model_path,
+            device=args.device,
+            compute_type=args.compute_type,
+            language=args.language,
+            cpu_threads=args.cpu_threads,
+            num_workers=args.num_workers,
+            batch_size=args.batch_size,
+            warmup_seconds=args.warmup_seconds,
+            warmup_decode_options=json.loads(args.warmup_options)
+        )
+        transcriber.load_model()
+
+        key = server_key(args.model_path, args.device, args.compute_type, args.cpu_threads, args.num_workers)
+        server = InferenceServer(transcriber, key, idle_minutes=args.idle_minutes)
+        server.start()
+        print(json.dumps({"ok": True, "address": server.address, "pid": os.getpid()}), flush=True)
 
     except Exception as e:
         print(json.dumps({"ok": False, "error": str(e)}), flush=True)
         sys.exit(1)
 
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        server.cleanup()
+
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,408 @@
+"""
+OfflineVoiceLogger - プロセス版文字起こしモジュール
+
+Transcriberを別プロセスで動かし、デコード周りのPython処理 (セグメントの走査、
+マージ、ログ出力) がGUIや音声コールバックとGILを奪い合わないようにする
+- ワーカープロセスごとにモデルを1回だけロード
+- 音声は共有メモリ (multiprocessing.shared_memory) のスロット経由で渡し、pickleしない
+- 結果はセグメントごとのタプル (開始, 終了, 信頼度, テキスト) の簡潔なレコードで返す
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List
+from logger import get_logger
+from transcriber import Transcriber, ModelLoadError, ModelNotFoundError, TranscriptionError
+
+logger = get_logger(__name__)
+
+
+def _worker_main(worker_id: int, model_kwargs: Dict, shm_name: str, slot_count: int,
+                 slot_samples: int, tasks, results):
+    """ワーカープロセスの本体 (モデルをロードしてタスクを処理し続ける)
+
+    Args:
+        worker_id (int): ワーカー番号
+        model_kwargs (Dict): Transcriberの引数
+        shm_name (str): 音声スロットの共有メモリ名
+        slot_count (int): スロット数
+        slot_samples (int): 1スロットのサンプル数
+        tasks: タスクキュー ((要求ID, スロット, 各チャンクの長さ, 言語, 種類, デコード設定) またはNoneで終了)
+        results: 結果キュー (取り出したタスクは('started', 要求ID, ワーカー番号)で知らせる)
+    """
+    shm = None
+    try:
+        transcriber = Transcriber(**model_kwargs)
+        transcriber.load_model()
+        shm = shared_memory.SharedMemory(name=shm_name)
+        slots = np.ndarray((slot_count, slot_samples), dtype=np.float32, buffer=shm.buf)
+    except Exception as e:
+        results.put(('error', worker_id, str(e)))
+        if shm is not None:
+            shm.close()
+        return
+    results.put(('ready', worker_id, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        request_id, slot, lengths, language, kind, decode_options = task
+        # どのワーカーが処理中かを親へ知らせる (異常終了時に要求を失敗させるため)
+        results.put(('started', request_id, worker_id))
+        try:
+            # スロット上のビューをそのまま渡す (コピーしない)
+            audio_list = []
+            position = 0
+            for length in lengths:
+                audio_list.append(slots[slot, position:position + length])
+                position += length
+            if kind == 'words':
+                words = transcriber.transcribe_words(audio_list[0], language, decode_options)
+                del audio_list
+                records = [(w['start'], w['end'], w['probability'], w['word']) for w in words]
+                results.put(('result', request_id, records))
+                continue
+            if len(audio_list) == 1:
+                outputs = [transcriber.transcribe(audio_list[0], language, decode_options)]
+            else:
+                outputs = transcriber.transcribe_batch(audio_list, language, decode_options)
+            records = [
+                (output['language'], output['duration'],
+                 [(seg['start'], seg['end'], seg['confidence'], seg['text']) for seg in output['segments']])
+                for output in outputs
+            ]
+            del audio_list
+            results.put(('result', request_id, records))
+        except Exception as e:
+            results.put(('failed', request_id, str(e)))
+
+    del slots
+    shm.close()
+
+
+class ProcessTranscriber:
+    """Transcriberを別プロセスで動かすバックエンド (Transcriberと同じインターフェース)
+
+    transcribe/transcribe_batchは複数スレッドから同時に呼べる。空いたワーカー
+    プロセスが順にタスクを取るため、呼び出し側のスレッド数をプロセス数に
+    合わせると全プロセスが常に稼働する。
+    """
+
+    def __init__(self, model_path: str, device: str = "cpu", compute_type: str = "int8",
+                 language: str = "ja", cpu_threads: int = None, num_workers: int = 1,
+                 batch_size: int = 1, max_chunk_samples: int = 16000 * 30,
+                 load_timeout: float = 600.0, warmup_seconds: float = 0.0,
+                 warmup_decode_options: Dict = None):
+        """
+        Args:
+            model_path (str): ローカルモデルパス
+            device (str): "cpu" or "cuda"
+            compute_type (str): "int8", "float16", "float32"
+            language (str): "ja" or "en"
+            cpu_threads (int): 各プロセスの1デコードあたりのスレッド数
+            num_workers (int): ワーカープロセス数
+            batch_size (int): 1回のバッチ推論でまとめるチャンクの最大数
+            max_chunk_samples (int): 1チャンクの最大サンプル数 (スロットの大きさを決める)
+            load_timeout (float): モデルロードを待つ最大時間 (秒)
+            warmup_seconds (float): 各プロセスでロード直後にデコードする合成音声の長さ (秒)
+            warmup_decode_options (Dict): ウォームアップで使うデコードパラメータの上書き
+        """
+        self.model_path = model_path
+        self.language = language if language in Transcriber.SUPPORTED_LANGUAGES else "ja"
+        self.num_workers = max(1, int(num_workers))
+        self.batch_size = max(1, int(batch_size))
+        self.load_timeout = load_timeout
+        self.model_kwargs = {
+            'model_path': str(model_path),
+            'device': device,
+            'compute_type': compute_type,
+            'language': self.language,
+            'cpu_threads': cpu_threads,
+            'num_workers': 1,
+            'batch_size': self.batch_size,
+            'warmup_seconds': warmup_seconds,
+            'warmup_decode_options': warmup_decode_options,
+        }
+        # 呼び出し中のスレッドごとに1スロット (プロセス数の2倍まで同時に投入できる)
+        self.slot_samples = max_chunk_samples * self.batch_size
+        self.slot_count = self.num_workers * 2
+
+        self.model_loaded = False
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._shm = None
+        self._slots = None
+        self._free_slots = queue.Queue()
+        self._tasks = None
+        self._results = None
+        self._dispatcher = None
+        self._pending = {}  # 要求ID → [Event, 結果, 処理中のワーカー番号]
+        self._pending_lock = threading.Lock()
+        self._exited_workers = set()
+        self._closing = False
+        self._request_ids = itertools.count()
+
+        logger.info(f"ProcessTranscriber初期化: モデル={model_path}, プロセス数={self.num_workers}")
+
+    def load_model(self) -> bool:
+        """ワーカープロセスを起動し、全プロセスのモデルロード完了を待つ
+
+        Returns:
+            bool: 成功時True
+
+        Raises:
+            ModelNotFoundError: モデルが見つからない場合
+            ModelLoadError: いずれかのプロセスでロードに失敗した場合
+        """
+        if not Path(self.model_path).exists():
+            raise ModelNotFoundError(f"モデルファイルが見つかりません: {self.model_path}")
+
+        self.close()
+        try:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slot_count * self.slot_samples * 4)
+            self._slots = np.ndarray((self.slot_count, self.slot_samples), dtype=np.float32, buffer=self._shm.buf)
+            for slot in range(self.slot_count):
+                self._free_slots.put(slot)
+            self._tasks = self._context.Queue()
+            self._results = self._context.Queue()
+
+            for worker_id in range(self.num_workers):
+                process = self._context.Process(
+                    target=_worker_main,
+                    args=(worker_id, self.model_kwargs, self._shm.name, self.slot_count,
+                          self.slot_samples, self._tasks, self._results),
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+
+            # 全プロセスのロード完了を待つ (エラーを報告せずに落ちたプロセスも検出する)
+            ready = set()
+            deadline = time.monotonic() + self.load_timeout
+            while len(ready) < self.num_workers:
+                if time.monotonic() > deadline:
+                    raise ModelLoadError("ワーカープロセスのモデルロードがタイムアウトしました")
+                try:
+                    kind, worker_id, error = self._results.get(timeout=0.5)
+                except queue.Empty:
+                    for worker_id, process in enumerate(self._processes):
+                        if worker_id not in ready and process.exitcode is not None:
+                            raise ModelLoadError(f"ワーカープロセス{worker_id}がモデルロード中に終了しました "
+                                                 f"(終了コード{process.exitcode})")
+                    continue
+                if kind == 'error':
+                    raise ModelLoadError(f"ワーカープロセス{worker_id}のモデルロードに失敗しました: {error}")
+                ready.add(worker_id)
+                logger.info(f"ワーカープロセス{worker_id}のモデルロード完了")
+
+        except ModelLoadError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            raise ModelLoadError(f"ワーカープロセスの起動に失敗しました: {e}")
+
+        self._dispatcher = threading.Thread(target=self._dispatch_results, daemon=True)
+        self._dispatcher.start()
+        self.model_loaded = True
+        logger.info(f"ProcessTranscriber準備完了: {self.num_workers}プロセス")
+        return True
+
+    def _dispatch_results(self):
+        """結果キューを読み、待っている呼び出しへ渡す。ワーカーの異常終了も検出する (別スレッド)"""
+        while True:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError, ValueError):
+                break
+            if message is None:
+                break
+            kind, request_id, payload = message
+            with self._pending_lock:
+                if kind == 'started':
+                    waiter = self._pending.get(request_id)
+                    if waiter is not None:
+                        waiter[2] = payload
+                    continue
+                waiter = self._pending.pop(request_id, None)
+            if waiter is None:
+                continue
+            waiter[1] = (kind, payload)
+            waiter[0].set()
+
+    def _check_workers(self):
+        """終了したワーカープロセスを検出し、処理中だった要求を失敗させる
+
+        終了したワーカーが処理中の要求と、まだ着手の通知がない要求 (終了したワーカーが
+        取り出した可能性がある) を失敗として返し、呼び出し元がスロットを戻せるようにする。
+        """
+        if self._closing:
+            return
+        exited = [(worker_id, process.exitcode) for worker_id, process in enumerate(self._processes)
+                  if worker_id not in self._exited_workers and process.exitcode is not None]
+        if not exited:
+            return
+        for worker_id, exitcode in exited:
+            self._exited_workers.add(worker_id)
+            logger.error(f"ワーカープロセス{worker_id}が終了しました (終了コード{exitcode})")
+
+        message = "ワーカープロセスが終了しました: " + ", ".join(
+            f"{worker_id} (終了コード{exitcode})" for worker_id, exitcode in exited)
+        with self._pending_lock:
+            failed = [request_id for request_id, waiter in self._pending.items()
+                      if waiter[2] is None or waiter[2] in self._exited_workers]
+            waiters = [self._pending.pop(request_id) for request_id in failed]
+        for waiter in waiters:
+            waiter[1] = ('failed', message)
+            waiter[0].set()
+        if failed:
+            logger.warning(f"終了したワーカーの要求を失敗として返しました: {len(failed)}件")
+        if len(self._exited_workers) >= len(self._processes):
+            self.model_loaded = False
+
+    def transcribe(self, audio_data: np.ndarray, language: str = None, decode_options: Dict = None) -> Dict:
+        """音声データを文字起こし (Transcriber.transcribeと同じ形式)"""
+        return self.transcribe_batch([audio_data], language, decode_options)[0]
+
+    def transcribe_words(self, audio_data: np.ndarray, language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """単語単位の文字起こし (Transcriber.transcribe_wordsと同じ形式)"""
+        records = self._request([audio_data], language, 'words', decode_options)
+        return [
+            {"start": start, "end": end, "word": word, "probability": probability}
+            for start, end, probability, word in records
+        ]
+
+    def transcribe_batch(self, audio_list: List[np.ndarray], language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """複数の音声チャンクをワーカープロセスで文字起こし (Transcriber.transcribe_batchと同じ形式)
+
+        Raises:
+            TranscriptionError: 文字起こしに失敗した場合
+        """
+        lengths = [len(audio_data) for audio_data in audio_list]
+        if sum(lengths) > self.slot_samples and len(audio_list) > 1:
+            # スロットに収まらない場合は分けて送る
+            middle = len(audio_list) // 2
+            return (self.transcribe_batch(audio_list[:middle], language, decode_options)
+                    + self.transcribe_batch(audio_list[middle:], language, decode_options))
+
+        results = []
+        for chunk_language, duration, records in self._request(audio_list, language, 'segments', decode_options):
+            segments = [
+                {"id": i + 1, "start": start, "end": end, "text": text, "confidence": confidence}
+                for i, (start, end, confidence, text) in enumerate(records)
+            ]
+            results.append({"segments": segments, "language": chunk_language, "duration": duration})
+        return results
+
+    def _request(self, audio_list: List[np.ndarray], language: str, kind: str, decode_options: Dict = None):
+        """音声をスロットに書き込んでワーカーへ送り、結果レコードを待つ
+
+        Raises:
+            TranscriptionError: 文字起こしに失敗した場合
+        """
+        if not self.model_loaded:
+            raise TranscriptionError("モデルがロードされていません。先にload_model()を実行してください。")
+        if language is None or language not in Transcriber.SUPPORTED_LANGUAGES:
+            language = self.language
+
+        lengths = [len(audio_data) for audio_data in audio_list]
+        if sum(lengths) > self.slot_samples:
+            raise TranscriptionError(f"チャンクが長すぎます: {sum(lengths)}サンプル")
+
+        slot = self._free_slots.get()
+        request_id = next(self._request_ids)
+        waiter = [threading.Event(), None, None]
+        try:
+            # 共有メモリのスロットへ書き込み、要求は小さなタプルのみ送る
+            position = 0
+            for audio_data in audio_list:
+                self._slots[slot, position:position + len(audio_data)] = audio_data
+                position += len(audio_data)
+            with self._pending_lock:
+                self._pending[request_id] = waiter
+            self._tasks.put((request_id, slot, lengths, language, kind, decode_options))
+
+            # ワーカーの異常終了は_check_workersが検出して失敗を返す
+            while not waiter[0].wait(1.0):
+                if not any(process.is_alive() for process in self._processes):
+                    waiter[1] = ('failed', "ワーカープロセスが終了しました")
+                    break
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            # ワーカーが読み終えてから (結果が届くか、処理中のワーカーが終了してから) スロットを戻す
+            if waiter[1] is not None:
+                self._free_slots.put(slot)
+
+        status, payload = waiter[1]
+        if status != 'result':
+            raise TranscriptionError(f"文字起こしに失敗しました: {payload}")
+        return payload
+
+    def set_language(self, language: str):
+        if language in Transcriber.SUPPORTED_LANGUAGES:
+            self.language = language
+
+    def get_supported_languages(self) -> List[str]:
+        return Transcriber.SUPPORTED_LANGUAGES.copy()
+
+    def is_model_loaded(self) -> bool:
+        return self.model_loaded
+
+    def close(self):
+        """ワーカープロセスを終了し、共有メモリを解放する"""
+        self.model_loaded = False
+        self._closing = True
+        if self._tasks is not None:
+            for _ in self._processes:
+                try:
+                    self._tasks.put(None)
+                except Exception:
+                    pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        if self._results is not None:
+            try:
+                self._results.put(None)
+            except Exception:
+                pass
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=2)
+            self._dispatcher = None
+        self._tasks = None
+        self._results = None
+
+        # 待機中の呼び出しを解放
+        with self._pending_lock:
+            for waiter in self._pending.values():
+                waiter[1] = ('failed', "ワーカープロセスが終了しました")
+                waiter[0].set()
+            self._pending.clear()
+
+        self._free_slots = queue.Queue()
+        self._slots = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except Exception as e:
+                logger.debug(f"共有メモリの解放エラー (無視): {e}")
+            self._shm = None
+        self._exited_workers = set()
+        self._closing = False
@@ -0,0 +1,218 @@
+"""
+OfflineVoiceLogger - 精緻化モジュール
+
+小さいモデルのプレビュー結果を、大きいモデルで後から再デコードして置き換える
+- プレビュー済みの音声をソースごとに連続した長めの窓へまとめる
+- プレビューのキューが空いている間だけデコードする (低優先度)
+- 結果は窓の時間範囲付きで返し、その範囲のプレビューのセグメントと置き換える
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RefinementLane:
+    """大きいモデルでプレビュー済みの音声を再デコードするバックグラウンドレーン
+
+    add()は文字起こし結果の送出と同じ順 (ソースごとにオフセット順) に呼ぶ。
+    各チャンクのうち進み幅分だけを使うため、重なり窓 (sliding) でも音声が重複しない。
+    結果は {"segments", "language", "duration", "refined": (ソース, 開始, 終了)} の辞書で
+    emitへ渡す (セグメントの時刻は絶対時刻)。
+    """
+
+    def __init__(self, transcriber, emit: Callable[[Dict], None], sample_rate: int = 16000,
+                 window_seconds: float = 20.0, busy: Callable[[], bool] = None):
+        """
+        Args:
+            transcriber: 精緻化に使う文字起こしオブジェクト (大きいモデル)
+            emit (Callable): 精緻化した結果を受け取る関数 (レーンのスレッドから呼ばれる)
+            sample_rate (int): サンプリングレート
+            window_seconds (float): 1回に再デコードする窓の長さ (秒、30秒まで)
+            busy (Callable): Trueを返す間はデコードを待つ (プレビューの処理待ちがある場合など)
+        """
+        self.transcriber = transcriber
+        self.emit = emit
+        self.sample_rate = sample_rate
+        self.window_samples = int(sample_rate * min(window_seconds, 30.0))
+        self.busy = busy
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()  # (世代, ソース, 開始時刻, 音声, 言語)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = 0  # 予約済みでまだ送出していない窓の数
+        self.reset()
+
+    def reset(self):
+        """蓄積中の音声と未処理の窓を破棄し、統計をリセット (録音開始時に呼ぶ)
+
+        世代を進めるため、デコード中の古い窓の結果も送出しない。
+        """
+        with self._lock:
+            self._generation = getattr(self, '_generation', 0) + 1
+            self._buffers: Dict[str, Tuple[float, List[np.ndarray], int, np.ndarray, str]] = {}
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending -= 1
+            self.refined_windows = 0
+            self.refined_seconds = 0.0
+            self.decode_time = 0.0
+            self.max_backlog = 0
+
+    def start(self):
+        """レーンのスレッドを起動"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info("精緻化レーン開始")
+
+    def close(self):
+        """レーンのスレッドを停止"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def add(self, source: str, pieces: List[Tuple[np.ndarray, float, int]], language: str = None):
+        """プレビュー済みの音声を追加し、窓が埋まったら精緻化を予約する
+
+        Args:
+            source (str): ソース名
+            pieces (List[Tuple]): (音声, 開始時刻, 進み幅サンプル数) のリスト (オフセット順)
+            language (str): 言語
+        """
+        with self._lock:
+            for data, offset, hop in pieces:
+                hop = min(hop, len(data))
+                buffered = self._buffers.get(source)
+                if buffered is not None:
+                    start, _, samples, _, _ = buffered
+                    gap = abs(offset - (start + samples / self.sample_rate)) > 0.05
+                    # 連続しない (無音の読み飛ばしなど) か窓を超える場合は先に確定する
+                    if gap or samples + hop > self.window_samples:
+                        self._enqueue(source, include_tail=gap)
+                        buffered = None
+                if buffered is None:
+                    start, parts, samples = offset, [], 0
+                else:
+                    start, parts, samples = buffered[:3]
+                parts.append(data[:hop])
+                # 次のチャンクと重ならない末尾は、途切れた場合のみ窓に含める
+                self._buffers[source] = (start, parts, samples + hop, data[hop:], language)
+                if samples + hop >= self.window_samples:
+                    self._enqueue(source, include_tail=False)
+
+    def flush(self):
+        """蓄積中の音声をすべて精緻化に回す (入力の終わり・録音停止時)"""
+        with self._lock:
+            for source in list(self._buffers):
+                self._enqueue(source, include_tail=True)
+
+    def _enqueue(self, source: str, include_tail: bool):
+        """ソースの蓄積中の音声を1つの窓として予約する (ロック内で呼ぶ)"""
+        start, parts, samples, tail, language = self._buffers.pop(source)
+        if len(tail):
+            if include_tail:
+                parts.append(tail)
+            else:
+                # 末尾は次のチャンクが来なかった場合に備えて残しておく
+                self._buffers[source] = (start + samples / self.sample_rate, [], 0, tail, language)
+        if not parts:
+            return
+        audio = np.concatenate(parts)[:int(self.sample_rate * 30)]
+        self._queue.put((self._generation, source, start, audio, language))
+        self._pending += 1
+        self.max_backlog = max(self.max_backlog, self._queue.qsize())
+
+    def is_idle(self) -> bool:
+        """蓄積中・未処理・デコード中の窓がないか"""
+        with self._lock:
+            return not self._buffers and self._pending == 0
+
+    def backlog_seconds(self) -> float:
+        """精緻化待ちの音声の長さ (秒、蓄積中を含む)"""
+        with self._lock:
+            queued = sum(len(item[3]) for item in list(self._queue.queue))
+            buffered = sum(samples for _, _, samples, _, _ in self._buffers.values())
+        return (queued + buffered) / self.sample_rate
+
+    def _run(self):
+        """窓を取り出して大きいモデルで再デコードする (別スレッド)"""
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            items = [item]
+            try:
+                # プレビューに処理待ちがある間はCPUを譲る
+                while self.busy is not None and self.busy() and not self._stop.is_set():
+                    time.sleep(0.1)
+                # 溜まっている窓はバッチ推論でまとめてデコードする
+                batch_size = getattr(self.transcriber, 'batch_size', 1)
+                while len(items) < batch_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._refine(items)
+            except Exception as e:
+                logger.error(f"精緻化エラー: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._pending -= len(items)
+
+    def _refine(self, items: List[Tuple]):
+        """窓をデコードし、時間範囲付きの結果を送出する"""
+        language = items[0][4]
+        decode_start = time.time()
+        if len(items) == 1:
+            results = [self.transcriber.transcribe(items[0][3], language)]
+        else:
+            results = self.transcriber.transcribe_batch([audio for _, _, _, audio, _ in items], language)
+        decode_time = time.time() - decode_start
+
+        with self._lock:
+            generation = self._generation
+            self.decode_time += decode_time
+        for (item_generation, source, start, audio, _), result in zip(items, results):
+            if item_generation != generation:
+                continue
+            end = start + len(audio) / self.sample_rate
+            for segment in result['segments']:
+                segment['start'] += start
+                segment['end'] += start
+                segment['source'] = source
+            result['refined'] = (source, start, end)
+            with self._lock:
+                self.refined_windows += 1
+                self.refined_seconds += len(audio) / self.sample_rate
+            self.emit(result)
+            logger.info(f"精緻化完了 (ソース={source}, {start:.1f}-{end:.1f}秒): {len(result['segments'])}セグメント")
+
+    def get_stats(self) -> Dict:
+        """精緻化の統計を取得
+
+        Returns:
+            Dict: refined_windows, refined_seconds, decode_time, max_backlog, backlog_seconds
+        """
+        with self._lock:
+            stats = {
+                'refined_windows': self.refined_windows,
+                'refined_seconds': self.refined_seconds,
+                'decode_time': self.decode_time,
+                'max_backlog': self.max_backlog,
+            }
+        stats['backlog_seconds'] = self.backlog_seconds()
+        return stats
@@ -0,0 +1,109 @@
+"""
+OfflineVoiceLogger - リサンプリングモジュール
+
+デバイスのネイティブサンプリングレートから16kHzへの変換
+- 有理数比のポリフェーズFIRフィルタ (カイザー窓付きsinc)
+- ブロック単位のストリーミング処理 (コールバック間で状態を保持)
+- NumPyのみでベクトル化
+"""
+
+import math
+import time
+import numpy as np
+from typing import Dict
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StreamingResampler:
+    """ブロックストリーミング対応のポリフェーズリサンプラー"""
+
+    def __init__(self, input_rate: int, output_rate: int = 16000,
+                 taps_per_phase: int = 48, kaiser_beta: float = 8.0):
+        """
+        Args:
+            input_rate (int): 入力サンプリングレート (例: 44100, 48000)
+            output_rate (int): 出力サンプリングレート (既定: 16000)
+            taps_per_phase (int): 1位相あたりのタップ数 (大きいほど高品質・高負荷)
+            kaiser_beta (float): カイザー窓のβ (阻止域減衰)
+        """
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        g = math.gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate // g
+        self.down = self.input_rate // g
+        self.taps_per_phase = taps_per_phase
+
+        # アップサンプル後の領域で設計するローパスフィルタ
+        num_taps = taps_per_phase * self.up
+        cutoff = 0.9 / max(self.up, self.down)  # ナイキスト比 (少し余裕を持たせる)
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        h = cutoff * np.sinc(cutoff * n) * np.kaiser(num_taps, kaiser_beta)
+        h *= self.up / h.sum()  # ゼロ挿入分のゲインを補償
+
+        # ポリフェーズ分解: phases[p, k] = h[p + k*up]
+        self._phases = h.reshape(taps_per_phase, self.up).T.astype(np.float32)
+        self._tap_index = np.arange(taps_per_phase)
+
+        self.reset()
+
+        logger.info(f"StreamingResampler初期化: {self.input_rate}Hz → {self.output_rate}Hz "
+                    f"(L={self.up}, M={self.down}, {taps_per_phase}タップ/位相)")
+
+    def reset(self):
+        """フィルタ状態と統計をリセット"""
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        # 次の出力サンプルのアップサンプル領域での位置 (現在ブロック先頭基準)
+        self._position = 0
+
+        self.input_samples = 0
+        self.output_samples = 0
+        self.process_time = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """1ブロックをリサンプリング
+
+        Args:
+            block (np.ndarray): 入力音声 (1次元, float32)
+
+        Returns:
+            np.ndarray: リサンプリング後の音声 (float32)
+        """
+        start = time.perf_counter()
+        length = len(block)
+        extended = np.concatenate((self._history, block.astype(np.float32, copy=False)))
+
+        # このブロック内で出力できる位置を一括計算
+        positions = np.arange(self._position, length * self.up, self.down)
+        if len(positions) > 0:
+            phase = positions % self.up
+            base = positions // self.up + (self.taps_per_phase - 1)
+            windows = extended[base[:, None] - self._tap_index[None, :]]
+            output = np.einsum('ij,ij->i', windows, self._phases[phase]).astype(np.float32)
+            self._position = int(positions[-1]) + self.down - length * self.up
+        else:
+            output = np.zeros(0, dtype=np.float32)
+            self._position -= length * self.up
+
+        self._history = extended[len(extended) - (self.taps_per_phase - 1):].copy()
+
+        self.input_samples += length
+        self.output_samples += len(output)
+        self.process_time += time.perf_counter() - start
+        return output
+
+    def get_stats(self) -> Dict:
+        """変換コストの統計を取得
+
+        Returns:
+            Dict: 入出力サンプル数、処理時間、実時間比
+        """
+        audio_seconds = self.input_samples / self.input_rate if self.input_rate else 0.0
+        return {
+            "input_samples": self.input_samples,
+            "output_samples": self.output_samples,
+            "process_time": self.process_time,
+            # 1秒の音声の変換に要する時間 (秒)
+            "real_time_factor": self.process_time / audio_seconds if audio_seconds > 0 else 0.0,
+        }
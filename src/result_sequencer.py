@@ -0,0 +1,66 @@
+"""
+OfflineVoiceLogger - 結果の並べ替えモジュール
+
+複数の文字起こしワーカーが並行に処理した結果を、キューから取り出した順に戻す
+- 取り出し時に連番を発行し、完了した結果は連番が揃うまで保留
+- 処理に失敗したチャンクも完了として扱い、後続を止めない
+"""
+
+import threading
+from typing import Any, Callable, Dict
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResultSequencer:
+    """並行処理の結果を発行順に送り出すクラス
+
+    issue()はキューからの取り出しと同じロック内で呼び、取り出し順と連番を一致させる。
+    emitは連番順に、同時に1つのスレッドからのみ呼ばれる
+    (ソースごとの状態を持つ処理を安全に呼べる)。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """連番と保留中の結果をリセット (録音開始時に呼ぶ)"""
+        with self._lock:
+            self._next_issue = 0
+            self._next_emit = 0
+            self._pending: Dict[int, Any] = {}
+            self.max_pending = 0  # 保留した結果の最大数 (並べ替えの待ち)
+
+    def issue(self) -> int:
+        """次の連番を発行
+
+        Returns:
+            int: 連番
+        """
+        with self._lock:
+            sequence = self._next_issue
+            self._next_issue += 1
+            return sequence
+
+    def complete(self, sequence: int, value: Any, emit: Callable[[Any], None]):
+        """結果を登録し、連番が揃った分をemitで送り出す
+
+        Args:
+            sequence (int): issue()で発行した連番
+            value: 結果 (失敗時はNone)
+            emit (Callable): 結果を送り出す関数
+        """
+        with self._lock:
+            self._pending[sequence] = value
+            self.max_pending = max(self.max_pending, len(self._pending))
+            while self._next_emit in self._pending:
+                ready = self._pending.pop(self._next_emit)
+                self._next_emit += 1
+                if ready is None:
+                    continue
+                try:
+                    emit(ready)
+                except Exception as e:
+                    logger.error(f"結果の送出エラー: {e}")
@@ -0,0 +1,114 @@
+"""
+OfflineVoiceLogger - セグメント統合モジュール
+
+重なりのある窓 (slidingモード) の文字起こし結果をタイムスタンプで統合する
+- 各窓が担当する時間範囲 (重なりの中央で分割) に属するセグメントのみ採用
+- 既に確定した時間範囲と大きく重なるセグメントを除外
+- 重なりによる追加デコード量の集計
+"""
+
+from typing import Dict, List
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SegmentStitcher:
+    """重なり窓のセグメントを時刻ベースで統合するクラス
+
+    窓はオフセット順に渡されることを前提とする。
+    """
+
+    def __init__(self, window_seconds: float, hop_seconds: float):
+        """
+        Args:
+            window_seconds (float): 窓の長さ (秒)
+            hop_seconds (float): 窓の進み幅 (秒)
+        """
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        # 前後の窓との重なり幅の半分 - ここで担当範囲を分割する
+        self.half_overlap = max(0.0, window_seconds - hop_seconds) / 2
+
+        self.reset()
+
+    def reset(self):
+        """状態と統計をリセット (録音開始時に呼ぶ)"""
+        self.committed_end = 0.0  # 確定済みセグメントの終了時刻
+        self.is_first_window = True
+
+        # 統計
+        self.decoded_seconds = 0.0  # デコードした音声の合計 (秒)
+        self.timeline_seconds = 0.0  # タイムラインの進み (秒)
+        self.decode_time = 0.0  # デコードに要した時間 (秒)
+        self.dropped_segments = 0
+
+    def stitch(self, segments: List[Dict], offset: float, window_duration: float,
+               hop_duration: float, decode_time: float = 0.0) -> List[Dict]:
+        """1つの窓のセグメントから採用するものを選ぶ
+
+        Args:
+            segments (List[Dict]): オフセット適用済みのセグメント
+            offset (float): 窓の開始時刻 (秒)
+            window_duration (float): 窓の長さ (秒)
+            hop_duration (float): タイムラインの進み幅 (秒)
+            decode_time (float): この窓のデコード時間 (秒)
+
+        Returns:
+            List[Dict]: 採用されたセグメント
+        """
+        self.decoded_seconds += window_duration
+        self.timeline_seconds += hop_duration
+        self.decode_time += decode_time
+
+        # この窓が担当する範囲 [own_start, own_end)
+        own_start = offset if self.is_first_window else offset + self.half_overlap
+        own_end = offset + window_duration - self.half_overlap
+        self.is_first_window = False
+
+        accepted = []
+        for segment in segments:
+            midpoint = (segment['start'] + segment['end']) / 2
+            if not (own_start <= midpoint < own_end):
+                self.dropped_segments += 1
+                logger.debug(f"担当範囲外のセグメントを除外: [{segment['start']:.2f}-{segment['end']:.2f}]")
+                continue
+
+            # 確定済み範囲との重なりが半分以上なら除外
+            duration = max(segment['end'] - segment['start'], 1e-6)
+            overlap = self.committed_end - segment['start']
+            if overlap / duration >= 0.5:
+                self.dropped_segments += 1
+                logger.debug(f"確定済み範囲と重なるセグメントを除外: [{segment['start']:.2f}-{segment['end']:.2f}]")
+                continue
+
+            accepted.append(segment)
+            self.committed_end = max(self.committed_end, segment['end'])
+
+        return accepted
+
+    def get_overhead_ratio(self) -> float:
+        """重なりによる追加デコード量の比率を取得
+
+        Returns:
+            float: 0.5ならタイムラインより50%多くデコードしている
+        """
+        if self.timeline_seconds <= 0:
+            return 0.0
+        return self.decoded_seconds / self.timeline_seconds - 1.0
+
+    def get_stats(self) -> Dict:
+        """統計情報を取得
+
+        Returns:
+            Dict: デコード量・タイムライン長・追加コストなど
+        """
+        overhead = self.get_overhead_ratio()
+        return {
+            "decoded_seconds": self.decoded_seconds,
+            "timeline_seconds": self.timeline_seconds,
+            "overhead_ratio": overhead,
+            # 追加分の音声にかかったと推定されるデコード時間
+            "overhead_decode_time": self.decode_time * overhead / (1.0 + overhead),
+            "dropped_segments": self.dropped_segments,
+        }
@@ -0,0 +1,253 @@
+"""
+OfflineVoiceLogger - ストリーミング文字起こしモジュール
+
+伸びていく音声バッファを短い間隔で再デコードし、低遅延で文字を表示する
+- 連続する2回の仮説で一致した先頭部分のみを確定 (local agreement)
+- 確定していない部分は仮テキストとして別に表示
+- 確定した位置で音声バッファを切り詰め、同じ音声を何度もデコードしない
+"""
+
+import numpy as np
+from typing import Dict, List
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 文の区切りとみなす文字
+SENTENCE_ENDINGS = ('。', '！', '？', '!', '?', '.', '．')
+
+
+def _normalize(word: Dict) -> str:
+    return word['word'].strip().lower()
+
+
+class HypothesisBuffer:
+    """連続する仮説の一致部分を確定する単語バッファ
+
+    単語は {'start', 'end', 'word', 'probability'} の辞書 (時刻は絶対時刻)。
+    """
+
+    def __init__(self):
+        self.committed_in_buffer: List[Dict] = []  # 音声バッファ内の確定済み単語
+        self.buffer: List[Dict] = []  # 前回の仮説の未確定部分
+        self.new: List[Dict] = []  # 今回の仮説
+        self.last_committed_time = 0.0
+
+    def insert(self, words: List[Dict]):
+        """新しい仮説を登録 (確定済みの範囲と重なる単語は除く)
+
+        Args:
+            words (List[Dict]): 今回の仮説の単語
+        """
+        self.new = [w for w in words if w['start'] > self.last_committed_time - 0.1]
+
+        # 確定済みの末尾と同じ単語列で始まる場合は取り除く (最大5単語)
+        if self.new and self.committed_in_buffer and abs(self.new[0]['start'] - self.last_committed_time) < 1.0:
+            for n in range(min(len(self.committed_in_buffer), len(self.new), 5), 0, -1):
+                committed_tail = [_normalize(w) for w in self.committed_in_buffer[-n:]]
+                new_head = [_normalize(w) for w in self.new[:n]]
+                if committed_tail == new_head:
+                    del self.new[:n]
+                    break
+
+    def flush(self) -> List[Dict]:
+        """前回と今回の仮説で一致する先頭部分を確定する
+
+        Returns:
+            List[Dict]: 新たに確定した単語
+        """
+        committed = []
+        while self.new and self.buffer and _normalize(self.new[0]) == _normalize(self.buffer[0]):
+            word = self.new.pop(0)
+            self.buffer.pop(0)
+            committed.append(word)
+            self.last_committed_time = word['end']
+        self.buffer = self.new
+        self.new = []
+        self.committed_in_buffer.extend(committed)
+        return committed
+
+    def complete(self) -> List[Dict]:
+        """未確定の単語をすべて確定する (入力の終わりなど)"""
+        words = self.buffer
+        if words:
+            self.last_committed_time = words[-1]['end']
+        self.committed_in_buffer.extend(words)
+        self.buffer = []
+        return words
+
+    def pop_committed(self, time: float):
+        """音声バッファから切り詰めた範囲の確定済み単語を除く"""
+        self.committed_in_buffer = [w for w in self.committed_in_buffer if w['end'] > time]
+
+
+class StreamingProcessor:
+    """1ソース分のストリーミング文字起こしの状態
+
+    音声を追加するたびにprocess()でバッファ全体を再デコードし、確定した単語を
+    文単位のセグメントにまとめて返す。文の途中まで確定した部分はcommitted_text、
+    未確定の部分はtentative_textとして参照できる (UIスレッドから読み取り可)。
+    """
+
+    def __init__(self, sample_rate: int = 16000, max_buffer_seconds: float = 15.0,
+                 trim_seconds: float = 6.0, sentence_gap_seconds: float = 1.0,
+                 max_sentence_chars: int = 80):
+        """
+        Args:
+            sample_rate (int): サンプリングレート
+            max_buffer_seconds (float): これを超えたら未確定部分も確定してバッファを空にする (秒)
+            trim_seconds (float): 文の途中でもバッファを切り詰める長さ (秒)
+            sentence_gap_seconds (float): セグメントを区切る単語間の無音 (秒)
+            max_sentence_chars (int): セグメントを区切る文字数
+        """
+        self.sample_rate = sample_rate
+        self.max_buffer_samples = int(sample_rate * max_buffer_seconds)
+        self.trim_samples = int(sample_rate * trim_seconds)
+        self.sentence_gap_seconds = sentence_gap_seconds
+        self.max_sentence_chars = max_sentence_chars
+        self.reset()
+
+    def reset(self):
+        """状態と統計をリセット (録音開始時に呼ぶ)"""
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0  # バッファ先頭の絶対時刻 (秒)
+        self.hypothesis = HypothesisBuffer()
+        self.open_words: List[Dict] = []  # 確定済みだが文が終わっていない単語
+        self.committed_text = ""
+        self.tentative_text = ""
+
+        # 統計
+        self.decode_count = 0
+        self.decoded_seconds = 0.0
+        self.received_seconds = 0.0
+
+    @property
+    def buffer_end(self) -> float:
+        return self.buffer_start + len(self.audio) / self.sample_rate
+
+    def insert_audio(self, data: np.ndarray, offset: float) -> List[Dict]:
+        """音声を追加する
+
+        前の音声と連続しない場合 (無音の読み飛ばしや再接続) は、
+        それまでの仮説を確定してから新しいバッファを始める。
+
+        Args:
+            data (np.ndarray): 音声データ
+            offset (float): 音声の開始時刻 (秒)
+
+        Returns:
+            List[Dict]: 途切れにより確定したセグメント
+        """
+        segments = []
+        if len(self.audio) and abs(offset - self.buffer_end) > 0.05:
+            segments = self.finish()
+        if not len(self.audio):
+            self.buffer_start = offset
+        self.audio = np.concatenate((self.audio, data.astype(np.float32, copy=False)))
+        self.received_seconds += len(data) / self.sample_rate
+        return segments
+
+    def process(self, transcriber, language: str = None, decode_options: Dict = None) -> List[Dict]:
+        """バッファ全体を再デコードし、一致した部分を確定する
+
+        Args:
+            transcriber: transcribe_wordsを持つ文字起こしオブジェクト
+            language (str): 言語
+            decode_options (Dict): デコードパラメータの上書き (beam_sizeなど)
+
+        Returns:
+            List[Dict]: 文が完結して確定したセグメント
+        """
+        if len(self.audio) < self.sample_rate // 2:
+            return []
+
+        words = transcriber.transcribe_words(self.audio, language, decode_options)
+        self.decode_count += 1
+        self.decoded_seconds += len(self.audio) / self.sample_rate
+        for word in words:
+            word['start'] += self.buffer_start
+            word['end'] += self.buffer_start
+
+        self.hypothesis.insert(words)
+        committed = self.hypothesis.flush()
+        segments = self._commit(committed)
+
+        if len(self.audio) > self.max_buffer_samples:
+            # 長く一致しない場合は現在の仮説を確定して空にする
+            segments += self._commit(self.hypothesis.complete())
+            segments += self._close_sentence()
+            self._trim(self.buffer_end)
+        elif committed and (not self.open_words or len(self.audio) > self.trim_samples):
+            # 文の終わり (または長くなった場合は確定位置) で切り詰める
+            self._trim(self.hypothesis.last_committed_time)
+
+        self._update_texts()
+        return segments
+
+    def finish(self) -> List[Dict]:
+        """未確定の部分をすべて確定し、バッファを空にする
+
+        Returns:
+            List[Dict]: 確定したセグメント
+        """
+        segments = self._commit(self.hypothesis.complete())
+        segments += self._close_sentence()
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.hypothesis = HypothesisBuffer()
+        self._update_texts()
+        return segments
+
+    def get_stats(self) -> Dict:
+        """再デコードの統計を取得
+
+        Returns:
+            Dict: decode_count, decoded_seconds, received_seconds, redecode_factor
+        """
+        return {
+            'decode_count': self.decode_count,
+            'decoded_seconds': self.decoded_seconds,
+            'received_seconds': self.received_seconds,
+            'redecode_factor': self.decoded_seconds / self.received_seconds if self.received_seconds else 0.0,
+        }
+
+    def _commit(self, words: List[Dict]) -> List[Dict]:
+        """確定した単語を文にまとめ、完結した文をセグメントとして返す"""
+        segments = []
+        for word in words:
+            if self.open_words and word['start'] - self.open_words[-1]['end'] > self.sentence_gap_seconds:
+                segments += self._close_sentence()
+            self.open_words.append(word)
+            text = word['word'].strip()
+            if (text.endswith(SENTENCE_ENDINGS)
+                    or sum(len(w['word']) for w in self.open_words) >= self.max_sentence_chars):
+                segments += self._close_sentence()
+        return segments
+
+    def _close_sentence(self) -> List[Dict]:
+        """途中の文をセグメントにする"""
+        if not self.open_words:
+            return []
+        words, self.open_words = self.open_words, []
+        probability = float(np.mean([w.get('probability', 1.0) for w in words]))
+        return [{
+            "id": 1,
+            "start": words[0]['start'],
+            "end": words[-1]['end'],
+            "text": "".join(w['word'] for w in words).strip(),
+            "confidence": float(np.log(max(probability, 1e-6))),
+        }]
+
+    def _trim(self, time: float):
+        """指定時刻より前の音声をバッファから除く"""
+        samples = int(round((time - self.buffer_start) * self.sample_rate))
+        samples = min(max(samples, 0), len(self.audio))
+        if samples == 0:
+            return
+        self.audio = self.audio[samples:].copy()
+        self.buffer_start += samples / self.sample_rate
+        self.hypothesis.pop_committed(self.buffer_start)
+
+    def _update_texts(self):
+        """UI表示用のテキストを更新"""
+        self.committed_text = "".join(w['word'] for w in self.open_words).strip()
+        self.tentative_text = "".join(w['word'] for w in self.hypothesis.buffer).strip()
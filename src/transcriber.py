@@ -6,9 +6,12 @@ faster-whisperを使用した音声→テキスト変換
 - 日本語/英語対応
 - VADフィルター適用
 - ハルシネーション抑制
+- 溜まったチャンクのバッチ推論 (BatchedInferencePipeline)
 """
 
 import os
+import threading
+import time
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -32,8 +35,30 @@ class TranscriptionError(Exception):
     pass
 
 
+def split_cpu_threads(num_workers: int, total_threads: int = None) -> int:
+    """CPUコアを並行デコード数で分け、1デコードあたりのスレッド数を求める
+
+    CTranslate2はnum_workers個のデコードを並行に実行し (inter-op)、
+    各デコードはcpu_threads個のスレッドを使う (intra-op)。
+    合計がコア数を超えると互いに奪い合って遅くなるため、コア数を等分する。
+
+    Args:
+        num_workers (int): 並行デコード数
+        total_threads (int): 使うスレッドの合計 (Noneの場合は論理コア数)
+
+    Returns:
+        int: 1デコードあたりのスレッド数
+    """
+    total_threads = total_threads or os.cpu_count() or 1
+    return max(1, total_threads // max(1, num_workers))
+
+
 class Transcriber:
-    """文字起こしクラス (faster-whisper使用)"""
+    """文字起こしクラス (faster-whisper使用)
+
+    num_workersを2以上にすると、1つのモデルを複数スレッドから同時に
+    transcribeできる (CTranslate2が並行にデコードする)。
+    """
 
     # サポートされている言語
     SUPPORTED_LANGUAGES = ['ja', 'en']
@@ -43,13 +68,20 @@ class Transcriber:
 
     def __init__(self, model_path: str, device: str = "cpu",
                  compute_type: str = "int8", language: str = "ja",
-                 cpu_threads: int = None, num_workers: int = 1):
+                 cpu_threads: int = None, num_workers: int = 1, batch_size: int = 1,
+                 warmup_seconds: float = 0.0, warmup_decode_options: Dict = None):
         """
         Args:
             model_path (str): ローカルモデルパス
             device (str): "cpu" or "cuda"
             compute_type (str): "int8", "float16", "float32"
             language (str): "ja" or "en"
+            cpu_threads (int): 1デコードあたりのスレッド数 (Noneの場合は既定)
+            num_workers (int): 同時にtranscribeできる数 (並行デコード数)
+            batch_size (int): 1回のバッチ推論でまとめるチャンクの最大数 (1の場合はバッチ推論なし)
+            warmup_seconds (float): ロード直後にデコードする合成音声の長さ (0の場合はウォームアップなし)
+            warmup_decode_options (Dict): ウォームアップで使うデコードパラメータの上書き
+                (録音の最初のチャンクと同じ値を渡す)
         """
         self.model_path = Path(model_path)
         self.device = device
@@ -57,11 +89,22 @@ class Transcriber:
         self.language = language if language in self.SUPPORTED_LANGUAGES else "ja"
         # リソース制御
         self.cpu_threads = cpu_threads
-        self.num_workers = num_workers
+        self.num_workers = max(1, int(num_workers or 1))
+
+        self.batch_size = max(1, int(batch_size))
 
         self.model = None
+        self.batched_model = None  # BatchedInferencePipeline (batch_size > 1の場合)
         self.model_loaded = False
 
+        # ウォームアップ (ロード後の初回デコードの遅さを録音前に済ませる)
+        self.warmup_seconds = warmup_seconds
+        self.warmup_decode_options = dict(warmup_decode_options or {})
+        self.warmup_stats = None
+        self._warmup_thread = None
+        self._warmup_cancel = threading.Event()
+        self._warmup_cancel_time = None
+
         # VAD設定
         self.vad_parameters = {
             'threshold': 0.5,
@@ -123,14 +166,35 @@ class Transcriber:
                 "download_root": None,   # ダウンロード無効化
                 "local_files_only": True # ローカルのみ
             }
-            # スレッド数は指定しない（デフォルトに任せる）
-            # cpu_threadsやnum_workersを設定すると初期化が遅くなる場合がある
+            # スレッド数は明示された場合のみ指定する（単一ワーカーではデフォルトに任せる）
+            # 不要にcpu_threadsやnum_workersを設定すると初期化が遅くなる場合がある
+            if self.cpu_threads:
+                whisper_kwargs["cpu_threads"] = max(1, int(self.cpu_threads))
+            if self.num_workers > 1:
+                whisper_kwargs["num_workers"] = self.num_workers
 
             self.model = WhisperModel(**whisper_kwargs)
 
+            # バッチ推論パイプライン (古いfaster-whisperにはないため、その場合は逐次処理)
+            self.batched_model = None
+            if self.batch_size > 1:
+                try:
+                    from faster_whisper import BatchedInferencePipeline
+                    self.batched_model = BatchedInferencePipeline(model=self.model)
+                    logger.info(f"バッチ推論を有効化: 最大{self.batch_size}チャンク")
+                except ImportError:
+                    logger.warning("このfaster-whisperはバッチ推論に対応していません。逐次処理します")
+
             print("[Transcriber] WhisperModel初期化完了!")
             self.model_loaded = True
             logger.info("モデルロード完了")
+
+            # ウォームアップは裏で行い、最初の文字起こしが来たら打ち切る
+            if self.warmup_seconds > 0:
+                self._warmup_cancel.clear()
+                self._warmup_cancel_time = None
+                self._warmup_thread = threading.Thread(target=self.warmup, daemon=True)
+                self._warmup_thread.start()
             return True
 
         except ModelNotFoundError:
@@ -140,12 +204,13 @@ class Transcriber:
             self.model_loaded = False
             raise ModelLoadError(f"モデルのロードに失敗しました: {e}")
 
-    def transcribe(self, audio_data: np.ndarray, language: str = None) -> Dict:
+    def transcribe(self, audio_data: np.ndarray, language: str = None, decode_options: Dict = None) -> Dict:
         """音声データを文字起こし
 
         Args:
-            audio_data (np.ndarray): 音声データ (16kHz, モノラル)
+            audio_data (np.ndarray): 音声データ (16kHz, モノラル, 読み取り専用ビュー可)
             language (str): "ja" or "en" (Noneの場合はデフォルト言語を使用)
+            decode_options (Dict): 既定のデコードパラメータを上書きする値 (beam_sizeなど)
 
         Returns:
             Dict: {
@@ -168,6 +233,7 @@ class Transcriber:
         """
         if not self.model_loaded or self.model is None:
             raise TranscriptionError("モデルがロードされていません。先にload_model()を実行してください。")
+        self.cancel_warmup()
 
         if language is None:
             language = self.language
@@ -180,6 +246,7 @@ class Transcriber:
             logger.info(f"文字起こし開始: 言語={language}, データ長={len(audio_data)}サンプル")
 
             # 音声データの正規化 (float32, -1.0～1.0の範囲)
+            # float32の読み取り専用ビューはコピーせずにそのまま使用する
             if audio_data.dtype != np.float32:
                 audio_data = audio_data.astype(np.float32)
 
@@ -200,33 +267,14 @@ class Transcriber:
             # ハルシネーション抑制のため、initial_promptは使用しない
             # プロンプトを与えると、それ自体がハルシネーションの原因になる
 
-            transcribe_params = {
-                'language': language,
-                'vad_filter': False,  # VADフィルター無効
-                'beam_size': 5,  # ビームサイズ（デフォルト: 5）
-                'best_of': 5,  # 5つの候補から最良のものを選択
-                'temperature': 0.0,  # 確定的な認識（ハルシネーション抑制）
-                'condition_on_previous_text': False,  # 前のテキストに依存しない（ハルシネーション抑制）
-                'compression_ratio_threshold': 2.4,  # ハルシネーション検出の閾値
-                'log_prob_threshold': -1.0,  # 低確率セグメントの閾値
-                'no_speech_threshold': 0.8,  # 無音判定の閾値（0.6→0.8に上げて厳しく）
-                'initial_prompt': None,  # プロンプトなし（ハルシネーション防止）
-                'word_timestamps': False,  # 単語レベルのタイムスタンプは不要
-            }
+            transcribe_params = self._transcribe_params(language, decode_options)
 
             segments, info = self.model.transcribe(audio_data, **transcribe_params)
 
             # セグメントを処理
             result_segments = []
             for i, segment in enumerate(segments):
-                segment_dict = {
-                    "id": i + 1,
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text.strip(),
-                    "confidence": segment.avg_logprob if hasattr(segment, 'avg_logprob') else 0.0
-                }
-                result_segments.append(segment_dict)
+                result_segments.append(self._segment_to_dict(segment, i + 1))
                 logger.debug(f"セグメント {i+1}: [{segment.start:.2f}-{segment.end:.2f}] {segment.text.strip()}")
 
             # セグメントをマージして自然な文の区切りにする
@@ -245,6 +293,241 @@ class Transcriber:
             logger.error(f"文字起こしエラー: {e}")
             raise TranscriptionError(f"文字起こしに失敗しました: {e}")
 
+    def transcribe_batch(self, audio_list: List[np.ndarray], language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """複数の音声チャンクを1回のバッチ推論で文字起こし
+
+        チャンクを連結し、各チャンクの区間をclip_timestampsとして渡すことで
+        チャンクの境界をまたがないままエンコーダ・デコーダをバッチ実行する。
+        結果のセグメントは区間ごとに振り分け、各チャンク先頭からの時刻に戻す。
+        バッチ推論が使えない場合は1チャンクずつtranscribeを呼ぶ。
+
+        Args:
+            audio_list (List[np.ndarray]): 音声データのリスト (16kHz, モノラル)
+            language (str): "ja" or "en" (Noneの場合はデフォルト言語を使用)
+            decode_options (Dict): 既定のデコードパラメータを上書きする値
+
+        Returns:
+            List[Dict]: チャンクごとのtranscribeと同じ形式の結果 (audio_listと同じ順)
+
+        Raises:
+            TranscriptionError: 文字起こしに失敗した場合
+        """
+        if self.batched_model is None or len(audio_list) < 2:
+            return [self.transcribe(audio_data, language, decode_options) for audio_data in audio_list]
+        self.cancel_warmup()
+
+        if language is None or language not in self.SUPPORTED_LANGUAGES:
+            language = self.language
+
+        try:
+            sample_rate = 16000  # 16kHzを仮定
+            durations = [len(audio_data) / sample_rate for audio_data in audio_list]
+            starts = [float(start) for start in np.concatenate(([0.0], np.cumsum(durations)[:-1]))]
+            # 0.1秒未満のチャンクは単独の場合と同様にデコードしない
+            clips = [
+                {"start": start, "end": start + duration}
+                for start, duration in zip(starts, durations) if duration >= 0.1
+            ]
+            logger.info(f"バッチ文字起こし開始: {len(audio_list)}チャンク, 言語={language}, "
+                        f"合計{sum(durations):.2f}秒")
+
+            chunk_segments = [[] for _ in audio_list]
+            info_language = language
+            if clips:
+                audio = np.concatenate(audio_list).astype(np.float32, copy=False)
+                transcribe_params = self._transcribe_params(language, decode_options)
+                transcribe_params.update({
+                    'clip_timestamps': clips,
+                    'batch_size': min(self.batch_size, len(clips)),
+                    'without_timestamps': False,  # チャンク内のセグメント区切りを得る
+                })
+                segments, info = self.batched_model.transcribe(audio, **transcribe_params)
+                info_language = getattr(info, 'language', language)
+
+                # セグメントの中点が属するチャンクへ振り分け、チャンク先頭基準の時刻に戻す
+                for segment in segments:
+                    middle = (segment.start + segment.end) / 2
+                    index = int(np.searchsorted(starts, middle, side='right')) - 1
+                    index = min(max(index, 0), len(audio_list) - 1)
+                    segment_dict = self._segment_to_dict(segment, len(chunk_segments[index]) + 1)
+                    segment_dict['start'] = min(max(segment.start - starts[index], 0.0), durations[index])
+                    segment_dict['end'] = min(max(segment.end - starts[index], 0.0), durations[index])
+                    chunk_segments[index].append(segment_dict)
+
+            results = []
+            for segments_of_chunk, duration in zip(chunk_segments, durations):
+                results.append({
+                    "segments": self._merge_segments(segments_of_chunk, language),
+                    "language": info_language,
+                    "duration": duration
+                })
+
+            logger.info(f"バッチ文字起こし完了: {sum(len(r['segments']) for r in results)}セグメント")
+            return results
+
+        except Exception as e:
+            logger.error(f"バッチ文字起こしエラー: {e}")
+            raise TranscriptionError(f"文字起こしに失敗しました: {e}")
+
+    def transcribe_words(self, audio_data: np.ndarray, language: str = None,
+                         decode_options: Dict = None) -> List[Dict]:
+        """音声データを単語単位のタイムスタンプ付きで文字起こし (ストリーミング用)
+
+        セグメントのマージは行わず、単語を時刻順に返す。
+
+        Args:
+            audio_data (np.ndarray): 音声データ (16kHz, モノラル)
+            language (str): "ja" or "en" (Noneの場合はデフォルト言語を使用)
+            decode_options (Dict): 既定のデコードパラメータを上書きする値
+
+        Returns:
+            List[Dict]: {"start", "end", "word", "probability"} のリスト (音声先頭からの秒)
+
+        Raises:
+            TranscriptionError: 文字起こしに失敗した場合
+        """
+        if not self.model_loaded or self.model is None:
+            raise TranscriptionError("モデルがロードされていません。先にload_model()を実行してください。")
+        self.cancel_warmup()
+        if language is None or language not in self.SUPPORTED_LANGUAGES:
+            language = self.language
+
+        try:
+            if audio_data.dtype != np.float32:
+                audio_data = audio_data.astype(np.float32)
+            transcribe_params = self._transcribe_params(language, decode_options)
+            transcribe_params['word_timestamps'] = True
+            segments, _ = self.model.transcribe(audio_data, **transcribe_params)
+
+            words = []
+            for segment in segments:
+                for word in segment.words or []:
+                    words.append({
+                        "start": word.start,
+                        "end": word.end,
+                        "word": word.word,
+                        "probability": word.probability,
+                    })
+            logger.debug(f"単語単位の文字起こし: {len(audio_data) / 16000:.2f}秒, {len(words)}単語")
+            return words
+
+        except Exception as e:
+            logger.error(f"文字起こしエラー: {e}")
+            raise TranscriptionError(f"文字起こしに失敗しました: {e}")
+
+    def warmup(self) -> Optional[Dict]:
+        """合成音声を録音と同じ言語・パラメータで2回デコードし、初回のデコードの遅さを先に済ませる
+
+        初回はアロケータの拡張やカーネル選択、トークナイザの準備を含むため遅い。
+        2回目の時間と比べてウォームアップの効果を報告する。cancel_warmup()が呼ばれたら
+        デコード中のセグメントの後で打ち切る (実行中のデコード自体は中断できない)。
+
+        Returns:
+            Optional[Dict]: {"seconds", "cold_seconds", "warm_seconds", "cancelled",
+                "overlap_seconds" (打ち切り後もデコードが続いた時間),
+                "wait_seconds" (最初の文字起こしが終了を待った時間)} (モデル未ロードの場合はNone)
+        """
+        if not self.model_loaded or self.model is None:
+            return None
+
+        # 無音では途中で打ち切られるため、小さなノイズに音声帯域の成分を混ぜる
+        sample_rate = 16000
+        t = np.arange(int(sample_rate * self.warmup_seconds), dtype=np.float32) / sample_rate
+        rng = np.random.default_rng(0)
+        audio = (0.05 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+                 + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+        params = self._transcribe_params(self.language, self.warmup_decode_options)
+
+        start = time.perf_counter()
+        timings = []
+        try:
+            for _ in range(2):
+                if self._warmup_cancel.is_set():
+                    break
+                decode_start = time.perf_counter()
+                segments, _ = self.model.transcribe(audio, **params)
+                for _ in segments:
+                    if self._warmup_cancel.is_set():
+                        break
+                timings.append(time.perf_counter() - decode_start)
+        except Exception as e:
+            logger.warning(f"ウォームアップに失敗しました (無視): {e}")
+
+        cancel_time = self._warmup_cancel_time
+        self.warmup_stats = {
+            "seconds": time.perf_counter() - start,
+            "cold_seconds": timings[0] if timings else None,
+            "warm_seconds": timings[1] if len(timings) > 1 else None,
+            "cancelled": self._warmup_cancel.is_set(),
+            "overlap_seconds": time.perf_counter() - cancel_time if cancel_time is not None else 0.0,
+            "wait_seconds": 0.0,
+        }
+        if len(timings) > 1:
+            logger.info(f"ウォームアップ完了: {self.warmup_stats['seconds']:.2f}秒 "
+                        f"({self.warmup_seconds:.1f}秒の音声のデコード 初回{timings[0]:.2f}秒 → "
+                        f"ウォームアップ後{timings[1]:.2f}秒)")
+        else:
+            # 打ち切り後に実行中のデコードが続いた時間 (最初の文字起こしと並行した時間)
+            logger.info(f"ウォームアップを打ち切りました: {self.warmup_stats['seconds']:.2f}秒 "
+                        f"(打ち切り後{self.warmup_stats['overlap_seconds']:.2f}秒で終了)")
+        return self.warmup_stats
+
+    def cancel_warmup(self):
+        """実行中のウォームアップを打ち切る (録音の最初のデコード前に呼ばれる)
+
+        並行デコード数が1の場合、実行中のデコードが終わるまで最初の文字起こしは
+        CTranslate2の中で待たされるため、ここで終了を待ってその時間を記録する。
+        複数の場合は待たずに戻り、実行中のデコードはバックグラウンドで最後まで走る。
+        """
+        thread = self._warmup_thread
+        if thread is None:
+            return
+        self._warmup_thread = None
+        if not thread.is_alive():
+            return
+        self._warmup_cancel_time = time.perf_counter()
+        self._warmup_cancel.set()
+        if self.num_workers > 1:
+            logger.info("実行中のウォームアップを待たずに文字起こしを開始します")
+            return
+
+        thread.join()
+        wait_seconds = time.perf_counter() - self._warmup_cancel_time
+        if self.warmup_stats is not None:
+            self.warmup_stats['wait_seconds'] = wait_seconds
+        logger.info(f"実行中のウォームアップの終了を{wait_seconds:.2f}秒待ってから文字起こしを開始します")
+
+    def _transcribe_params(self, language: str, decode_options: Dict = None) -> Dict:
+        """faster-whisperに渡すデコードパラメータ (decode_optionsで上書き)"""
+        params = {
+            'language': language,
+            'vad_filter': False,  # VADフィルター無効
+            'beam_size': 5,  # ビームサイズ（デフォルト: 5）
+            'best_of': 5,  # 5つの候補から最良のものを選択
+            'temperature': 0.0,  # 確定的な認識（ハルシネーション抑制）
+            'condition_on_previous_text': False,  # 前のテキストに依存しない（ハルシネーション抑制）
+            'compression_ratio_threshold': 2.4,  # ハルシネーション検出の閾値
+            'log_prob_threshold': -1.0,  # 低確率セグメントの閾値
+            'no_speech_threshold': 0.8,  # 無音判定の閾値（0.6→0.8に上げて厳しく）
+            'initial_prompt': None,  # プロンプトなし（ハルシネーション防止）
+            'word_timestamps': False,  # 単語レベルのタイムスタンプは不要
+        }
+        if decode_options:
+            params.update(decode_options)
+        return params
+
+    @staticmethod
+    def _segment_to_dict(segment, segment_id: int) -> Dict:
+        """faster-whisperのセグメントを辞書に変換"""
+        return {
+            "id": segment_id,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text.strip(),
+            "confidence": segment.avg_logprob if hasattr(segment, 'avg_logprob') else 0.0
+        }
+
     def set_language(self, language: str):
         """言語設定を変更
 
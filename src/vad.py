@@ -0,0 +1,184 @@
+"""
+OfflineVoiceLogger - 音声区間検出モジュール
+
+onnxruntimeに依存しない軽量なエネルギーベースVAD
+- フレーム単位のRMSをベクトル化して計算
+- 雑音レベルの追従 (適応しきい値)
+- ハングオーバーによる語尾の保護
+"""
+
+import numpy as np
+from typing import Dict
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class EnergyVAD:
+    """エネルギーベースの音声区間検出クラス"""
+
+    def __init__(self, sample_rate: int = 16000, threshold: float = 0.5,
+                 frame_ms: int = 30, hangover_ms: int = 150):
+        """
+        Args:
+            sample_rate (int): サンプリングレート
+            threshold (float): VADしきい値 (0.0-1.0)
+                               0.5で雑音レベル比+10dBを音声とみなす
+            frame_ms (int): 判定フレーム長 (ミリ秒)
+            hangover_ms (int): 音声終了後も音声とみなす時間 (ミリ秒)
+        """
+        self.sample_rate = sample_rate
+        self.threshold = min(max(threshold, 0.0), 1.0)
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+
+        # 絶対無音とみなすRMS (-80dBFS)
+        self.silence_floor = 1e-4
+        # スコア1.0に対応するSN比 (dB)
+        self.snr_range_db = 20.0
+
+        self.reset()
+
+    def reset(self):
+        """雑音レベルとハングオーバー状態をリセット"""
+        self.noise_level = 1e-3
+        self._hangover = 0
+
+    def frame_rms(self, samples: np.ndarray) -> np.ndarray:
+        """フレームごとのRMSを計算 (端数サンプルは無視)
+
+        Args:
+            samples (np.ndarray): 音声データ
+
+        Returns:
+            np.ndarray: フレームごとのRMS
+        """
+        n_frames = len(samples) // self.frame_samples
+        if n_frames == 0:
+            return np.zeros(0, dtype=np.float32)
+        frames = samples[:n_frames * self.frame_samples].reshape(n_frames, self.frame_samples)
+        return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """フレームごとに音声/非音声を判定
+
+        Args:
+            samples (np.ndarray): 音声データ (フレーム長の倍数が望ましい)
+
+        Returns:
+            np.ndarray: フレームごとの判定結果 (bool)
+        """
+        rms = self.frame_rms(samples)
+        snr_db = 20.0 * np.log10(np.maximum(rms, 1e-10) / self.noise_level)
+        scores = np.clip(snr_db / self.snr_range_db, 0.0, 1.0)
+
+        is_speech = np.zeros(len(rms), dtype=bool)
+        for i in range(len(rms)):
+            if rms[i] > self.silence_floor and scores[i] >= self.threshold:
+                is_speech[i] = True
+                self._hangover = self.hangover_frames
+            else:
+                if self._hangover > 0:
+                    is_speech[i] = True
+                    self._hangover -= 1
+                # 非音声フレームで雑音レベルを追従 (下方向は即時)
+                if rms[i] < self.noise_level:
+                    self.noise_level = max(float(rms[i]), self.silence_floor)
+                else:
+                    self.noise_level = 0.95 * self.noise_level + 0.05 * float(rms[i])
+
+            # 定常ノイズを音声と判定し続けないよう、音声中も雑音レベルを緩やかに引き上げる
+            if is_speech[i]:
+                self.noise_level *= 1.001
+
+        return is_speech
+
+
+class SilenceGate:
+    """チャンク単位の無音判定クラス
+
+    フレームごとのRMSとゼロ交差率をベクトル化して計算し、
+    有音フレームがほとんどないチャンクを無音と判定する。
+    無音チャンクはモデルに渡さずに読み飛ばし、節約できたデコード時間を集計する。
+    """
+
+    def __init__(self, sample_rate: int = 16000, rms_threshold: float = 0.003,
+                 max_zcr: float = 0.35, min_active_ratio: float = 0.05,
+                 frame_ms: int = 30):
+        """
+        Args:
+            sample_rate (int): サンプリングレート
+            rms_threshold (float): 有音とみなすフレームRMS (0.003 ≒ -50dBFS)
+            max_zcr (float): 有音とみなすゼロ交差率の上限 (これを超える弱い音は雑音扱い)
+            min_active_ratio (float): 有音フレームの割合がこれ未満なら無音チャンク
+            frame_ms (int): 判定フレーム長 (ミリ秒)
+        """
+        self.sample_rate = sample_rate
+        self.rms_threshold = rms_threshold
+        self.max_zcr = max_zcr
+        self.min_active_ratio = min_active_ratio
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        """セッション統計をリセット (録音開始時に呼ぶ)"""
+        self.skipped_chunks = 0
+        self.skipped_seconds = 0.0
+        self.passed_chunks = 0
+        self.decoded_seconds = 0.0
+        self.decode_time = 0.0
+
+    def is_silent(self, samples: np.ndarray) -> bool:
+        """チャンクが無音かどうかを判定し、統計を更新する
+
+        Args:
+            samples (np.ndarray): 音声データ
+
+        Returns:
+            bool: 無音の場合True
+        """
+        n_frames = len(samples) // self.frame_samples
+        if n_frames == 0:
+            return False
+
+        frames = samples[:n_frames * self.frame_samples].reshape(n_frames, self.frame_samples)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_samples - 1)
+
+        # 十分大きい音はZCRに関係なく有音、弱い音は声らしい (ZCRが低い) 場合のみ有音
+        active = (rms >= 4 * self.rms_threshold) | ((rms >= self.rms_threshold) & (zcr <= self.max_zcr))
+        silent = np.count_nonzero(active) < self.min_active_ratio * n_frames
+
+        if silent:
+            self.skipped_chunks += 1
+            self.skipped_seconds += len(samples) / self.sample_rate
+        else:
+            self.passed_chunks += 1
+        return bool(silent)
+
+    def record_decode(self, audio_seconds: float, decode_time: float):
+        """モデルに渡したチャンクのデコード時間を記録
+
+        Args:
+            audio_seconds (float): デコードした音声の長さ (秒)
+            decode_time (float): デコードに要した時間 (秒)
+        """
+        self.decoded_seconds += audio_seconds
+        self.decode_time += decode_time
+
+    def get_stats(self) -> Dict:
+        """セッション統計を取得
+
+        Returns:
+            Dict: 読み飛ばしたチャンク数・秒数と推定節約デコード時間
+        """
+        rtf = self.decode_time / self.decoded_seconds if self.decoded_seconds > 0 else 0.0
+        return {
+            "skipped_chunks": self.skipped_chunks,
+            "skipped_seconds": self.skipped_seconds,
+            "passed_chunks": self.passed_chunks,
+            "real_time_factor": rtf,
+            "saved_decode_time": self.skipped_seconds * rtf,
+        }
@@ -0,0 +1,257 @@
+"""
+音声パイプラインのテスト - リングバッファ・チャンクキュー・リプレイ入力のチャンク分割
+
+オーディオデバイスなしで実行できる (入力はReplaySource)。
+実行: python -m pytest test_audio_pipeline.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from audio_capture import AudioCapture, AudioRingBuffer, DeviceRegistry
+from audio_queue import BufferedChunk, ChunkQueue
+from audio_source import ReplaySource
+
+SAMPLE_RATE = 16000
+
+
+def _ramp(n: int, start: int = 0) -> np.ndarray:
+    """位置ごとに値が異なる音声 (どのサンプルが取り出されたか確認できる)"""
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+# --- AudioRingBuffer ---
+
+def test_ring_buffer_wraps_and_keeps_order():
+    buffer = AudioRingBuffer(10)
+    buffer.write(_ramp(7))
+    np.testing.assert_array_equal(buffer.read(5), _ramp(5))
+    buffer.consume(5)
+
+    # 末尾を越えて先頭へ折り返す書き込み
+    buffer.write(_ramp(6, start=7))
+    assert len(buffer) == 8
+    np.testing.assert_array_equal(buffer.read(), _ramp(8, start=5))
+    np.testing.assert_array_equal(buffer.read(3, skip=4), _ramp(3, start=9))
+
+
+def test_ring_buffer_overflow_drops_newest_samples():
+    buffer = AudioRingBuffer(8)
+    buffer.write(_ramp(10))
+    assert len(buffer) == 8
+    assert buffer.get_stats() == {"overflow_count": 1, "overflow_samples": 2}
+    np.testing.assert_array_equal(buffer.read(), _ramp(8))
+
+
+def test_ring_buffer_consume_keeps_samples_written_after_read():
+    buffer = AudioRingBuffer(16)
+    buffer.write(_ramp(4))
+    audio = buffer.read()
+    # 読み出し後にコールバックが書き込んだ分は、読み出した分の破棄で失われない
+    buffer.write(_ramp(3, start=4))
+    buffer.consume(len(audio))
+    np.testing.assert_array_equal(buffer.read(), _ramp(3, start=4))
+
+
+def test_ring_buffer_taps_receive_every_sample():
+    class Tap:
+        def __init__(self):
+            self.blocks = []
+
+        def write(self, samples):
+            self.blocks.append(np.array(samples))
+
+    buffer = AudioRingBuffer(4)
+    tap = Tap()
+    buffer.add_tap(tap)
+    buffer.write(_ramp(6))  # リングから溢れる分もタップには渡る
+    buffer.remove_tap(tap)
+    buffer.write(_ramp(2))
+    np.testing.assert_array_equal(np.concatenate(tap.blocks), _ramp(6))
+
+
+# --- ChunkQueue ---
+
+def _item(length_seconds: float, offset: float, source: str = "mic", hop_seconds: float = None, value: float = None):
+    n = int(length_seconds * SAMPLE_RATE)
+    data = (np.full(n, value, dtype=np.float32) if value is not None
+            else _ramp(n, start=int(offset * SAMPLE_RATE)))
+    hop = int(hop_seconds * SAMPLE_RATE) if hop_seconds is not None else None
+    return BufferedChunk(data, hop), offset, source
+
+
+def _drain(chunk_queue: ChunkQueue):
+    items = []
+    while not chunk_queue.empty():
+        items.append(chunk_queue.get(timeout=0))
+    return items
+
+
+def test_chunk_queue_drop_newest(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="drop_newest", spool_dir=str(tmp_path))
+    for offset in (0.0, 1.0, 2.0):
+        chunk_queue.put(_item(1.0, offset))
+    assert [offset for _, offset, _ in _drain(chunk_queue)] == [0.0, 1.0]
+    metrics = chunk_queue.get_metrics()
+    assert metrics['dropped_chunks'] == 1
+    assert metrics['dropped_seconds'] == 1.0
+
+
+def test_chunk_queue_drop_oldest(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="drop_oldest", spool_dir=str(tmp_path))
+    for offset in (0.0, 1.0, 2.0):
+        chunk_queue.put(_item(1.0, offset))
+    assert [offset for _, offset, _ in _drain(chunk_queue)] == [1.0, 2.0]
+    assert chunk_queue.get_metrics()['dropped_chunks'] == 1
+
+
+def test_chunk_queue_spill_preserves_order_and_data(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="spill", spool_dir=str(tmp_path))
+    offsets = [0.0, 1.0, 2.0, 3.0, 4.0]
+    for offset in offsets:
+        chunk_queue.put(_item(1.0, offset, hop_seconds=0.5))
+    items = _drain(chunk_queue)
+    assert [offset for _, offset, _ in items] == offsets
+    for chunk, offset, _ in items:
+        np.testing.assert_array_equal(chunk.data, _ramp(SAMPLE_RATE, start=int(offset * SAMPLE_RATE)))
+        assert chunk.hop == SAMPLE_RATE // 2
+    assert chunk_queue.get_metrics()['spilled_chunks'] == 3
+    chunk_queue.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_chunk_queue_merge_contiguous_fixed_chunks(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="merge", spool_dir=str(tmp_path))
+    for offset in (0.0, 1.0, 2.0):
+        chunk_queue.put(_item(1.0, offset))
+    (merged, offset, _), (last, last_offset, _) = _drain(chunk_queue)
+    assert (offset, last_offset) == (0.0, 2.0)
+    np.testing.assert_array_equal(merged.data, _ramp(2 * SAMPLE_RATE))
+    assert merged.hop == 2 * SAMPLE_RATE
+    assert chunk_queue.get_metrics()['merged_chunks'] == 1
+
+
+def test_chunk_queue_merge_sliding_chunks_uses_hop_of_first(tmp_path):
+    # 2秒窓・1秒進み: 前の窓の後半は次の窓の先頭と同じ音声
+    chunk_queue = ChunkQueue(maxsize=2, policy="merge", spool_dir=str(tmp_path))
+    for offset in (0.0, 1.0, 2.0):
+        chunk_queue.put(_item(2.0, offset, hop_seconds=1.0))
+    (merged, offset, _), _ = _drain(chunk_queue)
+    assert offset == 0.0
+    # 重なりを二重に含まず、タイムラインどおりに並ぶ
+    np.testing.assert_array_equal(merged.data, _ramp(3 * SAMPLE_RATE))
+    assert merged.hop == 2 * SAMPLE_RATE
+
+
+def test_chunk_queue_merge_fills_vad_gap_with_silence(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="merge", spool_dir=str(tmp_path))
+    chunk_queue.put(_item(1.0, 0.0, value=1.0))
+    chunk_queue.put(_item(1.0, 1.5, value=2.0))
+    chunk_queue.put(_item(1.0, 3.0, value=3.0))
+    (merged, offset, _), _ = _drain(chunk_queue)
+    assert offset == 0.0
+    assert len(merged) == int(2.5 * SAMPLE_RATE)
+    np.testing.assert_array_equal(merged.data[:SAMPLE_RATE], 1.0)
+    np.testing.assert_array_equal(merged.data[SAMPLE_RATE:int(1.5 * SAMPLE_RATE)], 0.0)
+    np.testing.assert_array_equal(merged.data[int(1.5 * SAMPLE_RATE):], 2.0)
+
+
+def test_chunk_queue_merge_only_joins_same_source(tmp_path):
+    chunk_queue = ChunkQueue(maxsize=2, policy="merge", spool_dir=str(tmp_path))
+    chunk_queue.put(_item(1.0, 0.0, source="mic"))
+    chunk_queue.put(_item(1.0, 0.0, source="loopback"))
+    chunk_queue.put(_item(1.0, 1.0, source="mic"))
+    # 同じソースの組がないため、最も古いチャンクを破棄する
+    assert [(offset, source) for _, offset, source in _drain(chunk_queue)] == [(0.0, "loopback"), (1.0, "mic")]
+    assert chunk_queue.get_metrics()['dropped_chunks'] == 1
+
+
+# --- AudioCapture ---
+
+def test_fresh_capture_reports_silence_before_first_callback():
+    capture = AudioCapture(sample_rate=SAMPLE_RATE)
+    assert capture.get_audio_level() == 0.0
+    assert capture.get_stream_stats()['callbacks'] == 0
+
+
+# --- ReplaySourceからのチャンク分割 ---
+
+def _capture_all(chunk_mode: str, seconds: float = 5.0, **kwargs):
+    audio = _ramp(int(seconds * SAMPLE_RATE)) / (seconds * SAMPLE_RATE)
+    source = ReplaySource(audio, SAMPLE_RATE, speed=0, block_size=1600, jitter=0.0)
+    capture = AudioCapture(sample_rate=SAMPLE_RATE, chunk_mode=chunk_mode,
+                           device_registry=DeviceRegistry(source), **kwargs)
+    capture.start_capture(0)
+    chunks = []
+    deadline = time.monotonic() + 10
+    try:
+        while not capture.is_finished and time.monotonic() < deadline:
+            chunk = capture.acquire_chunk()
+            if chunk is None:
+                time.sleep(0.01)
+                continue
+            chunks.append((np.array(chunk.data), chunk.hop, chunk.lead))
+            chunk.release()
+    finally:
+        capture.stop_capture()
+    return audio, chunks
+
+
+def test_replay_fixed_chunks_cover_input_once():
+    audio, chunks = _capture_all("fixed", window_seconds=2.0)
+    np.testing.assert_array_equal(np.concatenate([data for data, _, _ in chunks]), audio)
+    assert sum(hop for _, hop, _ in chunks) == len(audio)
+
+
+def test_replay_sliding_windows_overlap_and_advance_by_hop():
+    audio, chunks = _capture_all("sliding", window_seconds=2.0, hop_seconds=1.0)
+    assert all(len(data) == 2 * SAMPLE_RATE and hop == SAMPLE_RATE for data, hop, _ in chunks)
+    position = 0
+    for data, hop, lead in chunks:
+        position += lead
+        np.testing.assert_array_equal(data, audio[position:position + len(data)])
+        last_end = position + len(data)
+        position += hop
+    # 最後の窓が入力の終わりまで覆い、重なり分だけの残りは窓にしない
+    assert last_end == len(audio)
+
+
+def test_replay_backpressure_is_not_treated_as_stall():
+    # 最速モードで下流を待つ間はコールバックが止まるが、デバイスの停止として再接続しない
+    audio = _ramp(2 * SAMPLE_RATE) / (2 * SAMPLE_RATE)
+    held = {'until': time.monotonic() + 1.5}
+    source = ReplaySource(audio, SAMPLE_RATE, speed=0, block_size=1600, jitter=0.0,
+                          backpressure=lambda: time.monotonic() < held['until'])
+    capture = AudioCapture(sample_rate=SAMPLE_RATE, window_seconds=1.0,
+                           device_registry=DeviceRegistry(source), stall_timeout_seconds=0.5)
+    capture.start_capture(0)
+    received = []
+    deadline = time.monotonic() + 10
+    try:
+        while not capture.is_finished and time.monotonic() < deadline:
+            chunk = capture.acquire_chunk()
+            if chunk is None:
+                time.sleep(0.01)
+                continue
+            received.append(np.array(chunk.data))
+            chunk.release()
+    finally:
+        capture.stop_capture()
+    assert len(source.streams) == 1
+    assert capture.timeline_events == []
+    np.testing.assert_array_equal(np.concatenate(received), audio)
+
+
+def test_replay_reopened_stream_resumes_position():
+    source = ReplaySource(_ramp(4800), SAMPLE_RATE, speed=0, block_size=1600, jitter=0.0)
+    blocks = []
+    first = source.open_stream(0, 1, SAMPLE_RATE, lambda data, *_: blocks.append(np.array(data[:, 0])))
+    first.position = 1600  # 1ブロック送った所で切断されたとする
+    second = source.open_stream(0, 1, SAMPLE_RATE, lambda data, *_: blocks.append(np.array(data[:, 0])))
+    second.start()
+    second._thread.join(timeout=5)
+    np.testing.assert_array_equal(np.concatenate(blocks), _ramp(3200, start=1600))
@@ -0,0 +1,315 @@
+"""
+文字起こしパイプラインのテスト - セグメント統合・結果の並べ替え・ストリーミングの確定・
+デコード設定の適応制御・ウォームアップ・推論サーバーのプロトコル
+
+モデルを使わずに実行できる。
+実行: python -m pytest test_transcription_pipeline.py
+"""
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+import preload_worker as protocol
+from decode_controller import DecodeController
+from inference_client import InferenceClient
+from result_sequencer import ResultSequencer
+from segment_stitcher import SegmentStitcher
+from streaming import HypothesisBuffer
+from transcriber import ModelLoadError, Transcriber, TranscriptionError
+
+
+def _segment(start: float, end: float, text: str = "") -> dict:
+    return {"start": start, "end": end, "text": text, "confidence": 1.0}
+
+
+def _word(start: float, end: float, word: str) -> dict:
+    return {"start": start, "end": end, "word": word, "probability": 1.0}
+
+
+# --- SegmentStitcher ---
+
+def test_stitcher_splits_overlap_at_its_midpoint():
+    # 6秒窓・4秒進み: 重なり2秒の中央 (窓の開始から5秒) で担当範囲を分ける
+    stitcher = SegmentStitcher(window_seconds=6.0, hop_seconds=4.0)
+    first = stitcher.stitch([_segment(0.0, 2.0, "a"), _segment(4.6, 5.6, "b")], 0.0, 6.0, 4.0)
+    assert [s['text'] for s in first] == ["a"]
+
+    second = stitcher.stitch([_segment(4.5, 5.6, "b"), _segment(8.0, 9.0, "c")], 4.0, 6.0, 4.0)
+    assert [s['text'] for s in second] == ["b", "c"]
+    assert stitcher.get_stats()['dropped_segments'] == 1
+
+
+def test_stitcher_drops_segments_overlapping_committed_range():
+    stitcher = SegmentStitcher(window_seconds=6.0, hop_seconds=4.0)
+    stitcher.stitch([_segment(0.0, 5.5, "a")], 0.0, 6.0, 4.0)
+    # 担当範囲内でも、確定済みの範囲と半分以上重なるものは重複として除く
+    accepted = stitcher.stitch([_segment(5.0, 6.0, "dup"), _segment(6.0, 8.0, "b")], 4.0, 6.0, 4.0)
+    assert [s['text'] for s in accepted] == ["b"]
+
+
+def test_stitcher_reports_overlap_overhead():
+    stitcher = SegmentStitcher(window_seconds=6.0, hop_seconds=4.0)
+    for i in range(3):
+        stitcher.stitch([], i * 4.0, 6.0, 4.0, decode_time=1.5)
+    stats = stitcher.get_stats()
+    assert stats['overhead_ratio'] == pytest.approx(0.5)
+    assert stats['overhead_decode_time'] == pytest.approx(1.5)
+
+
+# --- ResultSequencer ---
+
+def test_sequencer_emits_in_issue_order():
+    sequencer = ResultSequencer()
+    sequences = [sequencer.issue() for _ in range(4)]
+    emitted = []
+    sequencer.complete(sequences[2], "c", emitted.append)
+    sequencer.complete(sequences[1], "b", emitted.append)
+    assert emitted == []
+    sequencer.complete(sequences[0], "a", emitted.append)
+    assert emitted == ["a", "b", "c"]
+    sequencer.complete(sequences[3], "d", emitted.append)
+    assert emitted == ["a", "b", "c", "d"]
+    assert sequencer.max_pending == 3
+
+
+def test_sequencer_skips_failed_results_without_stalling():
+    sequencer = ResultSequencer()
+    first, second = sequencer.issue(), sequencer.issue()
+    emitted = []
+    sequencer.complete(second, "b", emitted.append)
+    sequencer.complete(first, None, emitted.append)  # 失敗したチャンク
+    assert emitted == ["b"]
+
+
+def test_sequencer_survives_emit_errors():
+    sequencer = ResultSequencer()
+    first, second = sequencer.issue(), sequencer.issue()
+    emitted = []
+
+    def emit(value):
+        if value == "a":
+            raise RuntimeError("表示エラー")
+        emitted.append(value)
+
+    sequencer.complete(second, "b", emit)
+    sequencer.complete(first, "a", emit)
+    assert emitted == ["b"]
+
+
+# --- HypothesisBuffer ---
+
+def test_hypothesis_buffer_commits_agreed_prefix():
+    buffer = HypothesisBuffer()
+    buffer.insert([_word(0.0, 0.5, "今日は"), _word(0.5, 1.0, "いい")])
+    assert buffer.flush() == []
+
+    buffer.insert([_word(0.0, 0.5, "今日は"), _word(0.5, 1.0, "良い"), _word(1.0, 1.5, "天気")])
+    assert [w['word'] for w in buffer.flush()] == ["今日は"]
+    assert buffer.last_committed_time == 0.5
+
+    buffer.insert([_word(0.5, 1.0, "良い"), _word(1.0, 1.5, "天気")])
+    assert [w['word'] for w in buffer.flush()] == ["良い", "天気"]
+
+
+def test_hypothesis_buffer_removes_repeated_committed_words():
+    buffer = HypothesisBuffer()
+    for _ in range(2):
+        buffer.insert([_word(0.0, 0.5, "Hello"), _word(0.5, 1.0, "world")])
+        buffer.flush()
+    assert buffer.last_committed_time == 1.0
+    # 切り詰め後の再デコードで確定済みの末尾が時刻をずらして再び現れる
+    buffer.insert([_word(0.95, 1.0, "world"), _word(1.0, 1.4, "again")])
+    assert [w['word'] for w in buffer.new] == ["again"]
+
+
+def test_hypothesis_buffer_complete_flushes_pending_words():
+    buffer = HypothesisBuffer()
+    buffer.insert([_word(0.0, 0.5, "a"), _word(0.5, 1.0, "b")])
+    buffer.flush()
+    assert [w['word'] for w in buffer.complete()] == ["a", "b"]
+    assert buffer.last_committed_time == 1.0
+    buffer.pop_committed(0.6)
+    assert [w['word'] for w in buffer.committed_in_buffer] == ["b"]
+
+
+# --- DecodeController ---
+
+def test_decode_controller_steps_down_under_load():
+    controller = DecodeController(step_down_rtf=0.9)
+    level, options, _ = controller.select()
+    assert (level, options['beam_size']) == (0, 5)
+
+    # 1チャンクだけでは判断せず、2チャンク目で下げる
+    controller.record(0, 4.0, 6.0, queue_depth=0)
+    assert controller.level == 0
+    controller.record(0, 4.0, 6.0, queue_depth=0)
+    level, options, reason = controller.select()
+    assert (level, options['beam_size']) == (1, 2)
+    assert reason.startswith("beam5 → beam2")
+    # 切り替えの理由は1回だけ返す
+    assert controller.select()[2] is None
+
+
+def test_decode_controller_steps_down_on_queue_depth_and_ignores_stale_levels():
+    controller = DecodeController(queue_high=3)
+    controller.record(0, 4.0, 0.4, queue_depth=3)
+    assert controller.level == 1
+    # 切り替え前の段階で投入したチャンクの結果では判断しない
+    controller.record(0, 4.0, 0.4, queue_depth=5)
+    assert controller.level == 1
+    assert controller.get_stats()['seconds_by_level']['beam5'] == 8.0
+
+
+def test_decode_controller_steps_up_after_calm_period():
+    controller = DecodeController(step_up_rtf=0.5, step_up_chunks=3, queue_high=2)
+    controller.record(0, 4.0, 0.4, queue_depth=2)
+    assert controller.level == 1
+    for _ in range(2):
+        controller.record(1, 4.0, 0.4, queue_depth=0)
+    assert controller.level == 1
+    controller.record(1, 4.0, 0.4, queue_depth=0)
+    assert controller.level == 0
+    assert controller.get_stats()['changes'] == 2
+
+
+def test_decode_controller_disabled_keeps_best_quality():
+    controller = DecodeController(enabled=False)
+    for _ in range(5):
+        controller.record(0, 1.0, 10.0, queue_depth=10)
+    assert controller.select()[0] == 0
+
+
+# --- ウォームアップ ---
+
+class _SlowModel:
+    """1回のデコードに時間がかかるモデル (同時に1つしかデコードしない)"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = []  # (開始時刻, 終了時刻, パラメータ)
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **params):
+        with self._lock:
+            start = time.perf_counter()
+            time.sleep(self.seconds)
+            self.calls.append((start, time.perf_counter(), params))
+        return iter(()), None
+
+
+def _warming_transcriber(model, **kwargs) -> Transcriber:
+    transcriber = Transcriber("unused", language="en", warmup_seconds=0.5, **kwargs)
+    transcriber.model = model
+    transcriber.model_loaded = True
+    transcriber._warmup_thread = threading.Thread(target=transcriber.warmup, daemon=True)
+    transcriber._warmup_thread.start()
+    time.sleep(0.05)  # 初回のデコードが始まるまで待つ
+    return transcriber
+
+
+def test_warmup_uses_session_language_and_decode_options():
+    model = _SlowModel(0.01)
+    transcriber = _warming_transcriber(model, warmup_decode_options=DecodeController().initial_options())
+    transcriber._warmup_thread.join(timeout=5)
+    assert len(model.calls) == 2
+    for _, _, params in model.calls:
+        assert params['language'] == "en"
+        assert (params['beam_size'], params['best_of']) == (5, 5)
+
+
+def test_first_decode_waits_for_running_warmup_and_records_it():
+    model = _SlowModel(0.3)
+    transcriber = _warming_transcriber(model)
+    transcriber.transcribe(np.zeros(16000, dtype=np.float32))
+    # 打ち切られたウォームアップは初回のデコードだけで終わり、その後に文字起こしが始まる
+    (_, warmup_end, _), (decode_start, _, _) = model.calls
+    assert decode_start >= warmup_end
+    stats = transcriber.warmup_stats
+    assert stats['cancelled'] and stats['warm_seconds'] is None
+    assert 0.1 < stats['wait_seconds'] < 1.0
+
+
+# --- 推論サーバーのプロトコル ---
+
+def test_protocol_request_round_trip():
+    audio_list = [np.linspace(-1, 1, 1600, dtype=np.float32), np.zeros(0, dtype=np.float32),
+                  np.ones(16000, dtype=np.float32) * 0.25]
+    data = protocol.encode_request(protocol.OP_TRANSCRIBE, audio_list, "ja", {"beam_size": 2, "best_of": 2})
+    op, decoded, language, options = protocol.decode_request(data)
+    assert op == protocol.OP_TRANSCRIBE
+    assert language == "ja"
+    assert options == {"beam_size": 2, "best_of": 2}
+    assert len(decoded) == len(audio_list)
+    for expected, actual in zip(audio_list, decoded):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_protocol_request_without_options_uses_defaults():
+    data = protocol.encode_request(protocol.OP_PING)
+    op, audio_list, language, options = protocol.decode_request(data)
+    assert (op, audio_list, language, options) == (protocol.OP_PING, [], "", {})
+
+
+def test_protocol_response_round_trip():
+    chunks = [
+        ("ja", 6.0, [(0.0, 1.5, -0.2, "こんにちは。"), (1.5, 3.0, -0.4, "今日は晴れです。")]),
+        ("en", 2.0, []),
+    ]
+    decoded = protocol.decode_response(protocol.encode_response(chunks))
+    assert len(decoded) == 2
+    language, duration, records = decoded[0]
+    assert (language, duration) == ("ja", 6.0)
+    assert [text for _, _, _, text in records] == ["こんにちは。", "今日は晴れです。"]
+    assert records[1][:3] == pytest.approx((1.5, 3.0, -0.4))
+    assert decoded[1] == ("en", 2.0, [])
+
+
+def test_protocol_error_response_raises():
+    with pytest.raises(RuntimeError, match="モデルがロードされていません"):
+        protocol.decode_response(protocol.encode_error("モデルがロードされていません"))
+
+
+def test_protocol_rejects_other_versions():
+    data = bytearray(protocol.encode_request(protocol.OP_PING))
+    data[0] = protocol.PROTOCOL_VERSION + 1
+    with pytest.raises(ValueError):
+        protocol.decode_request(bytes(data))
+
+
+@pytest.mark.parametrize("language, options", [
+    ("ja", {"beam_size": 256}),
+    ("ja", {"best_of": -1}),
+    ("jpn", {}),
+    ("日本", {}),
+])
+def test_protocol_rejects_values_that_do_not_fit_the_header(language, options):
+    with pytest.raises(ValueError):
+        protocol.encode_request(protocol.OP_TRANSCRIBE, [np.zeros(16, dtype=np.float32)], language, options)
+
+
+def test_client_reports_unencodable_request_as_transcription_error():
+    client = InferenceClient("unused")
+    client._state = {}  # 接続済みとする (要求を作れないため接続は使われない)
+    with pytest.raises(TranscriptionError, match="beam_size"):
+        client.transcribe(np.zeros(16000, dtype=np.float32), "ja", {"beam_size": 300})
+
+
+def test_client_terminates_server_that_does_not_finish_loading(tmp_path, monkeypatch):
+    client = InferenceClient(str(tmp_path), load_timeout=0.3)
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    monkeypatch.setattr(client, "_attach", lambda: False)
+    monkeypatch.setattr(client, "_spawn_server", lambda: process)
+    try:
+        with pytest.raises(ModelLoadError, match="タイムアウト"):
+            client.load_model()
+        assert process.poll() is not None
+    finally:
+        if process.poll() is None:
+            process.kill()